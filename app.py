@@ -1,5 +1,8 @@
 import dash
-from dash import dcc, html, dash_table, Input, Output, State, callback_context
+from dash import dcc, html, dash_table, Input, Output, State, callback_context, ClientsideFunction, DiskcacheManager
+from dash.exceptions import PreventUpdate
+import diskcache
+from flask import request, jsonify, send_file, Response
 import plotly.express as px
 import plotly.graph_objects as go
 import pandas as pd
@@ -10,12 +13,18 @@ import numpy as np
 import src.fuzzy_logic as fuzzy
 from src.data_processor import data_processor
 from src.alert_system import alert_system
-from src.report_generator import report_generator
+from src.report_generator import report_generator, student_pdf_filename
+from src.report_jobs import report_jobs
+from src.artifact_store import artifact_store, is_safe_name
+from src.data_ingestion import data_ingestor
 import os
 import json
+import mimetypes
+import uuid
 from datetime import datetime
-import base64
 import io
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
 
 # Cargar el dataset mejorado
 try:
@@ -50,6 +59,17 @@ except FileNotFoundError:
 app = dash.Dash(__name__, suppress_callback_exceptions=True)
 server = app.server
 
+# Servidor de IA (ia_server.py); el navegador solo habla con el dashboard, que reenvía /api/chat/stream
+IA_SERVER_URL = os.getenv('IA_SERVER_URL', 'http://127.0.0.1:5001')
+# Mensajes que se muestran en el chat; el historial para la IA lo guarda ia_server por sesión
+CHAT_MAX_MESSAGES = int(os.getenv('CHAT_MAX_MESSAGES', '40'))
+
+# Callbacks en segundo plano (chat sin streaming): corren en un proceso aparte y dejan el
+# resultado en una caché en disco, sin ocupar un worker de Dash mientras la IA responde
+background_callback_manager = DiskcacheManager(
+    diskcache.Cache(os.getenv('DASH_CACHE_DIR', os.path.join(base_dir, 'cache', 'dash')))
+)
+
 # ======================
 # 🚀 API Simple (sin modificar el código existente)
 # ======================
@@ -57,30 +77,87 @@ server = app.server
 def download_pdf(filename):
     """Endpoint para descargar PDF generado"""
     try:
-        # Obtener el PDF del almacenamiento temporal (en una implementación real usarías Redis o similar)
-        if hasattr(server, 'temp_pdf_storage') and filename in server.temp_pdf_storage:
-            pdf_data = server.temp_pdf_storage[filename]
-            
-            from flask import Response
-            response = Response(
-                pdf_data,
-                mimetype='application/pdf',
-                headers={
-                    'Content-Disposition': f'attachment; filename={filename}',
-                    'Content-Type': 'application/pdf'
-                }
-            )
-            
-            # Limpiar el almacenamiento temporal después de la descarga
-            del server.temp_pdf_storage[filename]
-            
-            return response
-        else:
+        if not is_safe_name(filename):
             return "Archivo no encontrado", 404
+        
+        # El PDF se sirve desde el almacén de artefactos (compartido entre workers
+        # y con expiración automática), transmitiéndolo sin cargarlo en memoria
+        pdf_file = artifact_store.open(filename)
+        if pdf_file is None:
+            return "Archivo no encontrado", 404
+        
+        return send_file(
+            pdf_file,
+            mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream',
+            as_attachment=True,
+            download_name=filename
+        )
             
     except Exception as e:
         return f"Error descargando archivo: {str(e)}", 500
 
+@server.route('/download-student-pdf/<int:student_id>')
+def download_student_pdf(student_id):
+    """Endpoint para descargar el reporte individual de un estudiante con sus gráficos"""
+    try:
+        student_data = data_processor.get_student_detail(student_id)
+        if not student_data:
+            return "Estudiante no encontrado", 404
+        
+        report = report_generator.generate_student_report(student_data)
+        charts = report_generator.render_student_charts(report, data_processor.get_data_version())
+        pdf_bytes = report_generator.create_student_pdf(report, charts)
+        
+        return send_file(
+            io.BytesIO(pdf_bytes),
+            mimetype='application/pdf',
+            as_attachment=True,
+            download_name=student_pdf_filename(report)
+        )
+    
+    except Exception as e:
+        return f"Error generando reporte del estudiante: {str(e)}", 500
+
+@server.route('/api/upload-students', methods=['POST'])
+def upload_students():
+    """Recibe un archivo de estudiantes (cuerpo binario) y encola su importación por bloques"""
+    try:
+        # El cuerpo se copia a disco por bloques: la memoria no depende del tamaño del archivo
+        job_id = data_ingestor.submit_stream(request.stream, request.args.get('filename', ''))
+        return jsonify({"id": job_id})
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": f"Error procesando archivo: {str(e)}"}), 500
+
+@server.route('/api/chat/stream', methods=['POST'])
+def proxy_chat_stream():
+    """Reenvía el chat en streaming (Server-Sent Events) de ia_server desde el mismo origen del dashboard"""
+    import requests
+    
+    try:
+        upstream = requests.post(f"{IA_SERVER_URL}/api/chat/stream", json=request.get_json(silent=True) or {},
+                                 stream=True, timeout=(5, 60))
+    except requests.RequestException as e:
+        return jsonify({"error": f"Servidor IA no disponible: {str(e)}"}), 502
+    
+    if upstream.status_code != 200:
+        body = upstream.content
+        upstream.close()
+        return Response(body, status=upstream.status_code,
+                        mimetype=upstream.headers.get('Content-Type', 'application/json'))
+    
+    def relay():
+        # Cada fragmento se reenvía en cuanto llega, sin esperar la respuesta completa
+        try:
+            for chunk in upstream.iter_content(chunk_size=None):
+                yield chunk
+        finally:
+            upstream.close()
+    
+    return Response(relay(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 @server.route('/api/predict', methods=['POST'])
 def api_predict():
     """Endpoint para predicciones via API"""
@@ -130,6 +207,32 @@ def api_predict():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@server.route('/api/alerts/mark-read', methods=['POST'])
+def api_mark_alerts_read():
+    """Marca como leídas varias alertas (o todas) en una sola operación"""
+    try:
+        data = request.get_json(silent=True) or {}
+        if data.get('all'):
+            updated = alert_system.mark_all_read()
+        else:
+            updated = alert_system.mark_alerts_read(data.get('ids', []))
+        return jsonify({"updated": updated})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@server.route('/api/alerts/mark-resolved', methods=['POST'])
+def api_mark_alerts_resolved():
+    """Marca como resueltas varias alertas (o todas) en una sola operación"""
+    try:
+        data = request.get_json(silent=True) or {}
+        if data.get('all'):
+            updated = alert_system.mark_all_resolved()
+        else:
+            updated = alert_system.mark_alerts_resolved(data.get('ids', []))
+        return jsonify({"updated": updated})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 @server.route('/api/data_sample', methods=['GET'])
 def api_data_sample():
     """Endpoint para obtener muestra de datos"""
@@ -369,26 +472,25 @@ app.layout = html.Div(className='container', children=[
         dcc.Tab(label='📤 Subir Datos', value='tab-upload', children=[
             html.Div(className='card', style={'marginTop': '20px'}, children=[
                 html.H2('Subir Nuevos Datos', style={'color': '#2c3e50', 'marginBottom': '20px'}),
-                html.P('Suba archivos CSV o Excel con datos de estudiantes. El sistema validará automáticamente los datos.', 
+                html.P('Suba archivos CSV o Excel con datos de estudiantes. El sistema validará automáticamente los datos y agregará los registros válidos.', 
                       style={'color': '#7f8c8d', 'marginBottom': '20px'}),
                 
-                dcc.Upload(
-                    id='upload-data',
-                    children=html.Div([
-                        '📁 Arrastre y suelte archivos aquí o ',
-                        html.A('seleccione archivos', style={'color': '#3498db', 'textDecoration': 'underline'})
-                    ]),
-                    style={
-                        'width': '100%', 'height': '60px', 'lineHeight': '60px',
-                        'borderWidth': '2px', 'borderStyle': 'dashed', 'borderRadius': '10px',
-                        'textAlign': 'center', 'margin': '10px 0', 'borderColor': '#3498db',
-                        'backgroundColor': '#f8f9fa'
-                    },
-                    multiple=False
-                ),
+                # El botón abre el selector de archivos y el archivo se envía tal cual a
+                # /api/upload-students (assets/file_upload.js), sin pasar por un callback de Dash como base64
+                html.Div([
+                    html.Button('📁 Seleccionar archivo CSV o Excel', id='upload-btn', n_clicks=0,
+                              style={'padding': '8px 15px', 'backgroundColor': '#3498db', 'color': 'white',
+                                    'border': 'none', 'borderRadius': '5px', 'cursor': 'pointer'})
+                ], style={
+                    'width': '100%', 'padding': '15px 0', 'borderWidth': '2px', 'borderStyle': 'dashed',
+                    'borderRadius': '10px', 'textAlign': 'center', 'margin': '10px 0', 'borderColor': '#3498db',
+                    'backgroundColor': '#f8f9fa'
+                }),
                 
                 html.Div(id='upload-status', style={'marginTop': '20px'}),
-                html.Div(id='validation-results', style={'marginTop': '20px'})
+                html.Div(id='validation-results', style={'marginTop': '20px'}),
+                dcc.Store(id='upload-job-id'),
+                dcc.Interval(id='upload-job-poll', interval=1000, disabled=True)
             ])
         ]),
 
@@ -439,14 +541,47 @@ app.layout = html.Div(className='container', children=[
                 # Botones de reportes
                 html.Div(style={'marginTop': '30px', 'borderTop': '1px solid #ddd', 'paddingTop': '20px'}, children=[
                     html.H3('📊 Generar Reportes', style={'color': '#2c3e50', 'marginBottom': '15px'}),
-                    html.Div(style={'display': 'flex', 'gap': '15px'}, children=[
+                    html.Div(style={'display': 'flex', 'gap': '15px', 'alignItems': 'center'}, children=[
                         html.Button('📄 Reporte General PDF', id='btn-reporte-general', n_clicks=0,
                                   style={'padding': '10px 20px', 'backgroundColor': '#27ae60', 'color': 'white', 
+                                        'border': 'none', 'borderRadius': '5px', 'cursor': 'pointer'}),
+                        dcc.Checklist(
+                            id='reporte-anexo',
+                            options=[{'label': ' Incluir anexo con una fila por estudiante', 'value': 'anexo'}],
+                            value=[],
+                            style={'color': '#7f8c8d'}
+                        )
+                    ]),
+                    
+                    # Reportes individuales de todos los estudiantes en riesgo de una carrera
+                    html.H4('👥 Reportes por Cohorte (estudiantes en riesgo)', style={'color': '#2c3e50', 'margin': '20px 0 10px 0'}),
+                    html.Div(style={'display': 'flex', 'gap': '15px', 'alignItems': 'center'}, children=[
+                        dcc.Dropdown(
+                            id='cohorte-carrera',
+                            options=[{'label': 'Todas las carreras', 'value': ''}] + [{'label': c, 'value': c} for c in stats['carreras']],
+                            value='',
+                            placeholder='Carrera...',
+                            style={'width': '250px'}
+                        ),
+                        dcc.Dropdown(
+                            id='cohorte-formato',
+                            options=[
+                                {'label': 'ZIP (un PDF por estudiante)', 'value': 'zip'},
+                                {'label': 'PDF único combinado', 'value': 'pdf'}
+                            ],
+                            value='zip',
+                            clearable=False,
+                            style={'width': '250px'}
+                        ),
+                        html.Button('📦 Generar Reportes de Cohorte', id='btn-reporte-cohorte', n_clicks=0,
+                                  style={'padding': '10px 20px', 'backgroundColor': '#8e44ad', 'color': 'white', 
                                         'border': 'none', 'borderRadius': '5px', 'cursor': 'pointer'})
                     ])
                 ]),
                 
-                html.Div(id='resultado-reportes', style={'marginTop': '20px'})
+                html.Div(id='resultado-reportes', style={'marginTop': '20px'}),
+                dcc.Store(id='report-job-id'),
+                dcc.Interval(id='report-job-poll', interval=1000, disabled=True)
             ])
         ]),
 
@@ -572,7 +707,16 @@ app.layout = html.Div(className='container', children=[
                                 'border': '1px solid #e0e0e0',
                                 'maxWidth': '70%'
                             })
-                        ], style={'display': 'flex', 'alignItems': 'flex-start', 'marginBottom': '20px'})
+                        ], style={'display': 'flex', 'alignItems': 'flex-start', 'marginBottom': '20px'}),
+                        
+                        # Conversación, dibujada desde 'chat-history'
+                        html.Div(id='chat-log'),
+                        
+                        # Progreso de la consulta sin streaming (callback en segundo plano)
+                        html.Div(id='chat-progress', className='typing-indicator', style={'display': 'none'}, children=[
+                            html.Div([html.Span(), html.Span(), html.Span()], className='typing-dots'),
+                            html.Span('La IA está escribiendo…', id='chat-progress-text')
+                        ])
                     ]),
                     
                     # Chat input area
@@ -606,11 +750,28 @@ app.layout = html.Div(className='container', children=[
                                 'padding': '10px 25px',
                                 'fontSize': '1rem',
                                 'cursor': 'pointer'
-                            })
+                            }),
+                            dcc.Checklist(
+                                id='chat-streaming',
+                                options=[{'label': ' Mostrar la respuesta mientras se genera', 'value': 'stream'}],
+                                value=['stream'],
+                                style={'display': 'inline-block', 'marginLeft': '15px', 'color': '#7f8c8d'}
+                            )
                         ])
                     ])
                 ]),
                 
+                # Consulta en curso y respuesta final del chat en streaming (assets/chat_stream.js)
+                dcc.Store(id='chat-stream-request'),
+                dcc.Store(id='chat-stream-result'),
+                # Consulta y respuesta del chat sin streaming (callback en segundo plano)
+                dcc.Store(id='chat-request'),
+                dcc.Store(id='chat-response'),
+                # Mensajes del chat en forma compacta ({'rol', 'texto', 'hora'}) e id de la
+                # conversación en el servidor de IA
+                dcc.Store(id='chat-history', data=[]),
+                dcc.Store(id='chat-session'),
+                
                 # Instrucciones adicionales
                 html.Div([
                     html.H4('💡 Consejos de uso:', style={'color': '#2c3e50', 'marginTop': '30px'}),
@@ -823,6 +984,8 @@ def update_student_detail(student_id):
         html.Div(className='card', style={'marginBottom': '20px'}, children=[
             html.H3(f"👤 {report['student_info']['nombre_completo']}", 
                     style={'color': '#2c3e50', 'marginBottom': '15px'}),
+            html.A("📥 Descargar reporte PDF", href=f"/download-student-pdf/{student_data['id_estudiante']}",
+                   style={'display': 'inline-block', 'marginBottom': '15px', 'color': '#3498db', 'fontWeight': 'bold'}),
             html.Div(style={'display': 'flex', 'gap': '30px', 'flexWrap': 'wrap'}, children=[
                 html.Div([
                     html.Strong("ID: "), student_data['id_estudiante'], html.Br(),
@@ -1156,70 +1319,103 @@ def update_prediction(n_clicks, calif, asist, part, horas, socio, modelo):
 
     return pred_str, riesgo_fuzzy_str, fig_radar, fig_bars, fig_gauge, fig_comparison
 
-# Callback para manejo de subida de archivos
+# Callbacks para manejo de subida de archivos
+# El navegador envía el archivo a /api/upload-students (assets/file_upload.js), que lo
+# guarda en disco y encola su importación por bloques (src/data_ingestion.py); el id
+# del trabajo llega a 'upload-job-id' y este callback consulta el progreso cada segundo
+app.clientside_callback(
+    ClientsideFunction(namespace='upload', function_name='send_file'),
+    Output('upload-job-id', 'data'),
+    Input('upload-btn', 'n_clicks'),
+    prevent_initial_call=True
+)
+
 @app.callback(
     [Output('upload-status', 'children'),
-     Output('validation-results', 'children')],
-    [Input('upload-data', 'contents')],
-    [State('upload-data', 'filename')]
+     Output('validation-results', 'children'),
+     Output('upload-job-poll', 'disabled')],
+    [Input('upload-job-id', 'data'),
+     Input('upload-job-poll', 'n_intervals')]
 )
-def handle_file_upload(contents, filename):
-    if contents is None:
-        return "", ""
+def poll_file_upload(upload, n_intervals):
+    global df
+    if not upload:
+        return "", "", True
+    if 'error' in upload:
+        return html.Div(upload['error'], style={'color': '#e74c3c'}), "", True
     
     try:
-        # Decodificar el archivo
-        content_type, content_string = contents.split(',')
-        decoded = base64.b64decode(content_string)
+        job = data_ingestor.get_job(upload['id'])
+        if job is None:
+            return dash.no_update, dash.no_update, True
         
-        # Leer el archivo según su tipo
-        if filename.endswith('.csv'):
-            df_new = pd.read_csv(io.StringIO(decoded.decode('utf-8')))
-        elif filename.endswith(('.xlsx', '.xls')):
-            df_new = pd.read_excel(io.BytesIO(decoded))
-        else:
-            return html.Div("❌ Formato de archivo no soportado. Use CSV o Excel.", 
-                           style={'color': '#e74c3c'}), ""
-        
-        # Validar datos
-        validation_errors = []
-        required_cols = ['nombre', 'apellido', 'calificaciones_anteriores', 'asistencia_porcentaje']
+        if job['status'] in ('pending', 'running'):
+            return render_upload_progress(job), "", False
         
-        for col in required_cols:
-            if col not in df_new.columns:
-                validation_errors.append(f"Columna faltante: {col}")
+        data_ingestor.forget(upload['id'])
+        # El dataset se recargó con los estudiantes importados
+        df = data_processor.df
         
-        if validation_errors:
-            error_list = html.Ul([html.Li(error) for error in validation_errors])
+        # Validar datos: columnas faltantes, el archivo no se importa
+        if job['status'] == 'error' and not job.get('error'):
+            error_list = html.Ul([html.Li(error) for error in job['errors']])
             return (
                 html.Div("❌ Archivo subido con errores", style={'color': '#e74c3c'}),
                 html.Div([
                     html.H4("Errores de validación:", style={'color': '#e74c3c'}),
                     error_list
-                ])
+                ]),
+                True
             )
         
-        # Crear alerta de archivo subido
-        alert_system.create_file_upload_alert(filename, len(df_new))
+        if job['status'] == 'error':
+            raise Exception(f"{job['error']} ({job['imported']} registros ya agregados)")
         
-        return (
-            html.Div(f"✅ Archivo '{filename}' subido exitosamente ({len(df_new)} registros)", 
-                    style={'color': '#2ecc71'}),
-            html.Div([
-                html.H4("Vista previa de los datos:", style={'color': '#2c3e50'}),
-                dash_table.DataTable(
-                    data=df_new.head(5).to_dict('records'),
-                    columns=[{"name": i, "id": i} for i in df_new.columns],
-                    style_table={'overflowX': 'auto'},
-                    style_cell={'textAlign': 'left', 'padding': '8px'},
-                    style_header={'backgroundColor': '#3498db', 'color': 'white'}
-                )
-            ])
-        )
+        # Crear alerta de archivo subido
+        alert_system.create_file_upload_alert(job['filename'], job['imported'])
         
+        return render_upload_done(job), render_upload_results(job), True
+    
     except Exception as e:
         return html.Div(f"❌ Error procesando archivo: {str(e)}", 
-                       style={'color': '#e74c3c'}), ""
+                       style={'color': '#e74c3c'}), "", True
+
+def render_upload_progress(job):
+    """Barra de progreso de la importación en curso"""
+    estado = "Importando" if job['status'] == 'running' else "Preparando"
+    return html.Div([
+        html.P(f"⏳ {estado} '{job['filename']}': {job['progress']:.0%} "
+               f"({job['rows']} registros leídos, {job['imported']} agregados)",
+               style={'color': '#2c3e50', 'marginBottom': '8px'}),
+        html.Progress(value=str(round(job['progress'] * 100)), max='100', style={'width': '100%'})
+    ])
+
+def render_upload_done(job):
+    """Resumen de la importación terminada"""
+    mensaje = f"✅ Archivo '{job['filename']}' importado: {job['imported']} registros agregados"
+    if job['rejected']:
+        mensaje += f", {job['rejected']} rechazados"
+    return html.Div(mensaje, style={'color': '#2ecc71' if not job['rejected'] else '#f39c12'})
+
+def render_upload_results(job):
+    """Errores de las filas rechazadas (los primeros) y vista previa del archivo"""
+    children = []
+    if job['errors']:
+        children += [
+            html.H4(f"Filas rechazadas ({job['rejected']}):", style={'color': '#e74c3c'}),
+            html.Ul([html.Li(error) for error in job['errors']])
+        ]
+    children += [
+        html.H4("Vista previa de los datos:", style={'color': '#2c3e50'}),
+        dash_table.DataTable(
+            data=job['preview'],
+            columns=[{"name": i, "id": i} for i in job['columns']],
+            style_table={'overflowX': 'auto'},
+            style_cell={'textAlign': 'left', 'padding': '8px'},
+            style_header={'backgroundColor': '#3498db', 'color': 'white'}
+        )
+    ]
+    return html.Div(children)
 
 # Callback para estadísticas de alertas
 @app.callback(
@@ -1313,114 +1509,244 @@ def update_alerts_list(n_clicks, active_tab, tipo_filtro, prioridad_filtro):
 
 # Callback para generar reportes
 @app.callback(
-    Output('resultado-reportes', 'children'),
-    [Input('btn-reporte-general', 'n_clicks')]
+    [Output('resultado-reportes', 'children'),
+     Output('report-job-id', 'data'),
+     Output('report-job-poll', 'disabled')],
+    [Input('btn-reporte-general', 'n_clicks'),
+     Input('btn-reporte-cohorte', 'n_clicks'),
+     Input('report-job-poll', 'n_intervals')],
+    [State('report-job-id', 'data'),
+     State('cohorte-carrera', 'value'),
+     State('cohorte-formato', 'value'),
+     State('reporte-anexo', 'value')]
 )
-def handle_reports(n_clicks_pdf):
-    if not n_clicks_pdf:
-        return ""
+def handle_reports(n_clicks_pdf, n_clicks_cohort, n_intervals, job_id, cohort_carrera, cohort_format, annex):
+    ctx = callback_context
+    if not ctx.triggered or not (n_clicks_pdf or n_clicks_cohort):
+        return "", None, True
+    
+    trigger = ctx.triggered[0]['prop_id'].split('.')[0]
     
     try:
-        # Obtener estadísticas del sistema
-        stats = data_processor.get_statistics()
+        # Datos y versión del mismo estado del dataset: una importación puede recargarlo en otro hilo
+        # antes de que se actualice el `df` global, y el reporte se guarda en caché con esa versión
+        if trigger == 'btn-reporte-general':
+            # Encolar el reporte en el pool de procesos y responder de inmediato
+            students_df, data_version, stats = data_processor.get_snapshot()
+            job_id = report_jobs.submit_general_report(students_df, stats, data_version=data_version,
+                                                       include_student_annex='anexo' in (annex or []))
+            return render_report_pending(), job_id, False
         
-        # Generar reporte general con PDF en memoria
-        report = report_generator.generate_general_report(df, stats)
+        if trigger == 'btn-reporte-cohorte':
+            students_df, data_version, _ = data_processor.get_snapshot()
+            job_id = report_jobs.submit_cohort_report(students_df, carrera=cohort_carrera or None,
+                                                      output_format=cohort_format, data_version=data_version)
+            return render_report_pending(), job_id, False
         
-        # Verificar si se generó el PDF correctamente
-        if report.get('pdf_buffer') is None:
-            raise Exception("No se pudo generar el PDF en memoria")
+        # Consultar el estado del trabajo en curso
+        job = report_jobs.get_job(job_id) if job_id else None
+        if job is None:
+            raise Exception("El trabajo de reporte ya no existe")
         
-        # Inicializar almacenamiento temporal si no existe
-        if not hasattr(server, 'temp_pdf_storage'):
-            server.temp_pdf_storage = {}
+        if job['status'] in ('pending', 'running'):
+            return render_report_pending(job['status']), job_id, False
         
-        # Almacenar el PDF en memoria temporalmente
-        filename = report['pdf_filename']
-        server.temp_pdf_storage[filename] = report['pdf_buffer']
+        report_jobs.forget(job_id)
         
-        # Crear enlace de descarga
-        download_url = f"/download-pdf/{filename}"
+        if job['status'] == 'error':
+            raise Exception(job['error'])
         
-        return html.Div([
-            html.H4("✅ Reporte PDF Generado Exitosamente", style={'color': '#27ae60', 'marginBottom': '15px'}),
-            html.Div([
-                html.P([
-                    html.Strong("📄 Archivo generado: "), 
-                    html.Code(filename)
-                ], style={'marginBottom': '15px'}),
-                
-                # Botón de descarga
-                html.Div([
-                    html.A(
-                        "📥 Descargar PDF",
-                        href=download_url,
-                        download=filename,
-                        style={
-                            'display': 'inline-block',
-                            'padding': '12px 25px',
-                            'backgroundColor': '#3498db',
-                            'color': 'white',
-                            'textDecoration': 'none',
-                            'borderRadius': '5px',
-                            'fontWeight': 'bold',
-                            'fontSize': '16px'
-                        }
-                    )
-                ], style={'textAlign': 'center', 'marginBottom': '20px'}),
-                
-                html.Hr(),
-                html.H5("📊 Resumen del Reporte:", style={'color': '#2c3e50', 'marginBottom': '10px'}),
-                html.P(f"• Total de estudiantes: {report['summary']['total_estudiantes']}"),
-                html.P(f"• Estudiantes en riesgo: {report['summary']['estudiantes_riesgo']} ({report['summary']['porcentaje_riesgo']}%)"),
-                html.P(f"• Promedio general: {report['summary']['promedio_general']:.2f}"),
-                html.P(f"• Promedio de asistencia: {report['summary']['promedio_asistencia']:.1f}%"),
-                html.P(f"• Total de carreras: {report['summary']['total_carreras']}"),
-                html.Hr(),
-                html.P([
-                    html.Strong("🕒 Generado: "), 
-                    report['timestamp']
-                ], style={'fontSize': '14px', 'color': '#7f8c8d'}),
-                html.Div([
-                    html.P("💡 Instrucciones:", style={'fontWeight': 'bold', 'marginBottom': '5px'}),
-                    html.P("1. Haz clic en el botón 'Descargar PDF' de arriba"),
-                    html.P("2. El archivo se descargará automáticamente a tu carpeta de descargas"),
-                    html.P("3. Abre el archivo PDF descargado para ver el reporte completo")
-                ], style={'backgroundColor': '#f8f9fa', 'padding': '10px', 'borderRadius': '5px', 'marginTop': '10px'})
-            ])
-        ], style={'padding': '20px', 'backgroundColor': '#d5f4e6', 'borderRadius': '8px', 'border': '1px solid #27ae60'})
+        report = job['result']
         
+        if job['type'] == 'cohort':
+            # El archivo ya está en disco: se mueve al almacén sin cargarlo en memoria
+            artifact_store.put_file(report['filename'], report['path'])
+            return render_cohort_ready(report), None, True
+        
+        filename = report['pdf_filename']
+        if report.get('pdf_path'):
+            # Reporte grande escrito por páginas en disco: se mueve sin cargarlo en memoria
+            artifact_store.put_file(filename, report['pdf_path'])
+        else:
+            # Verificar si se generó el PDF correctamente
+            if report.get('pdf_buffer') is None:
+                raise Exception("No se pudo generar el PDF en memoria")
+            
+            # Guardar el PDF en el almacén de artefactos hasta que se descargue o expire
+            artifact_store.put(filename, report['pdf_buffer'])
+        
+        return render_report_ready(report, filename), None, True
+    
     except Exception as e:
-        return html.Div([
-            html.H4("❌ Error Generando Reporte", style={'color': '#e74c3c', 'marginBottom': '10px'}),
-            html.P(f"Detalles del error: {str(e)}"),
-            html.P("Posibles causas:"),
-            html.Ul([
-                html.Li("Falta la librería reportlab"),
-                html.Li("Error en los datos del sistema"),
-                html.Li("Problema de memoria insuficiente")
-            ]),
-            html.P("Por favor, verifica que reportlab esté instalado correctamente.")
-        ], style={'color': '#e74c3c', 'padding': '15px', 'backgroundColor': '#fadbd8', 'borderRadius': '8px'})
+        return render_report_error(e), None, True
+
+def render_report_pending(status='pending'):
+    """Mensaje mientras el reporte se genera en segundo plano"""
+    estado = "Generando reporte..." if status == 'running' else "Reporte en cola, esperando un proceso libre..."
+    return html.Div([
+        html.H4(f"⏳ {estado}", style={'color': '#2c3e50', 'marginBottom': '10px'}),
+        html.P("Puedes seguir usando el dashboard; el enlace de descarga aparecerá aquí al terminar.",
+               style={'color': '#7f8c8d'})
+    ], style={'padding': '20px', 'backgroundColor': '#f8f9fa', 'borderRadius': '8px', 'border': '1px solid #ddd'})
+
+def render_report_ready(report, filename):
+    """Resultado con el enlace de descarga del reporte generado"""
+    # Crear enlace de descarga
+    download_url = f"/download-pdf/{filename}"
+    
+    return html.Div([
+        html.H4("✅ Reporte PDF Generado Exitosamente", style={'color': '#27ae60', 'marginBottom': '15px'}),
+        html.Div([
+            html.P([
+                html.Strong("📄 Archivo generado: "), 
+                html.Code(filename)
+            ], style={'marginBottom': '15px'}),
+            
+            # Botón de descarga
+            html.Div([
+                html.A(
+                    "📥 Descargar PDF",
+                    href=download_url,
+                    download=filename,
+                    style={
+                        'display': 'inline-block',
+                        'padding': '12px 25px',
+                        'backgroundColor': '#3498db',
+                        'color': 'white',
+                        'textDecoration': 'none',
+                        'borderRadius': '5px',
+                        'fontWeight': 'bold',
+                        'fontSize': '16px'
+                    }
+                )
+            ], style={'textAlign': 'center', 'marginBottom': '20px'}),
+            
+            html.Hr(),
+            html.H5("📊 Resumen del Reporte:", style={'color': '#2c3e50', 'marginBottom': '10px'}),
+            html.P(f"• Total de estudiantes: {report['summary']['total_estudiantes']}"),
+            html.P(f"• Estudiantes en riesgo: {report['summary']['estudiantes_riesgo']} ({report['summary']['porcentaje_riesgo']}%)"),
+            html.P(f"• Promedio general: {report['summary']['promedio_general']:.2f}"),
+            html.P(f"• Promedio de asistencia: {report['summary']['promedio_asistencia']:.1f}%"),
+            html.P(f"• Total de carreras: {report['summary']['total_carreras']}"),
+            html.Hr(),
+            html.P([
+                html.Strong("🕒 Generado: "), 
+                report['timestamp']
+            ], style={'fontSize': '14px', 'color': '#7f8c8d'}),
+            html.Div([
+                html.P("💡 Instrucciones:", style={'fontWeight': 'bold', 'marginBottom': '5px'}),
+                html.P("1. Haz clic en el botón 'Descargar PDF' de arriba"),
+                html.P("2. El archivo se descargará automáticamente a tu carpeta de descargas"),
+                html.P("3. Abre el archivo PDF descargado para ver el reporte completo")
+            ], style={'backgroundColor': '#f8f9fa', 'padding': '10px', 'borderRadius': '5px', 'marginTop': '10px'})
+        ])
+    ], style={'padding': '20px', 'backgroundColor': '#d5f4e6', 'borderRadius': '8px', 'border': '1px solid #27ae60'})
+
+def render_cohort_ready(result):
+    """Resultado con el enlace de descarga de los reportes de la cohorte"""
+    filename = result['filename']
+    carrera = result['carrera'] or 'todas las carreras'
+    
+    children = [
+        html.H4("✅ Reportes de Cohorte Generados", style={'color': '#27ae60', 'marginBottom': '15px'}),
+        html.P([html.Strong("📄 Archivo generado: "), html.Code(filename)]),
+        html.P(f"• Estudiantes en riesgo incluidos ({carrera}): {result['count']}"),
+        html.A(
+            "📥 Descargar ZIP" if result['format'] == 'zip' else "📥 Descargar PDF",
+            href=f"/download-pdf/{filename}",
+            download=filename,
+            style={
+                'display': 'inline-block',
+                'padding': '12px 25px',
+                'backgroundColor': '#3498db',
+                'color': 'white',
+                'textDecoration': 'none',
+                'borderRadius': '5px',
+                'fontWeight': 'bold'
+            }
+        )
+    ]
+    if result['errors']:
+        children.append(html.P(f"⚠️ {len(result['errors'])} reporte(s) no se pudieron generar: {result['errors'][0]}",
+                               style={'color': '#e67e22', 'marginTop': '10px'}))
+    
+    return html.Div(children, style={'padding': '20px', 'backgroundColor': '#d5f4e6', 'borderRadius': '8px', 'border': '1px solid #27ae60'})
+
+def render_report_error(e):
+    """Mensaje de error al generar el reporte"""
+    return html.Div([
+        html.H4("❌ Error Generando Reporte", style={'color': '#e74c3c', 'marginBottom': '10px'}),
+        html.P(f"Detalles del error: {str(e)}"),
+        html.P("Posibles causas:"),
+        html.Ul([
+            html.Li("Falta la librería reportlab"),
+            html.Li("Error en los datos del sistema"),
+            html.Li("Problema de memoria insuficiente")
+        ]),
+        html.P("Por favor, verifica que reportlab esté instalado correctamente.")
+    ], style={'color': '#e74c3c', 'padding': '15px', 'backgroundColor': '#fadbd8', 'borderRadius': '8px'})
+
+def chat_entry(rol, texto):
+    """Mensaje del chat en la forma compacta que se guarda en 'chat-history'"""
+    return {'rol': rol, 'texto': texto, 'hora': datetime.now().strftime('%H:%M')}
+
+def build_chat_message(entry):
+    """Burbuja del chat de un mensaje de 'chat-history' (estilos en assets/style.css)"""
+    is_user = entry['rol'] == 'usuario'
+    return html.Div([
+        html.Div('👤' if is_user else '🤖', className='chat-avatar'),
+        html.Div([
+            html.P(entry['texto'], className='chat-text'),
+            html.Small(entry['hora'], className='chat-time')
+        ], className='chat-content')
+    ], className='chat-message user' if is_user else 'chat-message ai')
+
+def update_chat_history(history, *entries):
+    """Agrega mensajes a 'chat-history' conservando solo los últimos CHAT_MAX_MESSAGES"""
+    history = ((history or []) + list(entries))[-CHAT_MAX_MESSAGES:]
+    return [build_chat_message(entry) for entry in history], history
 
 # Callback para el chat IA - USANDO SERVIDOR IA EXTERNO
+# Solo viaja el historial compacto (acotado); el contexto de la conversación para la IA
+# lo mantiene ia_server por sesión. La espera a la IA nunca ocurre aquí: la respuesta
+# llega por 'chat-stream-result' (streaming en el navegador) o 'chat-response'
+# (callback en segundo plano)
 @app.callback(
-    [Output('chat-messages', 'children'),
-     Output('chat-input', 'value')],
+    [Output('chat-log', 'children'),
+     Output('chat-history', 'data'),
+     Output('chat-input', 'value'),
+     Output('chat-stream-request', 'data'),
+     Output('chat-request', 'data'),
+     Output('chat-session', 'data')],
     [Input('send-chat-btn', 'n_clicks'),
      Input('suggestion-1', 'n_clicks'),
      Input('suggestion-2', 'n_clicks'),
-     Input('suggestion-3', 'n_clicks')],
+     Input('suggestion-3', 'n_clicks'),
+     Input('chat-stream-result', 'data'),
+     Input('chat-response', 'data')],
     [State('chat-input', 'value'),
-     State('chat-messages', 'children')]
+     State('chat-history', 'data'),
+     State('chat-streaming', 'value'),
+     State('chat-session', 'data')]
 )
-def handle_chat_interaction(send_clicks, sug1_clicks, sug2_clicks, sug3_clicks, input_value, current_messages):
+def handle_chat_interaction(send_clicks, sug1_clicks, sug2_clicks, sug3_clicks, stream_result, chat_response,
+                            input_value, history, streaming, session_id):
     ctx = callback_context
     if not ctx.triggered:
-        return current_messages or [], input_value or ""
+        return dash.no_update, dash.no_update, input_value or "", dash.no_update, dash.no_update, dash.no_update
     
     button_id = ctx.triggered[0]['prop_id'].split('.')[0]
     
+    # Terminó una respuesta (streaming o segundo plano): se agrega al historial ya completa
+    if button_id in ('chat-stream-result', 'chat-response'):
+        result = stream_result if button_id == 'chat-stream-result' else chat_response
+        if not result:
+            return dash.no_update, dash.no_update, dash.no_update, dash.no_update, dash.no_update, dash.no_update
+        ai_response = result.get('respuesta') or result.get('error') or 'Error: No se pudo obtener respuesta'
+        messages, history = update_chat_history(history, chat_entry('ia', ai_response))
+        stream_request = None if button_id == 'chat-stream-result' else dash.no_update
+        return messages, history, dash.no_update, stream_request, dash.no_update, dash.no_update
+    
     # Determinar el mensaje a enviar
     message = ""
     if button_id == 'send-chat-btn' and input_value:
@@ -1433,42 +1759,66 @@ def handle_chat_interaction(send_clicks, sug1_clicks, sug2_clicks, sug3_clicks,
         message = "¿Qué factores predicen mejor el riesgo?"
     
     if not message:
-        return current_messages or [], input_value or ""
-    
-    # Agregar mensaje del usuario
-    user_message = html.Div([
-        html.Div('👤', style={
-            'display': 'inline-block',
-            'width': '40px',
-            'height': '40px',
-            'backgroundColor': '#3498db',
-            'color': 'white',
-            'borderRadius': '50%',
-            'textAlign': 'center',
-            'lineHeight': '40px',
-            'marginLeft': '10px',
-            'fontSize': '1.2rem'
-        }),
-        html.Div([
-            html.P(message, style={'margin': '0', 'padding': '10px'}),
-            html.Small(datetime.now().strftime('%H:%M'), style={'opacity': '0.7', 'padding': '0 10px'})
-        ], style={
-            'display': 'inline-block',
-            'backgroundColor': '#3498db',
-            'color': 'white',
-            'padding': '10px',
-            'borderRadius': '15px',
-            'maxWidth': '70%',
-            'marginRight': '10px'
-        })
-    ], style={'display': 'flex', 'alignItems': 'flex-start', 'marginBottom': '15px', 'justifyContent': 'flex-end'})
+        return dash.no_update, dash.no_update, input_value or "", dash.no_update, dash.no_update, dash.no_update
+    
+    # Una conversación por pestaña: el servidor de IA guarda su historial con este id
+    session_id = session_id or str(uuid.uuid4())
+    user_entry = chat_entry('usuario', message)
+    
+    # En streaming la respuesta la trae assets/chat_stream.js token a token; el callback
+    # no queda bloqueado esperando la respuesta completa
+    if streaming and 'stream' in streaming:
+        stream_request = {
+            'id': str(uuid.uuid4()),
+            'url': '/api/chat/stream',
+            'prompt': message,
+            'session_id': session_id
+        }
+        messages, history = update_chat_history(history, user_entry)
+        return messages, history, "", stream_request, dash.no_update, session_id
+    
+    # Sin streaming la consulta a /api/chat la hace fetch_chat_response en segundo plano
+    chat_request = {
+        'id': str(uuid.uuid4()),
+        'prompt': message,
+        'session_id': session_id
+    }
+    messages, history = update_chat_history(history, user_entry)
+    return messages, history, "", dash.no_update, chat_request, session_id
+
+@app.callback(
+    Output('chat-response', 'data'),
+    Input('chat-request', 'data'),
+    background=True,
+    manager=background_callback_manager,
+    running=[
+        # Un nuevo envío mientras corre reemplazaría al trabajo en curso y su pregunta quedaría sin respuesta
+        (Output('send-chat-btn', 'disabled'), True, False),
+        (Output('suggestion-1', 'disabled'), True, False),
+        (Output('suggestion-2', 'disabled'), True, False),
+        (Output('suggestion-3', 'disabled'), True, False),
+        (Output('chat-progress', 'style'), {'display': 'flex'}, {'display': 'none'})
+    ],
+    progress=[Output('chat-progress-text', 'children')],
+    prevent_initial_call=True
+)
+def fetch_chat_response(set_progress, chat_request):
+    """Consulta /api/chat del servidor IA en un proceso aparte, informando el tiempo de espera"""
+    if not chat_request:
+        raise PreventUpdate
     
     # USAR SERVIDOR IA EXTERNO
+    import requests
+    started = time.time()
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        future = executor.submit(requests.post, f"{IA_SERVER_URL}/api/chat",
+                                 json={'prompt': chat_request['prompt'], 'session_id': chat_request['session_id']},
+                                 timeout=30)
+        while not wait([future], timeout=1).done:
+            set_progress(f"La IA está escribiendo… ({time.time() - started:.0f} s)")
+    
     try:
-        import requests
-        response = requests.post('http://127.0.0.1:5001/api/chat', 
-                               json={'prompt': message}, 
-                               timeout=30)
+        response = future.result()
         if response.status_code == 200:
             ai_response = response.json().get('respuesta', 'Error: No se pudo obtener respuesta')
         else:
@@ -1476,40 +1826,14 @@ def handle_chat_interaction(send_clicks, sug1_clicks, sug2_clicks, sug3_clicks,
     except Exception as e:
         ai_response = f"Error conectando con IA: {str(e)}. Asegúrate de que el servidor IA esté ejecutándose en el puerto 5001 con 'python ia_server.py'."
     
-    # Agregar respuesta de la IA
-    ai_message = html.Div([
-        html.Div('🤖', style={
-            'display': 'inline-block',
-            'width': '40px',
-            'height': '40px',
-            'backgroundColor': '#2ecc71',
-            'color': 'white',
-            'borderRadius': '50%',
-            'textAlign': 'center',
-            'lineHeight': '40px',
-            'marginRight': '10px',
-            'fontSize': '1.2rem'
-        }),
-        html.Div([
-            html.P(ai_response, style={'margin': '0', 'padding': '10px', 'whiteSpace': 'pre-wrap'}),
-            html.Small(datetime.now().strftime('%H:%M'), style={'opacity': '0.7', 'padding': '0 10px'})
-        ], style={
-            'display': 'inline-block',
-            'backgroundColor': 'white',
-            'padding': '10px',
-            'borderRadius': '15px',
-            'border': '1px solid #e0e0e0',
-            'maxWidth': '70%'
-        })
-    ], style={'display': 'flex', 'alignItems': 'flex-start', 'marginBottom': '15px'})
-    
-    # Actualizar mensajes
-    if current_messages is None:
-        current_messages = []
-    
-    new_messages = current_messages + [user_message, ai_message]
-    
-    return new_messages, ""
+    return {'id': chat_request['id'], 'respuesta': ai_response}
+
+# El fetch en streaming corre en el navegador (assets/chat_stream.js)
+app.clientside_callback(
+    ClientsideFunction(namespace='chat', function_name='stream_response'),
+    Output('chat-stream-result', 'data'),
+    Input('chat-stream-request', 'data')
+)
 
 def generate_ai_response_fallback(message):
     """Función de fallback para respuestas locales en caso de error del servidor IA"""
@@ -0,0 +1,130 @@
+/* Chat IA en streaming: lee /api/chat/stream (Server-Sent Events), que el
+   dashboard reenvía desde el servidor de IA, y va mostrando los tokens en una
+   burbuja temporal. Al terminar devuelve
+   la respuesta completa a 'chat-stream-result' y el callback del servidor la
+   agrega al historial del chat. */
+
+(function () {
+    function createLiveBubble(container) {
+        var row = document.createElement('div');
+        row.className = 'chat-stream-live';
+
+        var avatar = document.createElement('div');
+        avatar.className = 'chat-stream-avatar';
+        avatar.textContent = '🤖';
+
+        var bubble = document.createElement('div');
+        bubble.className = 'chat-stream-bubble';
+        var text = document.createElement('p');
+        text.className = 'chat-stream-text chat-stream-pending';
+        text.textContent = 'Pensando…';
+        bubble.appendChild(text);
+
+        row.appendChild(avatar);
+        row.appendChild(bubble);
+        container.appendChild(row);
+        container.scrollTop = container.scrollHeight;
+        return {row: row, text: text};
+    }
+
+    function removeWhenReplaced(live) {
+        // La burbuja temporal se quita cuando Dash dibuja el mensaje definitivo
+        var observer = new MutationObserver(function () {
+            observer.disconnect();
+            live.row.remove();
+        });
+        observer.observe(document.getElementById('chat-log'), {childList: true});
+        setTimeout(function () {
+            observer.disconnect();
+            live.row.remove();
+        }, 5000);
+    }
+
+    function parseEvent(raw) {
+        var event = {type: 'message', data: ''};
+        raw.split('\n').forEach(function (line) {
+            if (line.indexOf('event:') === 0) {
+                event.type = line.slice(6).trim();
+            } else if (line.indexOf('data:') === 0) {
+                event.data += line.slice(5).trim();
+            }
+        });
+        return event;
+    }
+
+    async function streamResponse(request) {
+        if (!request || !request.prompt) {
+            return window.dash_clientside.no_update;
+        }
+
+        var container = document.getElementById('chat-messages');
+        var live = createLiveBubble(container);
+        var started = performance.now();
+        var firstTokenMs = null;
+        var answer = '';
+
+        try {
+            var response = await fetch(request.url, {
+                method: 'POST',
+                headers: {'Content-Type': 'application/json'},
+                body: JSON.stringify({prompt: request.prompt, session_id: request.session_id})
+            });
+            if (!response.ok || !response.body) {
+                var detail = await response.json().catch(function () { return {}; });
+                throw new Error(detail.error || ('Error del servidor IA: ' + response.status));
+            }
+
+            var reader = response.body.getReader();
+            var decoder = new TextDecoder();
+            var buffer = '';
+            while (true) {
+                var chunk = await reader.read();
+                if (chunk.done) {
+                    break;
+                }
+                buffer += decoder.decode(chunk.value, {stream: true});
+                var events = buffer.split('\n\n');
+                buffer = events.pop();
+
+                for (var i = 0; i < events.length; i++) {
+                    var event = parseEvent(events[i]);
+                    if (!event.data) {
+                        continue;
+                    }
+                    var payload = JSON.parse(event.data);
+                    if (event.type === 'error') {
+                        throw new Error(payload.error);
+                    }
+                    if (event.type === 'done') {
+                        answer = payload.respuesta;
+                        continue;
+                    }
+                    if (firstTokenMs === null) {
+                        firstTokenMs = Math.round(performance.now() - started);
+                        live.text.classList.remove('chat-stream-pending');
+                        live.text.textContent = '';
+                    }
+                    answer += payload.token;
+                    live.text.textContent = answer;
+                    container.scrollTop = container.scrollHeight;
+                }
+            }
+
+            removeWhenReplaced(live);
+            return {id: request.id, respuesta: answer, primer_token_ms: firstTokenMs};
+        } catch (error) {
+            removeWhenReplaced(live);
+            return {
+                id: request.id,
+                error: 'Error conectando con IA: ' + error.message + '. Asegúrate de que el servidor IA ' +
+                       'esté ejecutándose en el puerto 5001 con \'python ia_server.py\'.'
+            };
+        }
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        chat: {
+            stream_response: streamResponse
+        }
+    });
+})();
@@ -0,0 +1,83 @@
+/* Subida de archivos de estudiantes: el botón abre el selector de archivos y el
+   archivo elegido se envía tal cual (sin base64 ni JSON) a /api/upload-students,
+   que lo copia a disco por bloques y encola su importación. El id del trabajo se
+   devuelve a 'upload-job-id' y un callback del servidor consulta el progreso. */
+
+(function () {
+    function showStatus(text) {
+        // set_props existe desde Dash 2.16; en versiones anteriores solo se ve el estado de la importación
+        if (window.dash_clientside.set_props) {
+            window.dash_clientside.set_props('upload-status', {children: text});
+        }
+    }
+
+    function sendFile(file) {
+        return new Promise(function (resolve, reject) {
+            var xhr = new XMLHttpRequest();
+            xhr.open('POST', '/api/upload-students?filename=' + encodeURIComponent(file.name));
+            xhr.setRequestHeader('Content-Type', 'application/octet-stream');
+            xhr.upload.onprogress = function (event) {
+                if (event.lengthComputable) {
+                    showStatus('⏳ Enviando \'' + file.name + '\': ' +
+                               Math.round(event.loaded / event.total * 100) + '%');
+                }
+            };
+            xhr.onload = function () {
+                var payload = {};
+                try {
+                    payload = JSON.parse(xhr.responseText);
+                } catch (error) {
+                    payload = {};
+                }
+                if (xhr.status === 200 && payload.id) {
+                    resolve(payload.id);
+                } else {
+                    reject(new Error(payload.error || ('Error del servidor: ' + xhr.status)));
+                }
+            };
+            xhr.onerror = function () {
+                reject(new Error('No se pudo conectar con el servidor'));
+            };
+            xhr.send(file);
+        });
+    }
+
+    function chooseFile() {
+        // Selector temporal: el archivo nunca se lee en el navegador, se envía desde el disco
+        return new Promise(function (resolve) {
+            var input = document.createElement('input');
+            input.type = 'file';
+            input.accept = '.csv,.xlsx,.xls';
+            input.onchange = function () {
+                resolve(input.files[0] || null);
+            };
+            input.oncancel = function () {
+                resolve(null);
+            };
+            input.click();
+        });
+    }
+
+    async function uploadFile(nClicks) {
+        if (!nClicks) {
+            return window.dash_clientside.no_update;
+        }
+        var file = await chooseFile();
+        if (!file) {
+            return window.dash_clientside.no_update;
+        }
+
+        try {
+            var jobId = await sendFile(file);
+            return {id: jobId};
+        } catch (error) {
+            return {error: '❌ ' + error.message};
+        }
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        upload: {
+            send_file: uploadFile
+        }
+    });
+})();
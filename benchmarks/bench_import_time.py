@@ -0,0 +1,67 @@
+"""Mide el tiempo de importación de los puntos de entrada con `python -X importtime`.
+
+Para cada módulo se lanza un intérprete nuevo, se suma el tiempo acumulado
+reportado por CPython y se listan los paquetes más costosos. También indica
+si matplotlib o seaborn llegaron a cargarse (no deberían al arrancar).
+
+Uso: python benchmarks/bench_import_time.py [modulo ...]
+     (por defecto: app ia_server src.report_generator)
+"""
+import os
+import subprocess
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_MODULES = ['app', 'ia_server', 'src.report_generator']
+HEAVY_PACKAGES = ['matplotlib', 'seaborn', 'reportlab', 'tensorflow', 'plotly', 'dash']
+
+def parse_importtime(stderr):
+    """Devuelve [(modulo, profundidad, acumulado_us)] a partir de la salida de -X importtime"""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        try:
+            _, cumulative_us, name = line[len('import time:'):].split('|')
+        except ValueError:
+            continue
+        # CPython indenta dos espacios por cada nivel de anidamiento
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((name.strip(), depth, int(cumulative_us)))
+    return entries
+
+def measure_module(module, top=10):
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT_DIR, capture_output=True, text=True
+    )
+    entries = parse_importtime(result.stderr)
+    
+    print(f"\n=== {module} ===")
+    if result.returncode != 0:
+        error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'error desconocido'
+        print(f"No se pudo importar: {error}")
+    
+    target = [cumulative for name, depth, cumulative in entries if name == module and depth == 0]
+    total_us = target[-1] if target else 0
+    print(f"Tiempo total de importación: {total_us / 1000:.1f} ms")
+    
+    loaded = {name.split('.')[0] for name, _, _ in entries}
+    for package in HEAVY_PACKAGES:
+        print(f"  {package:<12} {'cargado' if package in loaded else '-'}")
+    
+    # Importaciones directas del módulo medido (primer nivel de anidamiento)
+    direct = [(name, cumulative) for name, depth, cumulative in entries if depth == 1]
+    print(f"Importaciones más costosas (top {top}):")
+    for name, cumulative in sorted(direct, key=lambda item: item[1], reverse=True)[:top]:
+        print(f"  {cumulative / 1000:9.1f} ms  {name}")
+    
+    return total_us
+
+def main():
+    modules = sys.argv[1:] or DEFAULT_MODULES
+    for module in modules:
+        measure_module(module)
+
+if __name__ == '__main__':
+    main()
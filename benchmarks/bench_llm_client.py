@@ -0,0 +1,59 @@
+"""Compara requests.post suelto con el cliente compartido de la IA externa.
+
+Levanta el servidor simulado (fake_llm_server) y envía la misma serie de
+mensajes de las dos formas, midiendo la latencia por mensaje y cuántas
+conexiones TCP tuvo que aceptar el servidor. Contra OpenRouter la diferencia
+por mensaje es además el handshake TLS que el pool evita.
+
+Uso: python benchmarks/bench_llm_client.py [mensajes]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+from benchmarks.fake_llm_server import start_server, FakeLLMHandler
+from src.llm_client import LLMClient
+
+PORT = 8099
+PAYLOAD = {
+    "model": "deepseek/deepseek-r1:free",
+    "messages": [{"role": "user", "content": "¿Cuántos estudiantes están en riesgo?"}],
+    "max_tokens": 50
+}
+
+def bare_post(base_url):
+    return requests.post(
+        f"{base_url}/chat/completions",
+        headers={"Authorization": "Bearer test", "Content-Type": "application/json"},
+        json=PAYLOAD,
+        timeout=30
+    )
+
+def measure(label, send, messages):
+    connections_before = FakeLLMHandler.connections
+    start = time.perf_counter()
+    for _ in range(messages):
+        response = send()
+        response.raise_for_status()
+    elapsed_ms = (time.perf_counter() - start) / messages * 1000
+    connections = FakeLLMHandler.connections - connections_before
+    print(f"{label:<28} {elapsed_ms:8.3f} ms/mensaje   conexiones: {connections}")
+
+def main():
+    messages = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    server = start_server(PORT)
+    base_url = f"http://127.0.0.1:{PORT}"
+    client = LLMClient(base_url=base_url)
+    
+    try:
+        measure("requests.post (sin pool)", lambda: bare_post(base_url), messages)
+        measure("LLMClient (pool keep-alive)", lambda: client.chat_completion("test", PAYLOAD), messages)
+    finally:
+        client.close()
+        server.shutdown()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""Mide el costo de preparación por reporte del pipeline PDF.
+
+Compara la preparación que hacían los constructores antiguos en cada llamada
+(getSampleStyleSheet + ParagraphStyle + TableStyle) con los estilos cacheados
+a nivel de módulo, y el tiempo total de renderizar el reporte general.
+
+Uso: python benchmarks/bench_pdf_setup.py [repeticiones]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reportlab.lib import colors
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.platypus import TableStyle
+from src.data_processor import data_processor
+from src.report_generator import report_generator, get_pdf_styles, get_table_style
+
+def legacy_setup():
+    """Preparación que se repetía en cada llamada a _create_pdf_in_memory/_create_pdf_report"""
+    styles = getSampleStyleSheet()
+    ParagraphStyle('CustomTitle', parent=styles['Heading1'], fontSize=18, spaceAfter=30, alignment=1)
+    for header_color, body_color, font_size in (('grey', 'beige', 12), ('grey', 'beige', 10),
+                                                ('red', 'lightcoral', 9)):
+        TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), getattr(colors, header_color)),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), font_size),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), getattr(colors, body_color)),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black)
+        ])
+
+def cached_setup():
+    """Preparación con los estilos cacheados del pipeline actual"""
+    get_pdf_styles()
+    get_table_style(header_font_size=12)
+    get_table_style(header_font_size=10)
+    get_table_style(header_color='red', body_color='lightcoral', header_font_size=9)
+
+def measure(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    students_df = data_processor.df
+    report = report_generator.generate_general_report(students_df, data_processor.get_statistics())
+    
+    legacy_ms = measure(legacy_setup, repeat)
+    cached_ms = measure(cached_setup, repeat)
+    render_ms = measure(lambda: report_generator.render_general_pdf(report, students_df), max(repeat // 10, 1))
+    
+    print(f"Preparación antigua por reporte:  {legacy_ms:8.3f} ms")
+    print(f"Preparación cacheada por reporte: {cached_ms:8.3f} ms")
+    print(f"Ahorro por reporte:               {legacy_ms - cached_ms:8.3f} ms")
+    print(f"Render completo (memoria):        {render_ms:8.3f} ms")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""Compara la validación de estudiantes fila por fila con la validación columnar.
+
+Arma N filas a partir del dataset (con un 1% de valores fuera de rango, de
+tipo incorrecto o faltantes) y mide la validación antigua de
+DataProcessor.validate_data, un diccionario a la vez con conversiones en
+try/except, contra SchemaValidator.validate sobre el DataFrame completo.
+
+Uso: python benchmarks/bench_schema_validation.py [filas]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+from src.data_processor import data_processor, REQUIRED_FIELDS
+from src.schema_validator import schema_validator
+
+def legacy_validate(new_data):
+    """DataProcessor.validate_data antes de delegar en schema_validator"""
+    errors = []
+    for field in REQUIRED_FIELDS:
+        if field not in new_data or new_data[field] is None or new_data[field] == '':
+            errors.append(f"Campo requerido faltante: {field}")
+    
+    if 'edad' in new_data:
+        try:
+            edad = int(new_data['edad'])
+            if edad < 16 or edad > 50:
+                errors.append("Edad debe estar entre 16 y 50 años")
+        except (ValueError, TypeError):
+            errors.append("Edad debe ser un número entero")
+    
+    if 'calificaciones_anteriores' in new_data:
+        try:
+            calif = float(new_data['calificaciones_anteriores'])
+            if calif < 0 or calif > 10:
+                errors.append("Calificaciones deben estar entre 0 y 10")
+        except (ValueError, TypeError):
+            errors.append("Calificaciones deben ser un número")
+    
+    if 'asistencia_porcentaje' in new_data:
+        try:
+            asist = int(new_data['asistencia_porcentaje'])
+            if asist < 0 or asist > 100:
+                errors.append("Asistencia debe estar entre 0 y 100%")
+        except (ValueError, TypeError):
+            errors.append("Asistencia debe ser un número entero")
+    
+    return errors
+
+def build_rows(n_rows, seed=7):
+    base = data_processor.df[REQUIRED_FIELDS]
+    rows = base.iloc[np.arange(n_rows) % len(base)].reset_index(drop=True).astype(object)
+    rng = np.random.default_rng(seed)
+    bad = rng.choice(n_rows, size=max(n_rows // 100, 4), replace=False)
+    quarter = len(bad) // 4
+    rows.loc[bad[:quarter], 'edad'] = 70
+    rows.loc[bad[quarter:2 * quarter], 'asistencia_porcentaje'] = 'n/d'
+    rows.loc[bad[2 * quarter:3 * quarter], 'nombre'] = None
+    rows.loc[bad[3 * quarter:], 'calificaciones_anteriores'] = 11.5
+    return rows
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    rows = build_rows(n_rows)
+    
+    start = time.perf_counter()
+    records = rows.where(rows.notna(), None).to_dict('records')
+    legacy_invalid = sum(1 for record in records if legacy_validate(record))
+    legacy_ms = (time.perf_counter() - start) * 1000
+    
+    start = time.perf_counter()
+    codes = schema_validator.validate(rows)
+    columnar_invalid = int((codes != 0).sum())
+    columnar_ms = (time.perf_counter() - start) * 1000
+    
+    typed_rows = data_processor.df[REQUIRED_FIELDS].iloc[np.arange(n_rows) % len(data_processor.df)]
+    start = time.perf_counter()
+    schema_validator.validate(typed_rows)
+    typed_ms = (time.perf_counter() - start) * 1000
+    
+    print(f"{n_rows} filas")
+    print(f"Fila por fila (validate_data):       {legacy_ms:9.1f} ms  ({legacy_invalid} inválidas)")
+    print(f"Columnar (columnas de objetos):      {columnar_ms:9.1f} ms  ({columnar_invalid} inválidas)")
+    print(f"Columnar (columnas ya tipadas):      {typed_ms:9.1f} ms")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+"""Servidor local que imita la API /chat/completions de OpenRouter.
+
+Sirve para probar el cliente de la IA externa sin red ni API key: responde
+con el formato de OpenAI, mantiene las conexiones abiertas (HTTP/1.1
+keep-alive) y cuenta cuántas conexiones TCP recibió. Con
+OPENROUTER_BASE_URL=http://127.0.0.1:8099 el servidor de IA lo usa en lugar
+de OpenRouter.
+
+Con "stream": true responde por Server-Sent Events, una palabra por evento
+(--token-delay simula el tiempo entre tokens).
+
+Uso: python benchmarks/fake_llm_server.py [puerto] [--delay SEGUNDOS] [--token-delay SEGUNDOS]
+                                          [--fail-rate 0.0-1.0]
+"""
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Encabezados y cuerpo van en escrituras separadas: sin Nagle no se espera el ACK retardado
+    disable_nagle_algorithm = True
+    delay = 0.0
+    token_delay = 0.0
+    fail_rate = 0.0
+    connections = 0
+    requests_served = 0
+    _lock = threading.Lock()
+    
+    def setup(self):
+        super().setup()
+        with FakeLLMHandler._lock:
+            FakeLLMHandler.connections += 1
+    
+    def log_message(self, format, *args):
+        pass
+    
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def _write_chunk(self, text):
+        data = text.encode('utf-8')
+        self.wfile.write(f"{len(data):X}\r\n".encode('ascii') + data + b"\r\n")
+    
+    def _send_stream(self, content):
+        """Responde como OpenRouter con stream=true: un evento SSE por palabra"""
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        self._write_chunk(": OPENROUTER PROCESSING\n\n")
+        for i, word in enumerate(content.split(' ')):
+            time.sleep(self.token_delay)
+            delta = {'choices': [{'delta': {'content': word if i == 0 else f" {word}"}}]}
+            self._write_chunk(f"data: {json.dumps(delta, ensure_ascii=False)}\n\n")
+        self._write_chunk("data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+    
+    def do_GET(self):
+        if self.path.rstrip('/') == '/stats':
+            self._send_json(200, {'connections': FakeLLMHandler.connections,
+                                  'requests': FakeLLMHandler.requests_served})
+        else:
+            self._send_json(404, {'error': {'message': 'Ruta no encontrada'}})
+    
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        payload = json.loads(self.rfile.read(length) or b'{}')
+        with FakeLLMHandler._lock:
+            FakeLLMHandler.requests_served += 1
+        
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            self._send_json(404, {'error': {'message': 'Ruta no encontrada'}})
+            return
+        if self.fail_rate and random.random() < self.fail_rate:
+            self._send_json(503, {'error': {'message': 'Servicio no disponible (simulado)'}})
+            return
+        
+        time.sleep(self.delay)
+        messages = payload.get('messages', [])
+        question = messages[-1]['content'] if messages else ''
+        if payload.get('stream'):
+            self._send_stream(f"Respuesta simulada a: {question}")
+            return
+        self._send_json(200, {
+            'id': f"fake-{FakeLLMHandler.requests_served}",
+            'model': payload.get('model', 'fake'),
+            'choices': [{'message': {'role': 'assistant', 'content': f"Respuesta simulada a: {question}"}}]
+        })
+
+class FakeLLMServer(ThreadingHTTPServer):
+    # Cola de conexiones pendientes amplia (por defecto 5) para las pruebas de carga
+    request_queue_size = 512
+    daemon_threads = True
+    
+    def handle_error(self, request, client_address):
+        # Un cliente que cancela la consulta (tiempo límite, desconexión) cierra la conexión a mitad de respuesta
+        if isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            return
+        super().handle_error(request, client_address)
+
+def start_server(port=8099, delay=0.0, fail_rate=0.0, token_delay=0.0):
+    """Arranca el servidor en un hilo y lo devuelve (para benchmarks y pruebas)"""
+    FakeLLMHandler.delay = delay
+    FakeLLMHandler.token_delay = token_delay
+    FakeLLMHandler.fail_rate = fail_rate
+    server = FakeLLMServer(('127.0.0.1', port), FakeLLMHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main():
+    args = sys.argv[1:]
+    port = int(args[0]) if args and not args[0].startswith('--') else 8099
+    delay = float(args[args.index('--delay') + 1]) if '--delay' in args else 0.0
+    fail_rate = float(args[args.index('--fail-rate') + 1]) if '--fail-rate' in args else 0.0
+    token_delay = float(args[args.index('--token-delay') + 1]) if '--token-delay' in args else 0.0
+    
+    server = start_server(port, delay, fail_rate, token_delay)
+    print(f"Servidor LLM simulado en http://127.0.0.1:{port} "
+          f"(delay={delay}s, token_delay={token_delay}s, fail_rate={fail_rate})")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == '__main__':
+    main()
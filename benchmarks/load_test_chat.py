@@ -0,0 +1,132 @@
+"""Prueba de carga del chat con muchas consultas simultáneas.
+
+Arranca el servidor LLM simulado (fake_llm_server, con --delay segundos de
+latencia por respuesta) y el servidor de IA en un subproceso apuntando a él,
+en modo async (ia_server_async.py) o flask (servidor de desarrollo con un
+hilo por consulta). Envía N consultas abiertas distintas, que no se responden
+localmente ni desde la caché, con C en vuelo a la vez, y muestra latencias,
+errores y el máximo de hilos que usó el servidor.
+
+Uso: python benchmarks/load_test_chat.py [async|flask] [--requests N] [--concurrency C]
+                                         [--delay SEGUNDOS] [--timeout SEGUNDOS]
+"""
+import os
+import sys
+import time
+import asyncio
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import aiohttp
+from benchmarks.fake_llm_server import start_server
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LLM_PORT = 8099
+SERVER_PORT = 5055
+
+def server_command(mode):
+    if mode == 'async':
+        return [sys.executable, 'ia_server_async.py']
+    return [sys.executable, '-c',
+            f"import ia_server; ia_server.app.run(port={SERVER_PORT}, threaded=True)"]
+
+def thread_count(pid):
+    """Hilos del proceso (Linux, /proc); None si no se puede leer"""
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith('Threads:'):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+
+async def wait_until_ready(session, base_url, process, timeout=120):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("El servidor de IA terminó antes de estar listo")
+        try:
+            async with session.get(f"{base_url}/api/status") as response:
+                if response.status == 200:
+                    return
+        except aiohttp.ClientError:
+            pass
+        await asyncio.sleep(0.5)
+    raise RuntimeError("El servidor de IA no respondió a tiempo")
+
+async def sample_threads(pid, peak):
+    while True:
+        count = thread_count(pid)
+        if count is not None:
+            peak[0] = max(peak[0], count)
+        await asyncio.sleep(0.05)
+
+async def run_load(base_url, process, requests, concurrency, timeout):
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=timeout)) as session:
+        await wait_until_ready(session, base_url, process)
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies, errors = [], {}
+        
+        async def send(i):
+            prompt = f"¿Qué estrategias recomiendas para mejorar la asistencia? (consulta {i})"
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    async with session.post(f"{base_url}/api/chat", json={'prompt': prompt}) as response:
+                        await response.read()
+                        key = None if response.status == 200 else f"HTTP {response.status}"
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    key = type(e).__name__
+                if key is None:
+                    latencies.append(time.perf_counter() - started)
+                else:
+                    errors[key] = errors.get(key, 0) + 1
+        
+        peak = [thread_count(process.pid) or 0]
+        sampler = asyncio.ensure_future(sample_threads(process.pid, peak))
+        started = time.perf_counter()
+        await asyncio.gather(*(send(i) for i in range(requests)))
+        elapsed = time.perf_counter() - started
+        sampler.cancel()
+        return latencies, errors, elapsed, peak[0]
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+def main():
+    args = sys.argv[1:]
+    mode = args[0] if args and not args[0].startswith('--') else 'async'
+    requests = int(args[args.index('--requests') + 1]) if '--requests' in args else 400
+    concurrency = int(args[args.index('--concurrency') + 1]) if '--concurrency' in args else 200
+    delay = float(args[args.index('--delay') + 1]) if '--delay' in args else 1.0
+    timeout = float(args[args.index('--timeout') + 1]) if '--timeout' in args else 120.0
+    
+    llm_server = start_server(LLM_PORT, delay=delay)
+    env = dict(os.environ,
+               OPENROUTER_BASE_URL=f"http://127.0.0.1:{LLM_PORT}",
+               OPENROUTER_API_KEY='load-test',
+               LLM_MAX_CONCURRENCY=str(concurrency),
+               IA_SERVER_PORT=str(SERVER_PORT))
+    process = subprocess.Popen(server_command(mode), cwd=ROOT, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        latencies, errors, elapsed, peak_threads = asyncio.run(
+            run_load(f"http://127.0.0.1:{SERVER_PORT}", process, requests, concurrency, timeout))
+    finally:
+        process.terminate()
+        process.wait()
+        llm_server.shutdown()
+    
+    print(f"Modo {mode}: {requests} consultas, {concurrency} en vuelo, IA simulada con {delay:.1f} s de latencia")
+    print(f"  Tiempo total:    {elapsed:.2f} s ({len(latencies) / elapsed:.1f} respuestas/s)")
+    if latencies:
+        print(f"  Latencia p50:    {percentile(latencies, 0.5) * 1000:.0f} ms")
+        print(f"  Latencia p95:    {percentile(latencies, 0.95) * 1000:.0f} ms")
+    print(f"  Errores:         {errors or 'ninguno'}")
+    print(f"  Hilos (máximo):  {peak_threads or 'n/d'}")
+
+if __name__ == '__main__':
+    main()
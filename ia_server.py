@@ -1,19 +1,34 @@
 import os
 import json
+import time
 import pandas as pd
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
-import requests
 from dotenv import load_dotenv
-from src.data_processor import data_processor
-import src.fuzzy_logic as fuzzy
 
-# Cargar variables de entorno
+# Cargar variables de entorno (antes de los módulos que leen su configuración al importarse)
 load_dotenv()
 
+from src.data_processor import data_processor
+from src.name_index import name_index_cache
+from src.llm_client import llm_client
+from src.response_cache import response_cache
+from src.intent_router import intent_router
+from src.conversation_store import conversation_store, is_follow_up
+from src.academic_context import academic_context_cache, build_prompt_context, estimate_tokens
+import src.fuzzy_logic as fuzzy
+
 app = Flask(__name__)
 CORS(app)
 
+@app.before_request
+def refresh_data():
+    """Recarga los datos si el dashboard modificó el CSV: la versión de datos cambia e invalida cachés"""
+    data_processor.reload_if_changed()
+
+# Máximo de estudiantes mencionados que se incluyen en el contexto de la IA
+MAX_MENTIONED_STUDENTS = int(os.getenv('CHAT_MAX_MENTIONED_STUDENTS', '5'))
+
 # Cargar datos del sistema académico
 def get_academic_context():
     """Obtiene el contexto académico completo para la IA"""
@@ -61,6 +76,37 @@ def get_academic_context():
     except Exception as e:
         return f"Error al cargar contexto académico: {str(e)}"
 
+def get_name_index():
+    """Índice de nombres de la versión actual del dataset (se reconstruye si cambian los datos)"""
+    return name_index_cache.get(data_processor.df, data_processor.get_data_version())
+
+def mentioned_positions(prompt):
+    """Filas de los estudiantes mencionados: distinguen en la caché consultas de texto parecido"""
+    df = data_processor.df
+    if df is None or df.empty:
+        return []
+    return [mention['position'] for mention in get_name_index().find_mentions(prompt)[:MAX_MENTIONED_STUDENTS]]
+
+def follow_up_history(prompt, session_id):
+    """Historial de la sesión si la pregunta es de seguimiento; las que tienen sujeto propio se responden
+    (y se guardan en la caché) sin él"""
+    return conversation_store.get(session_id) if is_follow_up(prompt) else None
+
+def route_locally(prompt, session_id=None):
+    """Responde sin la IA externa las consultas deterministas (conteos, estadísticas, fichas)"""
+    # Las preguntas de seguimiento ("¿y cuántos de ellos...?") dependen del historial de la sesión
+    if follow_up_history(prompt, session_id) is not None:
+        return None
+    return intent_router.route(prompt, data_processor.df, data_processor.get_data_version(), get_name_index())
+
+def format_student_list(students):
+    """Líneas "Nombre Apellido (Carrera, en riesgo)" de un DataFrame de estudiantes"""
+    return [
+        f"{nombre} {apellido} ({carrera}, {'en riesgo' if riesgo == 1 else 'sin riesgo'})"
+        for nombre, apellido, carrera, riesgo in zip(students['nombre'], students['apellido'],
+                                                     students['carrera'], students['rendimiento_riesgo'])
+    ]
+
 def find_student_by_name(search_name):
     """Busca un estudiante por nombre de manera flexible y precisa"""
     try:
@@ -68,50 +114,13 @@ def find_student_by_name(search_name):
         if df is None or df.empty:
             return None
         
-        search_name = search_name.lower().strip()
-        
-        # Prioridad 1: Búsqueda exacta de nombre completo
-        for _, student in df.iterrows():
-            nombre = student['nombre'].lower()
-            apellido = student['apellido'].lower()
-            nombre_completo = f"{nombre} {apellido}"
-            
-            if search_name == nombre_completo:
-                return student.to_dict()
-        
-        # Prioridad 2: Búsqueda exacta de nombre y apellido por separado
-        search_parts = search_name.split()
-        if len(search_parts) >= 2:
-            search_nombre = search_parts[0]
-            search_apellido = search_parts[1]
-            
-            for _, student in df.iterrows():
-                nombre = student['nombre'].lower()
-                apellido = student['apellido'].lower()
-                
-                if nombre == search_nombre and apellido == search_apellido:
-                    return student.to_dict()
-        
-        # Prioridad 3: Búsqueda parcial (contiene)
-        for _, student in df.iterrows():
-            nombre = student['nombre'].lower()
-            apellido = student['apellido'].lower()
-            nombre_completo = f"{nombre} {apellido}"
-            
-            if (search_name in nombre_completo or 
-                search_name in nombre or 
-                search_name in apellido):
-                return student.to_dict()
-        
-        # Prioridad 4: Búsqueda inversa (nombre/apellido contiene búsqueda)
-        for _, student in df.iterrows():
-            nombre = student['nombre'].lower()
-            apellido = student['apellido'].lower()
-            
-            if (nombre in search_name or apellido in search_name):
-                return student.to_dict()
+        # Las cuatro prioridades (exacto, nombre+apellido, parcial, inversa) se
+        # resuelven con el índice precalculado en lugar de recorrer el DataFrame
+        position = get_name_index().find(search_name)
+        if position is None:
+            return None
         
-        return None
+        return df.iloc[position].to_dict()
     except Exception as e:
         print(f"Error buscando estudiante: {e}")
         return None
@@ -145,18 +154,16 @@ def generate_ai_response(prompt):
                 letter = 'C'
             
             if letter:
-                matching_students = df[df['nombre'].str.upper().str.startswith(letter)]
-                if len(matching_students) > 0:
-                    student_list = []
-                    for _, student in matching_students.head(10).iterrows():
-                        risk_status = "en riesgo" if student['rendimiento_riesgo'] == 1 else "sin riesgo"
-                        student_list.append(f"{student['nombre']} {student['apellido']} ({student['carrera']}, {risk_status})")
+                # Búsqueda binaria en el índice de prefijos: solo se leen las 10 filas que se muestran
+                positions, total_matches = get_name_index().names_starting_with(letter, limit=10)
+                if total_matches > 0:
+                    student_list = format_student_list(df.iloc[positions])
                     
                     response = f"Te muestro los estudiantes cuyo nombre empieza con '{letter}':\n\n"
                     response += "\n".join([f"• {student}" for student in student_list])
                     
-                    if len(matching_students) > 10:
-                        response += f"\n\n(Mostrando los primeros 10 de {len(matching_students)} estudiantes encontrados)"
+                    if total_matches > 10:
+                        response += f"\n\n(Mostrando los primeros 10 de {total_matches} estudiantes encontrados)"
                     
                     response += f"\n\n¿Te interesa conocer más detalles sobre alguno de ellos?"
                     return response
@@ -438,8 +445,10 @@ def home():
         "status": "running",
         "endpoints": {
             "/api/chat": "POST - Chat con IA",
+            "/api/chat/stream": "POST - Chat con IA en streaming (Server-Sent Events)",
             "/api/student-search": "POST - Buscar estudiantes",
-            "/api/stats": "GET - Estadísticas del sistema"
+            "/api/stats": "GET - Estadísticas del sistema",
+            "/api/metrics": "GET - Métricas del chat (respuestas locales, caché, IA externa)"
         },
         "students_loaded": len(data_processor.df) if data_processor.df is not None else 0
     })
@@ -455,27 +464,50 @@ def status():
 
 @app.route('/api/chat', methods=['POST'])
 def chat_endpoint():
-    """Endpoint principal para consultas a la IA académica - SOLO API EXTERNA"""
+    """Endpoint principal para consultas a la IA académica (consultas deterministas locales, el resto con API externa)"""
     try:
         data = request.get_json()
         prompt = data.get('prompt', '')
+        session_id = data.get('session_id')
         
         if not prompt:
             return jsonify({"error": "Prompt vacío"}), 400
         
         print(f"✅ CONSULTA RECIBIDA: {prompt}")
         
-        # FORZAR uso de API externa SIEMPRE
+        # Conteos, porcentajes y estadísticas se responden con los datos indexados
+        routed = route_locally(prompt, session_id)
+        if routed is not None:
+            intent, local_response = routed
+            print(f"🧭 Respuesta local (intención: {intent})")
+            conversation_store.add_turn(session_id, prompt, local_response)
+            return jsonify({"respuesta": local_response, "intent": intent, "local": True})
+        
+        # Las consultas abiertas van SIEMPRE a la API externa
         api_key = os.getenv('OPENROUTER_API_KEY')
         
         if not api_key or not api_key.strip():
             return jsonify({"error": "API Key no configurada"}), 500
         
+        # Preguntas repetidas (o paráfrasis) con los mismos datos se responden desde la caché; las
+        # preguntas de seguimiento no, porque su respuesta depende de la conversación
+        history = follow_up_history(prompt, session_id)
+        data_version = data_processor.get_data_version()
+        entities = mentioned_positions(prompt)
+        cached_response = response_cache.get(prompt, data_version, entities) if history is None else None
+        if cached_response is not None:
+            print("⚡ Respuesta desde caché")
+            conversation_store.add_turn(session_id, prompt, cached_response)
+            return jsonify({"respuesta": cached_response, "cache": True})
+        
         print(f"🔑 Usando API externa con key: {api_key[:20]}...")
         
         try:
-            ai_response = generate_intelligent_ai_response(prompt, api_key)
+            ai_response = generate_intelligent_ai_response(prompt, api_key, history)
             print(f"✅ RESPUESTA IA EXTERNA: {ai_response}")
+            if history is None:
+                response_cache.put(prompt, data_version, ai_response, entities)
+            conversation_store.add_turn(session_id, prompt, ai_response)
             return jsonify({"respuesta": ai_response})
         except Exception as e:
             print(f"❌ Error con API externa: {e}")
@@ -485,119 +517,54 @@ def chat_endpoint():
         print(f"❌ ERROR: {str(e)}")
         return jsonify({"error": f"Error interno: {str(e)}"}), 500
 
-def generate_intelligent_ai_response(prompt, api_key):
-    """Genera respuesta usando IA externa siguiendo EXACTAMENTE el método exitoso del compañero"""
-    try:
-        # 🔑 DEBUGGING: Verificar API Key
-        print(f"🔑 API Key presente: {bool(api_key)}")
-        print(f"🔑 Primeros 10 chars: {api_key[:10] if api_key else 'N/A'}")
-        
-        # Obtener contexto académico completo (como hace el compañero)
-        df = data_processor.df
-        if df is None or df.empty:
-            return "Lo siento, no tengo acceso a los datos académicos en este momento."
-        
-        # Obtener datos reales para el contexto (muestra de estudiantes)
-        sample_students = df.head(10).to_dict('records')
-        at_risk_students = df[df['rendimiento_riesgo'] == 1].head(5).to_dict('records')
-        stats = data_processor.get_statistics()
-        
-        # Crear contexto simplificado para evitar problemas de serialización
-        contexto_academico = {
-            "total_estudiantes": len(df),
-            "estudiantes_en_riesgo": len(df[df['rendimiento_riesgo'] == 1]),
-            "promedio_general": float(stats['promedio_general']),
-            "promedio_asistencia": float(stats['promedio_asistencia']),
-            "carreras": list(stats['carreras']),
-            "descripcion_sistema": {
-                "objetivo": "Sistema de predicción de riesgo académico",
-                "variables_principales": [
-                    "calificaciones_anteriores (4.0-10.0)",
-                    "asistencia_porcentaje (0-100%)",
-                    "participacion_clase (1-5)",
-                    "horas_estudio_semanal (1-25)",
-                    "nivel_socioeconomico (Bajo/Medio/Alto)",
-                    "rendimiento_riesgo (0=Sin riesgo, 1=En riesgo)"
-                ]
-            }
-        }
-        
-        # Buscar estudiante específico si se menciona un nombre en el prompt
-        student_specific_data = None
-        prompt_words = prompt.lower().split()
-        
-        # Buscar nombres mencionados en el prompt
-        for i, word in enumerate(prompt_words):
-            if i < len(prompt_words) - 1:
-                potential_name = f"{word} {prompt_words[i+1]}"
-                student_found = find_student_by_name(potential_name)
-                if student_found:
-                    student_specific_data = {
-                        "nombre_completo": f"{student_found['nombre']} {student_found['apellido']}",
-                        "carrera": student_found['carrera'],
-                        "semestre": student_found['semestre'],
-                        "promedio": float(student_found.get('promedio_general', student_found.get('calificaciones_anteriores', 0))),
-                        "asistencia": int(student_found['asistencia_porcentaje']),
-                        "participacion": int(student_found['participacion_clase']),
-                        "horas_estudio": int(student_found['horas_estudio_semanal']),
-                        "nivel_socioeconomico": student_found['nivel_socioeconomico'],
-                        "riesgo": int(student_found['rendimiento_riesgo']),
-                        "estado_academico": student_found['estado_academico'],
-                        "motivo_riesgo": student_found.get('motivo_riesgo', ''),
-                        "edad": int(student_found['edad']),
-                        "genero": student_found['genero'],
-                        "email": student_found['email']
-                    }
-                    print(f"✅ ESTUDIANTE ENCONTRADO: {student_specific_data['nombre_completo']}")
-                    break
+def build_student_context(student_found):
+    """Datos de un estudiante que se envían a la IA externa"""
+    return {
+        "nombre_completo": f"{student_found['nombre']} {student_found['apellido']}",
+        "carrera": student_found['carrera'],
+        "semestre": student_found['semestre'],
+        "promedio": float(student_found.get('promedio_general', student_found.get('calificaciones_anteriores', 0))),
+        "asistencia": int(student_found['asistencia_porcentaje']),
+        "participacion": int(student_found['participacion_clase']),
+        "horas_estudio": int(student_found['horas_estudio_semanal']),
+        "nivel_socioeconomico": student_found['nivel_socioeconomico'],
+        "riesgo": int(student_found['rendimiento_riesgo']),
+        "estado_academico": student_found['estado_academico'],
+        "motivo_riesgo": student_found.get('motivo_riesgo', ''),
+        "edad": int(student_found['edad']),
+        "genero": student_found['genero'],
+        "email": student_found['email']
+    }
 
-        # Agregar muestra representativa de estudiantes de forma segura
-        try:
-            sample_data = []
-            # Tomar una muestra más amplia y representativa (50 estudiantes aleatorios)
-            sample_df = df.sample(n=min(50, len(df)), random_state=42)
-            for _, student in sample_df.iterrows():
-                student_dict = {
-                    "nombre": str(student['nombre']),
-                    "apellido": str(student['apellido']),
-                    "carrera": str(student['carrera']),
-                    "semestre": int(student['semestre']),
-                    "promedio": float(student.get('promedio_general', student.get('calificaciones_anteriores', 0))),
-                    "asistencia": int(student['asistencia_porcentaje']),
-                    "riesgo": int(student['rendimiento_riesgo'])
-                }
-                sample_data.append(student_dict)
-            contexto_academico["muestra_estudiantes"] = sample_data
-            
-            # Agregar información adicional para búsquedas específicas
-            contexto_academico["todos_los_nombres"] = [
-                f"{row['nombre']} {row['apellido']}" for _, row in df.iterrows()
-            ]
-            
-            # Agregar información del estudiante específico si se encontró
-            if student_specific_data:
-                contexto_academico["estudiante_consultado"] = student_specific_data
-            
-            # Agregar estadísticas por carrera más detalladas
-            contexto_academico["estadisticas_por_carrera"] = {}
-            for carrera in stats['carreras']:
-                carrera_df = df[df['carrera'] == carrera]
-                contexto_academico["estadisticas_por_carrera"][carrera] = {
-                    "total": len(carrera_df),
-                    "en_riesgo": len(carrera_df[carrera_df['rendimiento_riesgo'] == 1]),
-                    "promedio_calificaciones": float(carrera_df['calificaciones_anteriores'].mean()),
-                    "promedio_asistencia": float(carrera_df['asistencia_porcentaje'].mean())
-                }
-                
-        except Exception as e:
-            print(f"Error agregando muestra de estudiantes: {e}")
-            contexto_academico["muestra_estudiantes"] = []
-        
-        # 🧠 PROMPT ENGINEERING NATURAL Y CONVERSACIONAL
-        context = f"""Eres un coordinador académico amigable y cercano de la Universidad Tecnosur. Hablas de manera natural, como si fueras una persona real conversando con un colega. NO uses formato estructurado, listas con viñetas, ni emojis excesivos. Responde como lo haría un coordinador académico en una conversación normal.
+def build_chat_payload(prompt, history=None):
+    """Arma el payload de OpenRouter (contexto académico + historial de la sesión + consulta); None si no hay datos"""
+    # Obtener contexto académico completo (como hace el compañero)
+    df = data_processor.df
+    if df is None or df.empty:
+        return None
+    
+    # Contexto académico común: se calcula y serializa una vez por versión de los datos
+    snapshot = academic_context_cache.get(df, data_processor.get_data_version(), data_processor.get_statistics)
+    
+    # En una pregunta de seguimiento ("¿y su asistencia?") el estudiante o la carrera suelen
+    # estar en la pregunta anterior
+    context_prompt = f"{history['turnos'][-1][0]} {prompt}" if history and history['turnos'] else prompt
+    
+    # Buscar todos los estudiantes mencionados en el prompt (una sola pasada)
+    student_specific_data = []
+    for mention in get_name_index().find_mentions(context_prompt)[:MAX_MENTIONED_STUDENTS]:
+        student_found = df.iloc[mention['position']].to_dict()
+        student_specific_data.append(build_student_context(student_found))
+        print(f"✅ ESTUDIANTE ENCONTRADO ({mention['tipo']}): {student_specific_data[-1]['nombre_completo']}")
+    
+    # Bloque de datos de esta consulta, limitado por el presupuesto de tokens
+    data_block, context_metrics = build_prompt_context(snapshot, context_prompt, student_specific_data)
+    
+    # 🧠 PROMPT ENGINEERING NATURAL Y CONVERSACIONAL
+    context = f"""Eres un coordinador académico amigable y cercano de la Universidad Tecnosur. Hablas de manera natural, como si fueras una persona real conversando con un colega. NO uses formato estructurado, listas con viñetas, ni emojis excesivos. Responde como lo haría un coordinador académico en una conversación normal.
 
 DATOS ACADÉMICOS ACTUALES:
-{json.dumps(contexto_academico, indent=2, ensure_ascii=False)}
+{data_block}
 
 INSTRUCCIONES IMPORTANTES:
 - Habla de manera natural y conversacional, como una persona real
@@ -623,34 +590,61 @@ EJEMPLOS DE CÓMO NO DEBES RESPONDER:
 
 Recuerda: Eres una persona real hablando de manera natural, no un sistema automatizado."""
 
-        # 📊 DEBUGGING: Verificar contexto
-        print(f"📊 Contexto generado (primeros 300 chars): {context[:300]}...")
-        print(f"📈 Tamaño del contexto: {len(context)} caracteres")
+    # 📊 DEBUGGING: Verificar contexto
+    print(f"📊 Contexto generado (primeros 300 chars): {context[:300]}...")
+    print(f"📈 Tamaño del contexto: {len(context)} caracteres (~{estimate_tokens(context)} tokens)")
+    print(f"📏 Datos académicos: ~{context_metrics['tokens_estimados']}/{context_metrics['presupuesto']} tokens, "
+          f"omitidos: {context_metrics['omitidos'] or 'ninguno'}")
+    
+    # Historial acotado de la sesión: resumen de lo anterior + últimos intercambios
+    history_messages = conversation_store.to_messages(history)
+    if history_messages:
+        print(f"💬 Historial de la conversación: {len(history_messages)} mensajes, "
+              f"{sum(len(message['content']) for message in history_messages)} caracteres")
+    
+    return {
+        "model": "deepseek/deepseek-r1:free",
+        "messages": [
+            {"role": "system", "content": context},
+            *history_messages,
+            {"role": "user", "content": prompt}
+        ],
+        "temperature": 0.7,  # 🌡️ Temperatura para respuestas naturales
+        "max_tokens": 1500   # 📏 Aumentado para respuestas más completas
+    }
+
+def extract_completion_text(result):
+    """Extrae el texto de la respuesta JSON de /chat/completions EXACTAMENTE como el compañero"""
+    if result.get('error'):
+        raise Exception(result['error'].get('message', 'Error en la API de IA'))
+    
+    ai_response = (
+        result.get('choices', [{}])[0].get('message', {}).get('content') or
+        result.get('choices', [{}])[0].get('text') or
+        "No se pudo generar una respuesta."
+    )
+    return ai_response.strip()
+
+def generate_intelligent_ai_response(prompt, api_key, history=None):
+    """Genera respuesta usando IA externa siguiendo EXACTAMENTE el método exitoso del compañero"""
+    try:
+        # 🔑 DEBUGGING: Verificar API Key
+        print(f"🔑 API Key presente: {bool(api_key)}")
+        print(f"🔑 Primeros 10 chars: {api_key[:10] if api_key else 'N/A'}")
+        
+        payload = build_chat_payload(prompt, history)
+        if payload is None:
+            return "Lo siento, no tengo acceso a los datos académicos en este momento."
         
         # 📡 DEBUGGING: Preparar request
-        print("📡 Enviando request a OpenRouter...")
+        print(f"📡 Enviando request a {llm_client.base_url}...")
         print(f"🎯 Modelo: deepseek/deepseek-r1:free")
         print(f"🌡️ Temperature: 0.7")
         print(f"🎛️ Max tokens: 500")
         
-        # Llamar a la API con EXACTAMENTE la misma configuración del compañero
-        response = requests.post(
-            "https://openrouter.ai/api/v1/chat/completions",
-            headers={
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json"
-            },
-            json={
-                "model": "deepseek/deepseek-r1:free",
-                "messages": [
-                    {"role": "system", "content": context},
-                    {"role": "user", "content": prompt}
-                ],
-                "temperature": 0.7,  # 🌡️ Temperatura para respuestas naturales
-                "max_tokens": 1500   # 📏 Aumentado para respuestas más completas
-            },
-            timeout=30
-        )
+        # Llamar a la API con la misma configuración del compañero, a través del cliente
+        # compartido (conexiones keep-alive, reintentos con backoff y límite de concurrencia)
+        response = llm_client.chat_completion(api_key, payload)
         
         # 📥 DEBUGGING: Verificar respuesta
         print(f"📥 Status code: {response.status_code}")
@@ -663,58 +657,144 @@ Recuerda: Eres una persona real hablando de manera natural, no un sistema automa
         result = response.json()
         print(f"📥 Respuesta completa de API: {json.dumps(result, indent=2)}")
         
-        # Extraer respuesta EXACTAMENTE como el compañero
-        if result.get('error'):
-            raise Exception(result['error'].get('message', 'Error en la API de IA'))
-        
-        ai_response = (
-            result.get('choices', [{}])[0].get('message', {}).get('content') or
-            result.get('choices', [{}])[0].get('text') or
-            "No se pudo generar una respuesta."
-        )
-        
+        ai_response = extract_completion_text(result)
         print(f"✅ Respuesta extraída: {ai_response}")
         
-        return ai_response.strip()
+        return ai_response
         
     except Exception as e:
         print(f"❌ Error en IA externa: {e}")
         print(f"🔍 Tipo de error: {type(e).__name__}")
         raise e
 
+def stream_intelligent_ai_response(prompt, api_key, history=None):
+    """Igual que generate_intelligent_ai_response, pero entrega el texto por fragmentos"""
+    payload = build_chat_payload(prompt, history)
+    if payload is None:
+        yield "Lo siento, no tengo acceso a los datos académicos en este momento."
+        return
+    
+    print(f"📡 Enviando request en streaming a {llm_client.base_url}...")
+    yield from llm_client.stream_chat_completion(api_key, payload)
+
+def sse_event(data, event=None):
+    """Formatea un evento Server-Sent Events con datos JSON"""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@app.route('/api/chat/stream', methods=['POST'])
+def chat_stream_endpoint():
+    """Igual que /api/chat, pero reenvía los tokens a medida que llegan (Server-Sent Events).
+    
+    Eventos: `data: {"token": ...}` por fragmento, `event: done` con la
+    respuesta completa y `event: error` si falla la API externa.
+    """
+    data = request.get_json(silent=True) or {}
+    prompt = data.get('prompt', '')
+    session_id = data.get('session_id')
+    
+    if not prompt:
+        return jsonify({"error": "Prompt vacío"}), 400
+    
+    print(f"✅ CONSULTA RECIBIDA (streaming): {prompt}")
+    
+    routed = route_locally(prompt, session_id)
+    if routed is not None:
+        intent, local_response = routed
+        print(f"🧭 Respuesta local (streaming, intención: {intent})")
+        conversation_store.add_turn(session_id, prompt, local_response)
+        
+        def generate_local():
+            yield sse_event({"token": local_response})
+            yield sse_event({"respuesta": local_response, "intent": intent, "local": True}, event='done')
+        
+        return Response(generate_local(), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    
+    api_key = os.getenv('OPENROUTER_API_KEY')
+    if not api_key or not api_key.strip():
+        return jsonify({"error": "API Key no configurada"}), 500
+    
+    history = follow_up_history(prompt, session_id)
+    data_version = data_processor.get_data_version()
+    entities = mentioned_positions(prompt)
+    cached_response = response_cache.get(prompt, data_version, entities) if history is None else None
+    
+    def generate():
+        if cached_response is not None:
+            print("⚡ Respuesta desde caché (streaming)")
+            conversation_store.add_turn(session_id, prompt, cached_response)
+            yield sse_event({"token": cached_response})
+            yield sse_event({"respuesta": cached_response, "cache": True}, event='done')
+            return
+        
+        started = time.perf_counter()
+        fragments = []
+        try:
+            for fragment in stream_intelligent_ai_response(prompt, api_key, history):
+                if not fragments:
+                    print(f"⚡ Primer fragmento en {(time.perf_counter() - started) * 1000:.0f} ms")
+                fragments.append(fragment)
+                yield sse_event({"token": fragment})
+            
+            ai_response = ''.join(fragments).strip() or "No se pudo generar una respuesta."
+            print(f"✅ RESPUESTA IA EXTERNA (streaming, {(time.perf_counter() - started) * 1000:.0f} ms): {ai_response}")
+            if fragments:
+                if history is None:
+                    response_cache.put(prompt, data_version, ai_response, entities)
+                conversation_store.add_turn(session_id, prompt, ai_response)
+            yield sse_event({"respuesta": ai_response}, event='done')
+        except Exception as e:
+            print(f"❌ Error con API externa (streaming): {e}")
+            yield sse_event({"error": f"Error de API externa: {str(e)}"}, event='error')
+    
+    # Sin caché ni buffering de proxies: cada evento debe llegar al navegador en cuanto se genera
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 @app.route('/api/student-search', methods=['POST'])
 def student_search():
     """Endpoint para buscar estudiantes específicos"""
     try:
         data = request.get_json()
-        search_term = data.get('search', '').lower()
+        search_term = data.get('search', '')
         
         df = data_processor.df
         if df is None or df.empty:
             return jsonify({"students": []})
         
-        # Buscar estudiantes que coincidan
-        matches = df[
-            df['nombre'].str.lower().str.contains(search_term, na=False) |
-            df['apellido'].str.lower().str.contains(search_term, na=False) |
-            (df['nombre'] + ' ' + df['apellido']).str.lower().str.contains(search_term, na=False)
+        # Índice de nombres normalizados: primero los que empiezan con la búsqueda, luego los que
+        # la contienen; se detiene al llegar a 10 resultados
+        matches = df.iloc[get_name_index().search(search_term, limit=10)]
+        
+        students = [
+            {
+                "id": id_estudiante,
+                "nombre_completo": f"{nombre} {apellido}",
+                "carrera": carrera,
+                "semestre": semestre,
+                "riesgo": "Alto" if riesgo == 1 else "Bajo"
+            }
+            for id_estudiante, nombre, apellido, carrera, semestre, riesgo in zip(
+                matches['id_estudiante'].tolist(), matches['nombre'], matches['apellido'], matches['carrera'],
+                matches['semestre'].tolist(), matches['rendimiento_riesgo'].tolist())
         ]
         
-        students = []
-        for _, student in matches.head(10).iterrows():  # Limitar a 10 resultados
-            students.append({
-                "id": student['id_estudiante'],
-                "nombre_completo": f"{student['nombre']} {student['apellido']}",
-                "carrera": student['carrera'],
-                "semestre": student['semestre'],
-                "riesgo": "Alto" if student['rendimiento_riesgo'] == 1 else "Bajo"
-            })
-        
         return jsonify({"students": students})
     
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Métricas del chat: respuestas locales, caché de respuestas y llamadas a la IA externa"""
+    return jsonify({
+        "intent_router": intent_router.get_stats(),
+        "response_cache": response_cache.get_stats(),
+        "conversation_store": conversation_store.get_stats(),
+        "llm_client": dict(llm_client.stats)
+    })
+
 @app.route('/api/stats', methods=['GET'])
 def get_stats():
     """Endpoint para obtener estadísticas rápidas"""
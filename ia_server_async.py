@@ -0,0 +1,264 @@
+"""Modo asíncrono (asyncio + aiohttp) del servidor de IA académica.
+
+Sirve /api/chat y /api/chat/stream (las rutas que usa el dashboard) desde un
+event loop: mientras la IA externa responde, cada consulta queda suspendida en
+lugar de bloquear un hilo, de modo que cientos de consultas en vuelo comparten
+unos pocos hilos. Usa los mismos datos, enrutador de intenciones, caché,
+historial de conversación y contexto que ia_server.py; solo la llamada a la IA
+externa pasa por el cliente asíncrono.
+
+Cada consulta tiene un tiempo límite (CHAT_REQUEST_TIMEOUT, 60 s por defecto)
+y se cancela si el cliente se desconecta, liberando su cupo en la IA externa.
+
+Uso: python ia_server_async.py   (puerto IA_SERVER_PORT, 5001 por defecto)
+"""
+import os
+import time
+import asyncio
+from aiohttp import web
+
+from ia_server import (data_processor, response_cache, intent_router, llm_client, route_locally,
+                       follow_up_history, mentioned_positions, build_chat_payload, extract_completion_text, sse_event)
+from src.async_llm_client import async_llm_client
+from src.conversation_store import conversation_store
+
+REQUEST_TIMEOUT = float(os.getenv('CHAT_REQUEST_TIMEOUT', '60'))
+NO_DATA_RESPONSE = "Lo siento, no tengo acceso a los datos académicos en este momento."
+# Igual que CORS(app) en ia_server.py: el navegador del dashboard llama directamente a /api/chat/stream
+CORS_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
+    'Access-Control-Allow-Headers': 'Content-Type'
+}
+SSE_HEADERS = {'Content-Type': 'text/event-stream', 'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no',
+               **CORS_HEADERS}
+
+class RequestTimeout(Exception):
+    """La consulta superó CHAT_REQUEST_TIMEOUT"""
+
+async def cancel_and_wait(task):
+    """Cancela `task` y espera a que termine de limpiar (cierre de conexiones, cupos)"""
+    task.cancel()
+    await asyncio.wait({task})
+    if not task.cancelled():
+        task.exception()
+
+async def with_timeout(awaitable, timeout=REQUEST_TIMEOUT):
+    """Espera `awaitable` con tiempo límite; si la consulta se cancela (cliente desconectado) la cancela también"""
+    task = asyncio.ensure_future(awaitable)
+    try:
+        done, _ = await asyncio.wait({task}, timeout=timeout)
+    except asyncio.CancelledError:
+        await cancel_and_wait(task)
+        raise
+    if not done:
+        await cancel_and_wait(task)
+        raise RequestTimeout()
+    return task.result()
+
+async def run_blocking(function, *args):
+    """Ejecuta trabajo de CPU (contexto, índices) en el pool de hilos del event loop"""
+    return await asyncio.get_running_loop().run_in_executor(None, function, *args)
+
+async def read_chat_request(request):
+    """Consulta e identificador de sesión (historial de la conversación) del cuerpo JSON"""
+    try:
+        data = await request.json()
+    except Exception:
+        return '', None
+    if not isinstance(data, dict):
+        return '', None
+    return data.get('prompt', ''), data.get('session_id')
+
+def json_response(data, status=200):
+    return web.json_response(data, status=status)
+
+async def generate_response(prompt, api_key, history):
+    """Igual que generate_intelligent_ai_response, esperando a la IA externa sin bloquear un hilo"""
+    payload = await run_blocking(build_chat_payload, prompt, history)
+    if payload is None:
+        return NO_DATA_RESPONSE
+    return extract_completion_text(await async_llm_client.chat_completion(api_key, payload))
+
+async def stream_response(prompt, api_key, history):
+    payload = await run_blocking(build_chat_payload, prompt, history)
+    if payload is None:
+        yield NO_DATA_RESPONSE
+        return
+    
+    async for fragment in async_llm_client.stream_chat_completion(api_key, payload):
+        yield fragment
+
+async def next_fragment(stream):
+    try:
+        return await stream.__anext__()
+    except StopAsyncIteration:
+        return None
+
+async def prepare_prompt(prompt, session_id):
+    """Respuesta local o desde la caché si la hay; si no, la versión de datos, los estudiantes mencionados
+    y el historial si es una pregunta de seguimiento (con historial no se usa la caché)"""
+    # Si el dashboard modificó el CSV se recarga antes de calcular la versión de datos
+    await run_blocking(data_processor.reload_if_changed)
+    routed = await run_blocking(route_locally, prompt, session_id)
+    if routed is not None:
+        intent, local_response = routed
+        conversation_store.add_turn(session_id, prompt, local_response)
+        return {"respuesta": local_response, "intent": intent, "local": True}, None, None, None
+    
+    history = follow_up_history(prompt, session_id)
+    data_version = data_processor.get_data_version()
+    entities = await run_blocking(mentioned_positions, prompt)
+    cached_response = response_cache.get(prompt, data_version, entities) if history is None else None
+    if cached_response is not None:
+        conversation_store.add_turn(session_id, prompt, cached_response)
+        return {"respuesta": cached_response, "cache": True}, None, None, None
+    return None, data_version, entities, history
+
+def remember_response(prompt, session_id, history, data_version, entities, ai_response):
+    """Guarda la respuesta de la IA externa en la caché (si no es de seguimiento) y en el historial"""
+    if history is None:
+        response_cache.put(prompt, data_version, ai_response, entities)
+    conversation_store.add_turn(session_id, prompt, ai_response)
+
+@web.middleware
+async def cors_middleware(request, handler):
+    response = web.Response() if request.method == 'OPTIONS' else await handler(request)
+    if not response.prepared:
+        response.headers.update(CORS_HEADERS)
+    return response
+
+async def home(request):
+    """Ruta principal del servidor IA (modo asíncrono)"""
+    return json_response({
+        "message": "🤖 Servidor IA Académico - Tecnosur (asíncrono)",
+        "status": "running",
+        "endpoints": {
+            "/api/chat": "POST - Chat con IA",
+            "/api/chat/stream": "POST - Chat con IA en streaming (Server-Sent Events)",
+            "/api/metrics": "GET - Métricas del chat (respuestas locales, caché, IA externa)"
+        },
+        "students_loaded": len(data_processor.df) if data_processor.df is not None else 0
+    })
+
+async def status(request):
+    """Estado del servidor"""
+    return json_response({
+        "status": "running",
+        "students_loaded": len(data_processor.df) if data_processor.df is not None else 0,
+        "server": "IA Académico Tecnosur (asíncrono)"
+    })
+
+async def chat_endpoint(request):
+    """Endpoint principal del chat: igual que /api/chat de ia_server.py"""
+    prompt, session_id = await read_chat_request(request)
+    if not prompt:
+        return json_response({"error": "Prompt vacío"}, status=400)
+    
+    print(f"✅ CONSULTA RECIBIDA (async): {prompt}")
+    
+    api_key = os.getenv('OPENROUTER_API_KEY')
+    ready, data_version, entities, history = await prepare_prompt(prompt, session_id)
+    if ready is not None:
+        return json_response(ready)
+    if not api_key or not api_key.strip():
+        return json_response({"error": "API Key no configurada"}, status=500)
+    
+    started = time.perf_counter()
+    try:
+        ai_response = await with_timeout(generate_response(prompt, api_key, history))
+    except asyncio.CancelledError:
+        print(f"🔌 Cliente desconectado, consulta cancelada tras {time.perf_counter() - started:.1f} s")
+        raise
+    except RequestTimeout:
+        print(f"⏱️ Consulta cancelada por tiempo límite ({REQUEST_TIMEOUT:.0f} s)")
+        return json_response({"error": f"La consulta superó el tiempo límite de {REQUEST_TIMEOUT:.0f} s"},
+                             status=504)
+    except Exception as e:
+        print(f"❌ Error con API externa: {e}")
+        return json_response({"error": f"Error de API externa: {str(e)}"}, status=500)
+    
+    print(f"✅ RESPUESTA IA EXTERNA (async, {(time.perf_counter() - started) * 1000:.0f} ms)")
+    remember_response(prompt, session_id, history, data_version, entities, ai_response)
+    return json_response({"respuesta": ai_response})
+
+async def chat_stream_endpoint(request):
+    """Igual que /api/chat/stream de ia_server.py"""
+    prompt, session_id = await read_chat_request(request)
+    if not prompt:
+        return json_response({"error": "Prompt vacío"}, status=400)
+    
+    print(f"✅ CONSULTA RECIBIDA (async, streaming): {prompt}")
+    
+    api_key = os.getenv('OPENROUTER_API_KEY')
+    ready, data_version, entities, history = await prepare_prompt(prompt, session_id)
+    if ready is None and (not api_key or not api_key.strip()):
+        return json_response({"error": "API Key no configurada"}, status=500)
+    
+    response = web.StreamResponse(headers=SSE_HEADERS)
+    await response.prepare(request)
+    if ready is not None:
+        await response.write(sse_event({"token": ready['respuesta']}).encode('utf-8'))
+        await response.write(sse_event(ready, event='done').encode('utf-8'))
+        await response.write_eof()
+        return response
+    
+    deadline = time.perf_counter() + REQUEST_TIMEOUT
+    fragments = []
+    stream = stream_response(prompt, api_key, history)
+    try:
+        while True:
+            fragment = await with_timeout(next_fragment(stream), max(deadline - time.perf_counter(), 0))
+            if fragment is None:
+                break
+            fragments.append(fragment)
+            await response.write(sse_event({"token": fragment}).encode('utf-8'))
+        
+        ai_response = ''.join(fragments).strip() or "No se pudo generar una respuesta."
+        if fragments:
+            remember_response(prompt, session_id, history, data_version, entities, ai_response)
+        await response.write(sse_event({"respuesta": ai_response}, event='done').encode('utf-8'))
+    except asyncio.CancelledError:
+        print("🔌 Cliente desconectado, streaming cancelado")
+        raise
+    except RequestTimeout:
+        print(f"⏱️ Streaming cancelado por tiempo límite ({REQUEST_TIMEOUT:.0f} s)")
+        await response.write(sse_event({"error": f"La consulta superó el tiempo límite de {REQUEST_TIMEOUT:.0f} s"},
+                                       event='error').encode('utf-8'))
+    except Exception as e:
+        print(f"❌ Error con API externa (async, streaming): {e}")
+        await response.write(sse_event({"error": f"Error de API externa: {str(e)}"}, event='error').encode('utf-8'))
+    finally:
+        await stream.aclose()
+    
+    await response.write_eof()
+    return response
+
+async def get_metrics(request):
+    """Métricas del chat: respuestas locales, caché de respuestas y llamadas a la IA externa"""
+    return json_response({
+        "intent_router": intent_router.get_stats(),
+        "response_cache": response_cache.get_stats(),
+        "conversation_store": conversation_store.get_stats(),
+        "llm_client": dict(llm_client.stats),
+        "async_llm_client": dict(async_llm_client.stats)
+    })
+
+async def close_llm_client(app):
+    await async_llm_client.close()
+
+def create_app():
+    app = web.Application(middlewares=[cors_middleware])
+    app.router.add_get('/', home)
+    app.router.add_get('/api/status', status)
+    app.router.add_post('/api/chat', chat_endpoint)
+    app.router.add_post('/api/chat/stream', chat_stream_endpoint)
+    app.router.add_get('/api/metrics', get_metrics)
+    app.on_cleanup.append(close_llm_client)
+    return app
+
+if __name__ == '__main__':
+    print("🚀 Iniciando servidor de IA Académica (asíncrono)...")
+    # handler_cancellation: si el cliente se desconecta se cancela la consulta y la llamada a la IA externa
+    web.run_app(create_app(), host='127.0.0.1', port=int(os.getenv('IA_SERVER_PORT', '5001')),
+                handler_cancellation=True)
@@ -0,0 +1,218 @@
+import os
+import json
+import threading
+from src.name_index import normalize_name
+
+# Presupuesto aproximado de tokens para el bloque de datos que se envía a la IA
+CONTEXT_TOKEN_BUDGET = int(os.getenv('LLM_CONTEXT_TOKEN_BUDGET', '3000'))
+
+# Filas precalculadas por carrera (las más relevantes primero); el presupuesto decide cuántas entran
+MAX_ROWS_PER_CAREER = 200
+
+DESCRIPCION_SISTEMA = {
+    "objetivo": "Sistema de predicción de riesgo académico",
+    "variables_principales": [
+        "calificaciones_anteriores (4.0-10.0)",
+        "asistencia_porcentaje (0-100%)",
+        "participacion_clase (1-5)",
+        "horas_estudio_semanal (1-25)",
+        "nivel_socioeconomico (Bajo/Medio/Alto)",
+        "rendimiento_riesgo (0=Sin riesgo, 1=En riesgo)"
+    ]
+}
+
+STUDENT_TABLE_HEADER = "nombre | carrera | semestre | promedio | asistencia | riesgo"
+CAREER_TABLE_HEADER = "carrera | total | en_riesgo | promedio_calificaciones | promedio_asistencia"
+
+def estimate_tokens(text):
+    """Estimación rápida de tokens (~4 caracteres por token)"""
+    return (len(text) + 3) // 4
+
+def _average_column(df):
+    # Mismo criterio que student.get('promedio_general', calificaciones_anteriores)
+    for column in ('promedio_general', 'calificaciones_anteriores'):
+        if column in df.columns:
+            return df[column].tolist()
+    return [0] * len(df)
+
+def format_student_rows(df):
+    """Una línea compacta por estudiante, con las columnas de STUDENT_TABLE_HEADER"""
+    return [
+        f"{nombre} {apellido} | {carrera} | {int(semestre)} | {float(promedio):.2f} | {int(asistencia)} | {int(riesgo)}"
+        for nombre, apellido, carrera, semestre, promedio, asistencia, riesgo in zip(
+            df['nombre'].tolist(), df['apellido'].tolist(), df['carrera'].tolist(),
+            df['semestre'].tolist(), _average_column(df),
+            df['asistencia_porcentaje'].tolist(), df['rendimiento_riesgo'].tolist()
+        )
+    ]
+
+def build_career_statistics(df, carreras):
+    """Estadísticas por carrera con un único groupby en lugar de filtrar por cada carrera"""
+    grouped = df.assign(_en_riesgo=(df['rendimiento_riesgo'] == 1)).groupby('carrera', sort=False).agg(
+        total=('carrera', 'size'),
+        en_riesgo=('_en_riesgo', 'sum'),
+        promedio_calificaciones=('calificaciones_anteriores', 'mean'),
+        promedio_asistencia=('asistencia_porcentaje', 'mean')
+    ).reindex(carreras)
+    
+    return {
+        carrera: {
+            "total": int(row.total),
+            "en_riesgo": int(row.en_riesgo),
+            "promedio_calificaciones": float(row.promedio_calificaciones),
+            "promedio_asistencia": float(row.promedio_asistencia)
+        }
+        for carrera, row in zip(carreras, grouped.itertuples(index=False))
+    }
+
+def format_career_table(career_stats):
+    """Tabla compacta de estadísticas por carrera"""
+    rows = [
+        f"{carrera} | {values['total']} | {values['en_riesgo']} | "
+        f"{values['promedio_calificaciones']:.2f} | {values['promedio_asistencia']:.1f}"
+        for carrera, values in career_stats.items()
+    ]
+    return "\n".join([CAREER_TABLE_HEADER] + rows)
+
+def build_academic_context(df, stats):
+    """Secciones del contexto académico que solo dependen de los datos (ya serializadas)"""
+    carreras = list(stats['carreras'])
+    contexto = {
+        "total_estudiantes": len(df),
+        "estudiantes_en_riesgo": int((df['rendimiento_riesgo'] == 1).sum()),
+        "promedio_general": float(stats['promedio_general']),
+        "promedio_asistencia": float(stats['promedio_asistencia']),
+        "carreras": carreras,
+        "descripcion_sistema": DESCRIPCION_SISTEMA
+    }
+    snapshot = {
+        'contexto': contexto,
+        'resumen': json.dumps(contexto, ensure_ascii=False),
+        'tabla_carreras': '',
+        'filas_muestra': [],
+        'filas_por_carrera': {},
+        'carreras_normalizadas': {normalize_name(carrera): carrera for carrera in carreras}
+    }
+    
+    try:
+        snapshot['tabla_carreras'] = format_career_table(build_career_statistics(df, carreras))
+        
+        # Muestra representativa para consultas generales (aleatoria pero reproducible)
+        snapshot['filas_muestra'] = format_student_rows(df.sample(n=min(50, len(df)), random_state=42))
+        
+        # Por carrera: primero los estudiantes en riesgo y, dentro de cada grupo, los de menor promedio
+        ranked = df.assign(_promedio=_average_column(df)).sort_values(
+            ['rendimiento_riesgo', '_promedio'], ascending=[False, True], kind='stable'
+        )
+        top_rows = ranked.groupby('carrera', sort=False).head(MAX_ROWS_PER_CAREER)
+        for carrera, group in top_rows.groupby('carrera', sort=False):
+            snapshot['filas_por_carrera'][carrera] = format_student_rows(group)
+    except Exception as e:
+        print(f"Error preparando el contexto académico: {e}")
+    
+    return snapshot
+
+class PromptContextBuilder:
+    """Acumula secciones de texto para el prompt sin pasarse del presupuesto de tokens"""
+    
+    def __init__(self, token_budget):
+        self.token_budget = token_budget
+        self.used_tokens = 0
+        self.sections = []
+        self.omitted = {}
+    
+    def add(self, name, text, required=False):
+        """Agrega una sección completa si cabe (o siempre, si es obligatoria)"""
+        tokens = estimate_tokens(text) + 1
+        if not required and self.used_tokens + tokens > self.token_budget:
+            self.omitted[name] = 'sección completa'
+            return False
+        self.sections.append(text)
+        self.used_tokens += tokens
+        return True
+    
+    def add_rows(self, name, title, rows, header=None):
+        """Agrega filas de una tabla mientras quepan; devuelve cuántas entraron"""
+        lines = [title] + ([header] if header else [])
+        used = self.used_tokens + sum(estimate_tokens(line) + 1 for line in lines)
+        for row in rows:
+            tokens = estimate_tokens(row) + 1
+            if used + tokens > self.token_budget:
+                break
+            lines.append(row)
+            used += tokens
+        
+        count = len(lines) - (2 if header else 1)
+        if count < len(rows):
+            self.omitted[name] = f"{len(rows) - count} filas"
+        if count > 0:
+            self.sections.append("\n".join(lines))
+            self.used_tokens = used
+        return count
+    
+    def text(self):
+        return "\n\n".join(self.sections)
+
+def mentioned_careers(snapshot, prompt):
+    """Carreras nombradas en la consulta"""
+    text = normalize_name(prompt)
+    return [carrera for key, carrera in snapshot['carreras_normalizadas'].items() if key and key in text]
+
+def build_prompt_context(snapshot, prompt, students=None, token_budget=None):
+    """Arma el bloque de datos de una consulta dentro del presupuesto de tokens.
+    
+    Orden de prioridad: resumen general (siempre), estudiantes mencionados,
+    tabla por carrera y, con el espacio que quede, filas de las carreras
+    nombradas en la consulta o, si no se nombra ninguna, la muestra general.
+    Devuelve (texto, métricas) para poder registrar el tamaño del prompt.
+    """
+    builder = PromptContextBuilder(CONTEXT_TOKEN_BUDGET if token_budget is None else token_budget)
+    builder.add('resumen', f"RESUMEN GENERAL:\n{snapshot['resumen']}", required=True)
+    
+    if students:
+        rows = [json.dumps(student, ensure_ascii=False, default=str) for student in students]
+        builder.add_rows('estudiantes_consultados', "ESTUDIANTES CONSULTADOS:", rows)
+    
+    if snapshot['tabla_carreras']:
+        builder.add('estadisticas_por_carrera', f"ESTADÍSTICAS POR CARRERA:\n{snapshot['tabla_carreras']}")
+    
+    carreras = mentioned_careers(snapshot, prompt)
+    for carrera in carreras:
+        builder.add_rows(f"estudiantes_{carrera}", f"ESTUDIANTES DE {carrera.upper()} (en riesgo primero):",
+                         snapshot['filas_por_carrera'].get(carrera, []), STUDENT_TABLE_HEADER)
+    if not carreras:
+        builder.add_rows('muestra_estudiantes', "MUESTRA DE ESTUDIANTES:", snapshot['filas_muestra'],
+                         STUDENT_TABLE_HEADER)
+    
+    text = builder.text()
+    metrics = {
+        'tokens_estimados': builder.used_tokens,
+        'presupuesto': builder.token_budget,
+        'caracteres': len(text),
+        'omitidos': builder.omitted
+    }
+    return text, metrics
+
+class AcademicContextCache:
+    """Guarda las secciones del contexto académico de la versión actual del dataset.
+    
+    Todo lo que solo depende de los datos (resumen, tablas y filas
+    candidatas) se calcula y serializa una vez por versión; en cada consulta
+    solo se eligen las secciones que entran en el presupuesto de tokens.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._snapshot = None
+    
+    def get(self, df, data_version, get_statistics):
+        """Devuelve las secciones precalculadas; `get_statistics` solo se llama al reconstruir"""
+        with self._lock:
+            if self._snapshot is None or data_version != self._version:
+                self._snapshot = build_academic_context(df, get_statistics())
+                self._version = data_version
+            return self._snapshot
+
+# Instancia global de la caché del contexto académico
+academic_context_cache = AcademicContextCache()
@@ -2,11 +2,16 @@ import pandas as pd
 from datetime import datetime, timedelta
 import json
 import os
+import threading
+from src.notification_queue import create_dispatcher_from_env
 
 class AlertSystem:
     def __init__(self):
         self.alerts_file = 'data/alerts.json'
+        self._lock = threading.RLock()
+        self.notifier = None
         self.alerts = self.load_alerts()
+        self._rebuild_index()
         self.alert_types = {
             'BAJO_RENDIMIENTO': 'Bajo Rendimiento Académico',
             'BAJA_ASISTENCIA': 'Baja Asistencia',
@@ -34,15 +39,40 @@ class AlertSystem:
             # Crear directorio si no existe
             os.makedirs(os.path.dirname(self.alerts_file), exist_ok=True)
             
-            with open(self.alerts_file, 'w', encoding='utf-8') as f:
+            # Escribir en un archivo temporal y reemplazar, para que una
+            # actualización masiva quede persistida de forma atómica
+            tmp_file = f"{self.alerts_file}.tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
                 json.dump(self.alerts, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_file, self.alerts_file)
         except Exception as e:
             print(f"Error guardando alertas: {e}")
     
+    def _rebuild_index(self):
+        """Reconstruye el índice id -> alerta y el contador de ids"""
+        self._alerts_by_id = {alert['id']: alert for alert in self.alerts}
+        # El contador nunca retrocede: aunque se eliminen alertas no se reutilizan ids
+        self._next_id = max(self._alerts_by_id, default=0) + 1
+    
+    def _allocate_id(self):
+        """Asigna un id nuevo, único y creciente"""
+        with self._lock:
+            alert_id = self._next_id
+            self._next_id += 1
+            return alert_id
+    
+    def set_notifier(self, notifier):
+        """Asigna la cola de notificaciones usada al crear alertas"""
+        self.notifier = notifier
+    
+    def get_alert(self, alert_id):
+        """Obtiene una alerta por su id"""
+        return self._alerts_by_id.get(alert_id)
+    
     def create_alert(self, alert_type, student_id, student_name, message, priority='MEDIUM'):
         """Crea una nueva alerta"""
         alert = {
-            'id': len(self.alerts) + 1,
+            'id': self._allocate_id(),
             'type': alert_type,
             'type_name': self.alert_types.get(alert_type, alert_type),
             'student_id': student_id,
@@ -54,8 +84,14 @@ class AlertSystem:
             'resolved': False
         }
         
-        self.alerts.append(alert)
-        self.save_alerts()
+        with self._lock:
+            self.alerts.append(alert)
+            self._alerts_by_id[alert['id']] = alert
+            self.save_alerts()
+        
+        # La entrega del correo ocurre en segundo plano
+        if self.notifier is not None:
+            self.notifier.enqueue(alert)
         
         return alert
     
@@ -168,22 +204,43 @@ class AlertSystem:
     
     def mark_alert_read(self, alert_id):
         """Marca una alerta como leída"""
-        for alert in self.alerts:
-            if alert['id'] == alert_id:
-                alert['read'] = True
-                self.save_alerts()
-                return True
-        return False
+        return self.mark_alerts_read([alert_id]) > 0
     
     def mark_alert_resolved(self, alert_id):
         """Marca una alerta como resuelta"""
-        for alert in self.alerts:
-            if alert['id'] == alert_id:
-                alert['resolved'] = True
-                alert['read'] = True
+        return self.mark_alerts_resolved([alert_id]) > 0
+    
+    def mark_alerts_read(self, alert_ids):
+        """Marca varias alertas como leídas guardando el archivo una sola vez"""
+        return self._bulk_update(alert_ids, {'read': True})
+    
+    def mark_alerts_resolved(self, alert_ids):
+        """Marca varias alertas como resueltas guardando el archivo una sola vez"""
+        return self._bulk_update(alert_ids, {'resolved': True, 'read': True})
+    
+    def mark_all_read(self):
+        """Marca todas las alertas no leídas como leídas"""
+        return self.mark_alerts_read([alert['id'] for alert in self.get_unread_alerts()])
+    
+    def mark_all_resolved(self):
+        """Marca todas las alertas pendientes como resueltas"""
+        return self.mark_alerts_resolved([alert['id'] for alert in self.alerts if not alert['resolved']])
+    
+    def _bulk_update(self, alert_ids, changes):
+        """Aplica los cambios a las alertas indicadas en una única transacción"""
+        updated = 0
+        with self._lock:
+            for alert_id in alert_ids:
+                alert = self._alerts_by_id.get(alert_id)
+                if alert is None:
+                    continue
+                alert.update(changes)
+                updated += 1
+            
+            if updated:
                 self.save_alerts()
-                return True
-        return False
+        
+        return updated
     
     def get_alert_statistics(self):
         """Obtiene estadísticas de alertas"""
@@ -245,6 +302,12 @@ class AlertSystem:
             'sent': True
         }
         
+        # Con una cola de notificaciones, create_alert ya encoló la alerta para el correo resumen
+        if self.notifier is not None:
+            email_content['sent'] = False
+            email_content['queued'] = True
+            return email_content
+        
         # En un sistema real, aquí se enviaría el email
         print(f"📧 Email simulado enviado: {email_content['subject']}")
         
@@ -303,3 +366,4 @@ class AlertSystem:
 
 # Instancia global del sistema de alertas
 alert_system = AlertSystem()
+alert_system.set_notifier(create_dispatcher_from_env())
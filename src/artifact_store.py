@@ -0,0 +1,196 @@
+import os
+import io
+import re
+import shutil
+import time
+import threading
+from collections import OrderedDict
+
+_SAFE_NAME = re.compile(r'^[A-Za-z0-9][A-Za-z0-9_.\-]{0,200}$')
+
+def is_safe_name(name):
+    """Solo se aceptan nombres simples (sin rutas) para los artefactos"""
+    return bool(name) and bool(_SAFE_NAME.match(name)) and '..' not in name
+
+class MemoryArtifactStore:
+    """Almacén en memoria del proceso, con expiración y límite de bytes.
+    
+    Útil en desarrollo con un solo proceso; con varios workers de gunicorn
+    se debe usar DiskArtifactStore.
+    """
+    
+    def __init__(self, ttl_seconds=3600, max_bytes=128 * 1024 * 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._items = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+    
+    def put(self, name, data):
+        if not is_safe_name(name):
+            raise ValueError(f"Nombre de artefacto no válido: {name}")
+        
+        with self._lock:
+            self._remove(name)
+            self._items[name] = (data, time.time())
+            self._total_bytes += len(data)
+            self._cleanup_locked()
+        return name
+    
+    def put_file(self, name, source_path):
+        """Incorpora un archivo ya generado en disco (se elimina el original)"""
+        with open(source_path, 'rb') as f:
+            data = f.read()
+        self.put(name, data)
+        os.remove(source_path)
+        return name
+    
+    def open(self, name):
+        """Devuelve un archivo binario con el contenido o None si no existe o expiró"""
+        with self._lock:
+            self._cleanup_locked()
+            item = self._items.get(name)
+            return io.BytesIO(item[0]) if item else None
+    
+    def delete(self, name):
+        with self._lock:
+            self._remove(name)
+    
+    def cleanup(self):
+        with self._lock:
+            self._cleanup_locked()
+    
+    def _remove(self, name):
+        item = self._items.pop(name, None)
+        if item is not None:
+            self._total_bytes -= len(item[0])
+    
+    def _cleanup_locked(self):
+        cutoff = time.time() - self.ttl_seconds
+        for name in [n for n, (_, created) in self._items.items() if created < cutoff]:
+            self._remove(name)
+        
+        # Expulsar los más antiguos si se supera el presupuesto
+        while self._total_bytes > self.max_bytes and self._items:
+            self._remove(next(iter(self._items)))
+
+class DiskArtifactStore:
+    """Almacén de artefactos en un directorio compartido entre procesos.
+    
+    Cada artefacto es un archivo dentro de `spool_dir`; la antigüedad se
+    toma de la fecha de modificación, así que cualquier worker puede servir
+    o limpiar lo que escribió otro. Los archivos vencidos (TTL) se borran y,
+    si el directorio supera `max_bytes`, se eliminan los más antiguos.
+    """
+    
+    def __init__(self, spool_dir='reportes/spool', ttl_seconds=3600, max_bytes=512 * 1024 * 1024):
+        self.spool_dir = spool_dir
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        os.makedirs(self.spool_dir, exist_ok=True)
+    
+    def _path(self, name):
+        if not is_safe_name(name):
+            raise ValueError(f"Nombre de artefacto no válido: {name}")
+        return os.path.join(self.spool_dir, name)
+    
+    def put(self, name, data):
+        path = self._path(name)
+        # Escritura atómica: otro worker nunca ve un archivo a medio escribir
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        
+        self.cleanup()
+        return name
+    
+    def put_file(self, name, source_path):
+        """Mueve al almacén un archivo ya generado en disco sin cargarlo en memoria"""
+        path = self._path(name)
+        # shutil.move recurre a copiar si el origen está en otro sistema de archivos
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        shutil.move(source_path, tmp_path)
+        os.replace(tmp_path, path)
+        
+        self.cleanup()
+        return name
+    
+    def get_path(self, name):
+        """Ruta del artefacto o None si no existe o ya expiró"""
+        try:
+            path = self._path(name)
+            if time.time() - os.path.getmtime(path) > self.ttl_seconds:
+                self.delete(name)
+                return None
+            return path
+        except (OSError, ValueError):
+            return None
+    
+    def open(self, name):
+        """Devuelve el archivo abierto en modo binario o None"""
+        path = self.get_path(name)
+        if path is None:
+            return None
+        try:
+            return open(path, 'rb')
+        except OSError:
+            return None
+    
+    def delete(self, name):
+        try:
+            os.remove(self._path(name))
+        except (OSError, ValueError):
+            pass
+    
+    def cleanup(self):
+        """Elimina artefactos vencidos y aplica el límite de bytes"""
+        now = time.time()
+        entries = []
+        try:
+            with os.scandir(self.spool_dir) as it:
+                for entry in it:
+                    if not entry.is_file() or entry.name.endswith('.tmp'):
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    if now - stat.st_mtime > self.ttl_seconds:
+                        self._unlink(entry.path)
+                    else:
+                        entries.append((stat.st_mtime, stat.st_size, entry.path))
+        except OSError as e:
+            print(f"Error limpiando almacén de artefactos: {e}")
+            return
+        
+        total_bytes = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_bytes <= self.max_bytes:
+                break
+            self._unlink(path)
+            total_bytes -= size
+    
+    @staticmethod
+    def _unlink(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+def create_artifact_store_from_env():
+    """Crea el almacén configurado por ARTIFACT_STORE (disk por defecto o memory)"""
+    ttl_seconds = int(os.getenv('ARTIFACT_TTL_SECONDS', '3600'))
+    max_bytes = int(os.getenv('ARTIFACT_MAX_MB', '512')) * 1024 * 1024
+    
+    if os.getenv('ARTIFACT_STORE', 'disk').strip().lower() == 'memory':
+        return MemoryArtifactStore(ttl_seconds=ttl_seconds, max_bytes=max_bytes)
+    
+    return DiskArtifactStore(
+        spool_dir=os.getenv('ARTIFACT_SPOOL_DIR', 'reportes/spool'),
+        ttl_seconds=ttl_seconds,
+        max_bytes=max_bytes
+    )
+
+# Instancia global del almacén de artefactos (PDFs generados)
+artifact_store = create_artifact_store_from_env()
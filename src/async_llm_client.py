@@ -0,0 +1,132 @@
+import os
+import asyncio
+import aiohttp
+from src.llm_client import RETRY_STATUS_CODES, parse_stream_line
+
+class AsyncLLMClient:
+    """Versión asyncio de LLMClient para el servidor asíncrono (ia_server_async.py).
+    
+    Todas las consultas en curso comparten un aiohttp.ClientSession con
+    conexiones keep-alive y esperan a la IA externa sin ocupar un hilo cada
+    una. Mantiene el comportamiento del cliente síncrono: reintentos con
+    backoff exponencial ante fallos de conexión y respuestas 429/5xx
+    (respetando Retry-After) y un límite de llamadas simultáneas, aquí con
+    un asyncio.Semaphore. Si la consulta se cancela (el cliente se
+    desconecta o vence el tiempo límite) la conexión se libera junto con su
+    cupo de concurrencia.
+    """
+    
+    def __init__(self, base_url='https://openrouter.ai/api/v1', max_retries=2, backoff_factor=0.5,
+                 max_concurrency=4, connect_timeout=5, read_timeout=30, acquire_timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_concurrency = max_concurrency
+        self.acquire_timeout = acquire_timeout
+        self.timeout = aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._session = None
+        self.stats = {'requests': 0, 'errors': 0, 'rejected': 0, 'cancelled': 0}
+    
+    def _get_session(self):
+        # Se crea dentro del event loop del servidor, en la primera consulta
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        return self._session
+    
+    async def _acquire(self):
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.acquire_timeout)
+        except asyncio.TimeoutError:
+            self.stats['rejected'] += 1
+            raise TimeoutError("Demasiadas consultas simultáneas a la IA externa")
+    
+    def _retry_delay(self, attempt, response=None):
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+        return self.backoff_factor * (2 ** attempt)
+    
+    async def _send(self, path, api_key, payload):
+        """POST JSON con reintentos; devuelve la respuesta sin leer (hay que liberarla)"""
+        self.stats['requests'] += 1
+        headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
+        }
+        
+        # Sin reintentos de lectura: una generación que ya empezó no se repite
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = await self._get_session().post(f"{self.base_url}{path}", headers=headers, json=payload)
+            except aiohttp.ClientConnectorError:
+                if attempt == self.max_retries:
+                    raise
+                await asyncio.sleep(self._retry_delay(attempt))
+                continue
+            
+            if response.status in RETRY_STATUS_CODES and attempt < self.max_retries:
+                response.release()
+                await asyncio.sleep(self._retry_delay(attempt, response))
+                continue
+            return response
+    
+    async def chat_completion(self, api_key, payload):
+        """Llama a /chat/completions y devuelve el JSON de la respuesta"""
+        await self._acquire()
+        response = None
+        try:
+            response = await self._send('/chat/completions', api_key, payload)
+            if response.status != 200:
+                raise Exception(f"Error de API: {response.status} - {await response.text()}")
+            return await response.json(content_type=None)
+        except asyncio.CancelledError:
+            self.stats['cancelled'] += 1
+            raise
+        except Exception:
+            self.stats['errors'] += 1
+            raise
+        finally:
+            if response is not None:
+                response.release()
+            self._semaphore.release()
+    
+    async def stream_chat_completion(self, api_key, payload):
+        """Generador asíncrono con los fragmentos de texto de una completion en streaming (SSE)"""
+        await self._acquire()
+        response = None
+        try:
+            response = await self._send('/chat/completions', api_key, dict(payload, stream=True))
+            if response.status != 200:
+                raise Exception(f"Error de API: {response.status} - {await response.text()}")
+            
+            async for line in response.content:
+                text = parse_stream_line(line.decode('utf-8').strip())
+                if text is None:
+                    break
+                if text:
+                    yield text
+        except (asyncio.CancelledError, GeneratorExit):
+            self.stats['cancelled'] += 1
+            raise
+        except Exception:
+            self.stats['errors'] += 1
+            raise
+        finally:
+            if response is not None:
+                response.release()
+            self._semaphore.release()
+    
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+# Instancia global del cliente asíncrono de la IA externa (mismas variables de entorno que llm_client)
+async_llm_client = AsyncLLMClient(
+    base_url=os.getenv('OPENROUTER_BASE_URL', 'https://openrouter.ai/api/v1'),
+    max_retries=int(os.getenv('LLM_MAX_RETRIES', '2')),
+    max_concurrency=int(os.getenv('LLM_MAX_CONCURRENCY', '4')),
+    read_timeout=float(os.getenv('LLM_TIMEOUT', '30'))
+)
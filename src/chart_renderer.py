@@ -0,0 +1,159 @@
+import os
+import json
+import hashlib
+import threading
+from functools import lru_cache
+
+@lru_cache(maxsize=1)
+def _get_figure_class():
+    """Importa matplotlib (backend Agg) solo cuando se renderiza el primer gráfico.
+    
+    Se usa la API de objetos (Figure) en lugar de pyplot: no mantiene estado
+    global, así que es segura desde los hilos del servidor.
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    from matplotlib.figure import Figure
+    return Figure
+
+def _json_default(value):
+    # Escalares de numpy/pandas -> tipos nativos para que la clave sea estable
+    return value.item() if hasattr(value, 'item') else str(value)
+
+def _draw_radar(fig, spec):
+    import numpy as np
+    categories = spec['categories']
+    values = [float(v) for v in spec['values']]
+    angles = np.linspace(0, 2 * np.pi, len(categories), endpoint=False).tolist()
+    
+    ax = fig.add_subplot(111, projection='polar')
+    ax.plot(angles + angles[:1], values + values[:1], color='#3498db', linewidth=2)
+    ax.fill(angles + angles[:1], values + values[:1], color='#3498db', alpha=0.25)
+    ax.set_xticks(angles)
+    ax.set_xticklabels(categories, fontsize=8)
+    ax.set_ylim(0, 10)
+    ax.tick_params(axis='y', labelsize=7)
+    ax.set_title(spec['title'], fontsize=10, pad=15)
+    fig.subplots_adjust(left=0.1, right=0.9, top=0.8, bottom=0.08)
+
+def _draw_notas(fig, spec):
+    notas = [float(n) for n in spec['notas']]
+    ax = fig.add_subplot(111)
+    colores = ['#e74c3c' if nota < 6 else '#2ecc71' for nota in notas]
+    ax.bar(spec['materias'], notas, color=colores)
+    ax.axhline(6, color='#7f8c8d', linestyle='--', linewidth=1)
+    ax.set_ylim(0, 10)
+    ax.tick_params(axis='x', labelsize=8)
+    ax.set_title(spec['title'], fontsize=10)
+    fig.subplots_adjust(left=0.1, right=0.95, top=0.88, bottom=0.12)
+
+def _draw_creditos(fig, spec):
+    ax = fig.add_subplot(111)
+    aprobados, pendientes = max(float(spec['aprobados']), 0), max(float(spec['pendientes']), 0)
+    ax.pie([aprobados, pendientes] if aprobados + pendientes > 0 else [0, 1],
+           colors=['#2ecc71', '#ecf0f1'], startangle=90, counterclock=False,
+           wedgeprops={'width': 0.35})
+    ax.text(0, 0, f"{spec['porcentaje']}%", ha='center', va='center', fontsize=14, fontweight='bold')
+    ax.set_title(spec['title'], fontsize=10)
+
+CHART_DRAWERS = {
+    'radar': _draw_radar,
+    'notas_materias': _draw_notas,
+    'progreso_creditos': _draw_creditos
+}
+
+class ChartRenderer:
+    """Renderiza a PNG las especificaciones de gráficos de los reportes.
+    
+    Cada imagen se guarda en `cache_dir` con un nombre derivado de
+    (estudiante, versión de datos, gráfico, especificación); mientras los
+    datos no cambien, los reportes individuales, por cohorte y el general
+    reutilizan el mismo archivo sin volver a dibujar. Las escrituras son
+    atómicas, así que varios procesos pueden compartir el directorio.
+    """
+    
+    def __init__(self, cache_dir='reportes/charts', dpi=100, figsize=(4, 3), max_bytes=256 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.dpi = dpi
+        self.figsize = figsize
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._renders_since_cleanup = 0
+        self.stats = {'hits': 0, 'renders': 0, 'errors': 0}
+    
+    @staticmethod
+    def cache_key(student_id, data_version, chart_name, spec):
+        payload = json.dumps([student_id, data_version, chart_name, spec], sort_keys=True, default=_json_default)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]
+    
+    def render(self, chart_name, spec, student_id=None, data_version=None):
+        """Devuelve la ruta del PNG del gráfico, renderizándolo solo si no está en caché"""
+        path = os.path.join(self.cache_dir, f"{self.cache_key(student_id, data_version, chart_name, spec)}.png")
+        if os.path.exists(path):
+            self._count('hits')
+            return path
+        
+        os.makedirs(self.cache_dir, exist_ok=True)
+        Figure = _get_figure_class()
+        fig = Figure(figsize=self.figsize, dpi=self.dpi)
+        CHART_DRAWERS[chart_name](fig, spec)
+        
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        fig.savefig(tmp_path, format='png', dpi=self.dpi)
+        os.replace(tmp_path, path)
+        
+        self._count('renders')
+        with self._lock:
+            self._renders_since_cleanup += 1
+            cleanup_due = self._renders_since_cleanup >= 100
+            if cleanup_due:
+                self._renders_since_cleanup = 0
+        if cleanup_due:
+            self.cleanup()
+        return path
+    
+    def render_student_charts(self, report, data_version=None):
+        """Renderiza los gráficos del reporte individual: {nombre: ruta PNG}"""
+        student_id = report['student_info']['id']
+        images = {}
+        for chart_name, spec in report.get('charts', {}).items():
+            if chart_name not in CHART_DRAWERS:
+                continue
+            try:
+                images[chart_name] = self.render(chart_name, spec, student_id, data_version)
+            except Exception as e:
+                self._count('errors')
+                print(f"Error renderizando gráfico {chart_name} del estudiante {student_id}: {e}")
+        return images
+    
+    def cleanup(self):
+        """Elimina las imágenes más antiguas si la caché supera `max_bytes`"""
+        entries = []
+        try:
+            with os.scandir(self.cache_dir) as it:
+                for entry in it:
+                    if entry.is_file() and entry.name.endswith('.png'):
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime, stat.st_size, entry.path))
+        except OSError:
+            return
+        
+        total_bytes = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total_bytes -= size
+    
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+# Instancia global del renderizador de gráficos
+chart_renderer = ChartRenderer(
+    cache_dir=os.getenv('CHART_CACHE_DIR', 'reportes/charts'),
+    max_bytes=int(os.getenv('CHART_CACHE_MB', '256')) * 1024 * 1024
+)
@@ -0,0 +1,117 @@
+import os
+import zipfile
+import pandas as pd
+from collections import deque
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+
+def select_cohort(students_df, carrera=None, only_at_risk=True):
+    """Filtra los estudiantes de la cohorte (por carrera y, opcionalmente, solo en riesgo)"""
+    mask = pd.Series(True, index=students_df.index)
+    if only_at_risk:
+        mask &= students_df['rendimiento_riesgo'] == 1
+    if carrera:
+        mask &= students_df['carrera'] == carrera
+    return students_df[mask]
+
+def iter_student_records(students_df):
+    """Recorre los estudiantes como diccionarios sin materializar la lista completa"""
+    columns = list(students_df.columns)
+    for values in students_df.itertuples(index=False, name=None):
+        yield dict(zip(columns, values))
+
+def _build_student_report(student_data, data_version=None):
+    """Genera el diccionario del reporte individual dentro de un proceso del pool"""
+    from src.report_generator import report_generator
+    report = report_generator.generate_student_report(student_data)
+    # Los gráficos se rasterizan aquí, en paralelo; el proceso principal solo maqueta
+    report['chart_images'] = report_generator.render_student_charts(report, data_version)
+    return report
+
+def _render_student_pdf(student_data, data_version=None):
+    """Genera el reporte individual y su PDF dentro de un proceso del pool"""
+    from src.report_generator import report_generator, student_pdf_filename
+    report = report_generator.generate_student_report(student_data)
+    charts = report_generator.render_student_charts(report, data_version)
+    return student_pdf_filename(report), report_generator.create_student_pdf(report, charts)
+
+class CohortReportBuilder:
+    """Genera los reportes individuales de toda una cohorte en paralelo.
+    
+    Los estudiantes se reparten entre `max_workers` procesos, pero nunca hay
+    más de `max_in_flight` reportes pendientes. La salida puede ser un ZIP con
+    un PDF por estudiante (cada PDF se escribe en el ZIP en cuanto llega) o un
+    único PDF con todos los reportes seguidos, que se escribe en disco por
+    segmentos de páginas; en ambos casos la memoria no crece con el tamaño de
+    la cohorte.
+    """
+    
+    def __init__(self, max_workers=2, max_in_flight=None):
+        self.max_workers = max_workers
+        self.max_in_flight = max_in_flight or max_workers * 4
+    
+    def _map_bounded(self, fn, records):
+        """Aplica `fn` en el pool manteniendo el orden y una ventana acotada de trabajos"""
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            in_flight = deque()
+            for record in records:
+                in_flight.append(executor.submit(fn, record))
+                if len(in_flight) >= self.max_in_flight:
+                    yield in_flight.popleft()
+            while in_flight:
+                yield in_flight.popleft()
+    
+    def build_zip(self, students_df, output_path, data_version=None):
+        """Escribe un ZIP con un PDF por estudiante y devuelve un resumen"""
+        tmp_path = f"{output_path}.{os.getpid()}.tmp"
+        count, errors = 0, []
+        
+        with zipfile.ZipFile(tmp_path, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+            render = partial(_render_student_pdf, data_version=data_version)
+            for future in self._map_bounded(render, iter_student_records(students_df)):
+                try:
+                    filename, pdf_bytes = future.result()
+                except Exception as e:
+                    errors.append(str(e))
+                    continue
+                zf.writestr(filename, pdf_bytes)
+                count += 1
+        
+        os.replace(tmp_path, output_path)
+        return {'path': output_path, 'count': count, 'errors': errors}
+    
+    def build_merged_pdf(self, students_df, output_path, data_version=None):
+        """Escribe un único PDF con el reporte de cada estudiante empezando en página nueva.
+        
+        Los diccionarios de reporte se calculan en el pool y se van maquetando
+        a medida que llegan; cada segmento de páginas completo se escribe en el
+        archivo y se libera (ver IncrementalPDFWriter).
+        """
+        from src.pdf_stream import IncrementalPDFWriter
+        from src.report_generator import report_generator
+        
+        tmp_path = f"{output_path}.{os.getpid()}.tmp"
+        count, errors = 0, []
+        writer = IncrementalPDFWriter(tmp_path, title="Reportes individuales de la cohorte")
+        
+        build = partial(_build_student_report, data_version=data_version)
+        for future in self._map_bounded(build, iter_student_records(students_df)):
+            try:
+                report = future.result()
+                story = report_generator.build_student_story(report, report.get('chart_images'))
+            except Exception as e:
+                errors.append(str(e))
+                continue
+            
+            writer.footer = report['student_info']['nombre_completo']
+            writer.add(story)
+            writer.new_page()
+            count += 1
+        
+        writer.close()
+        errors.extend(writer.errors)
+        os.replace(tmp_path, output_path)
+        return {'path': output_path, 'count': count, 'errors': errors}
+
+# Instancia global del generador de reportes por cohorte
+cohort_reports = CohortReportBuilder(max_workers=int(os.getenv('REPORT_WORKERS', '2')))
@@ -0,0 +1,136 @@
+import os
+import re
+import time
+import threading
+from collections import OrderedDict
+
+SENTENCE_END = re.compile(r'(?<=[.!?])\s')
+# Preguntas que se apoyan en la anterior: empiezan con "y", "pero", "entonces"... o se refieren
+# a lo ya mencionado con pronombres y demostrativos ("¿cuántos de ellos...?", "su promedio")
+FOLLOW_UP_START = re.compile(r'^[¿¡\s]*(y|e|pero|entonces|tambi[eé]n|ahora|adem[aá]s)\b', re.IGNORECASE)
+FOLLOW_UP_REFERENCE = re.compile(r'\b(él|ella|ellos|ellas|su|sus|ese|esa|esos|esas|estos|estas|aquel\w*|'
+                                 r'mism[oa]s?|anterior(?:es)?|dich[oa]s?|'
+                                 r'est[ea] (?:carrera|estudiante|alumn[oa]|grupo|semestre))\b', re.IGNORECASE)
+
+def shorten(text, max_chars):
+    """Recorta `text` a `max_chars` caracteres (sin cortar palabras si se puede)"""
+    text = ' '.join(str(text).split())
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars - 1].rsplit(' ', 1)[0] or text[:max_chars - 1]
+    return cut + '…'
+
+def first_sentence(text):
+    return SENTENCE_END.split(' '.join(str(text).split()), 1)[0]
+
+def is_follow_up(prompt):
+    """Si la pregunta no tiene sujeto propio y depende de la conversación anterior"""
+    return bool(FOLLOW_UP_START.search(prompt) or FOLLOW_UP_REFERENCE.search(prompt))
+
+class ConversationStore:
+    """Historial de conversación del chat por sesión, con tamaño acotado.
+    
+    Cada sesión guarda sus últimos `max_turns` intercambios (pregunta y
+    respuesta, esta recortada a `max_answer_chars`). Los intercambios más
+    antiguos se condensan en un resumen extractivo (la pregunta y la primera
+    oración de la respuesta) de a lo sumo `summary_max_chars` caracteres, de
+    modo que lo que se reenvía a la IA externa en una pregunta de seguimiento
+    no crece con la longitud de la conversación. Las sesiones inactivas
+    vencen a los `ttl_seconds` y, si hay más de `max_sessions`, se descartan
+    las usadas hace más tiempo.
+    """
+    
+    def __init__(self, max_turns=4, max_answer_chars=1200, summary_max_chars=800, max_sessions=500,
+                 ttl_seconds=3600, enabled=True):
+        self.max_turns = max_turns
+        self.max_answer_chars = max_answer_chars
+        self.summary_max_chars = summary_max_chars
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._sessions = OrderedDict()
+        self.stats = {'turns': 0, 'summarized': 0, 'expired': 0, 'evicted': 0}
+    
+    def _expire(self, now):
+        # OrderedDict en orden de uso: las sesiones vencidas están al principio
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if now - session['updated_at'] <= self.ttl_seconds:
+                break
+            del self._sessions[session_id]
+            self.stats['expired'] += 1
+    
+    def _summarize(self, session, question, answer):
+        """Agrega el intercambio al resumen, descartando las líneas más antiguas si se excede el límite"""
+        lines = session['summary']
+        lines.append(f"- Preguntó: «{shorten(question, 120)}» → {shorten(first_sentence(answer), 160)}")
+        while len(lines) > 1 and sum(len(line) + 1 for line in lines) > self.summary_max_chars:
+            lines.pop(0)
+        self.stats['summarized'] += 1
+    
+    def get(self, session_id):
+        """Historial de la sesión: {'resumen': str, 'turnos': [(pregunta, respuesta), ...]}; None si no hay"""
+        if not self.enabled or not session_id:
+            return None
+        
+        with self._lock:
+            self._expire(time.monotonic())
+            session = self._sessions.get(session_id)
+            if session is None or not (session['turns'] or session['summary']):
+                return None
+            return {'resumen': '\n'.join(session['summary']), 'turnos': list(session['turns'])}
+    
+    def add_turn(self, session_id, question, answer):
+        """Registra un intercambio de la sesión (las respuestas locales y de caché también cuentan)"""
+        if not self.enabled or not session_id or not answer:
+            return
+        
+        with self._lock:
+            now = time.monotonic()
+            self._expire(now)
+            session = self._sessions.pop(session_id, None) or {'turns': [], 'summary': []}
+            session['turns'].append((shorten(question, self.max_answer_chars),
+                                     shorten(answer, self.max_answer_chars)))
+            while len(session['turns']) > self.max_turns:
+                self._summarize(session, *session['turns'].pop(0))
+            session['updated_at'] = now
+            self._sessions[session_id] = session
+            self.stats['turns'] += 1
+            
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.stats['evicted'] += 1
+    
+    @staticmethod
+    def to_messages(history):
+        """Mensajes de OpenRouter (resumen + últimos intercambios) para anteponer a la consulta"""
+        if not history:
+            return []
+        
+        messages = []
+        if history['resumen']:
+            messages.append({"role": "system",
+                             "content": f"Resumen de la conversación anterior con este usuario:\n{history['resumen']}"})
+        for question, answer in history['turnos']:
+            messages.append({"role": "user", "content": question})
+            messages.append({"role": "assistant", "content": answer})
+        return messages
+    
+    def get_stats(self):
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'sessions': len(self._sessions),
+                'max_turns': self.max_turns,
+                **self.stats
+            }
+
+# Instancia global del historial de conversación del chat
+conversation_store = ConversationStore(
+    max_turns=int(os.getenv('CHAT_HISTORY_TURNS', '4')),
+    summary_max_chars=int(os.getenv('CHAT_HISTORY_SUMMARY_CHARS', '800')),
+    max_sessions=int(os.getenv('CHAT_HISTORY_MAX_SESSIONS', '500')),
+    ttl_seconds=int(os.getenv('CHAT_HISTORY_TTL', '3600')),
+    enabled=os.getenv('CHAT_HISTORY', '1') == '1'
+)
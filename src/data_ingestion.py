@@ -0,0 +1,194 @@
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import pandas as pd
+from src.data_processor import data_processor, REQUIRED_FIELDS
+from src.schema_validator import schema_validator
+
+# Bloque del archivo subido que se copia a disco de una vez
+COPY_BLOCK_BYTES = 4 * 1024 * 1024
+# Errores de validación que se muestran como máximo al terminar la importación
+MAX_REPORTED_ERRORS = 20
+
+def copy_upload(stream, output_path, block_bytes=COPY_BLOCK_BYTES):
+    """Copia el cuerpo de la petición de subida a un archivo por bloques; devuelve los bytes escritos"""
+    with open(output_path, 'wb') as output:
+        shutil.copyfileobj(stream, output, block_bytes)
+        return output.tell()
+
+def iter_csv_chunks(path, chunk_rows):
+    """Bloques de `chunk_rows` filas del CSV y la fracción del archivo ya leída"""
+    size = os.path.getsize(path) or 1
+    with open(path, 'rb') as handle:
+        for chunk in pd.read_csv(handle, chunksize=chunk_rows, encoding='utf-8-sig', low_memory=False):
+            yield chunk, min(handle.tell() / size, 1.0)
+
+def iter_excel_chunks(path, chunk_rows):
+    """Bloques de filas de la primera hoja de un Excel (.xlsx en modo read_only, fila por fila)"""
+    if path.endswith('.xls'):
+        # xlrd no permite leer por partes; los .xls están limitados a 65.536 filas
+        df = pd.read_excel(path)
+        for start in range(0, len(df), chunk_rows):
+            yield df.iloc[start:start + chunk_rows], min((start + chunk_rows) / max(len(df), 1), 1.0)
+        return
+    
+    from openpyxl import load_workbook
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        sheet = workbook.active
+        rows = sheet.iter_rows(values_only=True)
+        header = [str(value) for value in next(rows, ())]
+        total_rows = max((sheet.max_row or 0) - 1, 1)
+        batch, read = [], 0
+        for row in rows:
+            if all(value is None for value in row):
+                continue
+            batch.append(row)
+            read += 1
+            if len(batch) == chunk_rows:
+                yield pd.DataFrame(batch, columns=header, index=range(read - len(batch), read)), min(read / total_rows, 1.0)
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=header, index=range(read - len(batch), read)), 1.0
+    finally:
+        workbook.close()
+
+def validate_chunk(chunk, max_errors=MAX_REPORTED_ERRORS):
+    """Máscara de filas válidas del bloque y hasta `max_errors` errores como (fila del archivo, mensaje)"""
+    codes = schema_validator.validate(chunk)
+    errors = []
+    # Los mensajes se arman solo para las primeras filas rechazadas
+    for position, code in codes[codes != 0].items():
+        if len(errors) >= max_errors:
+            break
+        errors.extend((position + 2, message) for message in schema_validator.error_messages(code))
+    return codes == 0, errors[:max_errors]
+
+class DataIngestor:
+    """Importación por bloques de archivos de estudiantes (CSV o Excel).
+    
+    La ruta de subida copia el archivo a disco por bloques y recibe un id de
+    trabajo al instante; la importación corre en un hilo aparte
+    (una a la vez, porque todas escriben en el mismo CSV) y la interfaz
+    consulta el progreso con `get_job`. Cada bloque de `chunk_rows` filas se
+    valida y sus filas válidas se agregan al CSV del dataset, de modo que la
+    memoria usada no depende del tamaño del archivo; al terminar se recarga
+    el dataset una sola vez.
+    """
+    
+    def __init__(self, chunk_rows=50000, max_jobs=20):
+        self.chunk_rows = chunk_rows
+        self.max_jobs = max_jobs
+        self._executor = None
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='data-ingestion')
+        return self._executor
+    
+    def submit_stream(self, stream, filename):
+        """Guarda el archivo subido (un flujo binario) en disco y encola su importación; devuelve el id del trabajo"""
+        filename = os.path.basename(filename or '')
+        extension = os.path.splitext(filename)[1].lower()
+        if extension not in ('.csv', '.xlsx', '.xls'):
+            raise ValueError("Formato de archivo no soportado. Use CSV o Excel.")
+        
+        job_id = uuid.uuid4().hex
+        path = os.path.join(tempfile.gettempdir(), f"upload_{job_id}{extension}")
+        try:
+            size = copy_upload(stream, path)
+        except Exception:
+            if os.path.exists(path):
+                os.remove(path)
+            raise
+        
+        with self._lock:
+            self._jobs[job_id] = {
+                'id': job_id,
+                'filename': filename,
+                'size': size,
+                'status': 'pending',
+                'progress': 0.0,
+                'rows': 0,
+                'imported': 0,
+                'rejected': 0,
+                'errors': [],
+                'columns': [],
+                'preview': [],
+                'created': datetime.now().isoformat()
+            }
+            self._prune()
+        self._get_executor().submit(self._run, job_id, path)
+        return job_id
+    
+    def _update(self, job_id, **changes):
+        with self._lock:
+            self._jobs[job_id].update(changes)
+    
+    def _run(self, job_id, path):
+        self._update(job_id, status='running')
+        imported = 0
+        try:
+            chunks = iter_csv_chunks(path, self.chunk_rows) if path.endswith('.csv') else \
+                iter_excel_chunks(path, self.chunk_rows)
+            rows = rejected = 0
+            errors = []
+            
+            for chunk, progress in chunks:
+                if rows == 0:
+                    missing = [f"Columna faltante: {field}" for field in REQUIRED_FIELDS if field not in chunk.columns]
+                    if missing:
+                        self._update(job_id, status='error', errors=missing, columns=list(chunk.columns))
+                        return
+                    self._update(job_id, columns=list(chunk.columns), preview=chunk.head(5).to_dict('records'))
+                
+                valid, chunk_errors = validate_chunk(chunk, MAX_REPORTED_ERRORS - len(errors))
+                if valid.any():
+                    imported += data_processor.append_students(chunk[valid])
+                rows += len(chunk)
+                rejected += int((~valid).sum())
+                errors.extend(chunk_errors)
+                self._update(job_id, progress=progress, rows=rows, imported=imported, rejected=rejected,
+                             errors=[f"Fila {row}: {message}" for row, message in errors])
+            
+            if imported:
+                data_processor.load_data()
+            self._update(job_id, status='done', progress=1.0)
+        except Exception as e:
+            print(f"Error importando archivo: {e}")
+            if imported:
+                data_processor.load_data()
+            self._update(job_id, status='error', error=str(e))
+        finally:
+            os.remove(path)
+    
+    def _prune(self):
+        """Descarta los trabajos terminados más antiguos si se supera el límite"""
+        excess = len(self._jobs) - self.max_jobs
+        for job_id in list(self._jobs):
+            if excess <= 0:
+                break
+            if self._jobs[job_id]['status'] in ('done', 'error'):
+                del self._jobs[job_id]
+                excess -= 1
+    
+    def get_job(self, job_id):
+        """Estado y progreso de la importación (pending, running, done o error)"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+    
+    def forget(self, job_id):
+        """Elimina un trabajo ya consultado"""
+        with self._lock:
+            self._jobs.pop(job_id, None)
+
+# Instancia global del importador de archivos de estudiantes
+data_ingestor = DataIngestor(chunk_rows=int(os.getenv('UPLOAD_CHUNK_ROWS', '50000')))
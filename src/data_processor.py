@@ -2,21 +2,51 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import random
+import hashlib
+import os
+import threading
+from src.schema_validator import schema_validator, STUDENT_SCHEMA
+
+# Campos obligatorios de un estudiante nuevo (formulario o archivo subido)
+REQUIRED_FIELDS = list(STUDENT_SCHEMA)
 
 class DataProcessor:
     def __init__(self, csv_path='data/student_performance_enhanced.csv'):
         self.csv_path = csv_path
         self.df = None
+        self._data_version = None
+        # Serializa las escrituras al CSV (formulario e importaciones) y la asignación de ids
+        self._lock = threading.RLock()
+        self._next_id = None
+        self._csv_mtime = None
         self.load_data()
     
     def load_data(self):
         """Carga los datos del CSV mejorado"""
+        with self._lock:
+            self._next_id = None
+            try:
+                # La fecha se toma antes de leer: una escritura durante la lectura vuelve a recargar
+                self._csv_mtime = os.path.getmtime(self.csv_path)
+                self.df = pd.read_csv(self.csv_path)
+                self._data_version = None
+                print(f"Datos cargados exitosamente: {len(self.df)} estudiantes")
+            except FileNotFoundError:
+                print(f"Archivo {self.csv_path} no encontrado. Generando datos de ejemplo...")
+                self.generate_sample_data()
+    
+    def reload_if_changed(self):
+        """Recarga el CSV si cambió en disco (p. ej. una importación hecha desde el dashboard)"""
         try:
-            self.df = pd.read_csv(self.csv_path)
-            print(f"Datos cargados exitosamente: {len(self.df)} estudiantes")
-        except FileNotFoundError:
-            print(f"Archivo {self.csv_path} no encontrado. Generando datos de ejemplo...")
-            self.generate_sample_data()
+            mtime = os.path.getmtime(self.csv_path)
+        except OSError:
+            return False
+        
+        with self._lock:
+            if mtime == self._csv_mtime:
+                return False
+            self.load_data()
+            return True
     
     def generate_sample_data(self):
         """Genera datos de ejemplo si no existe el archivo CSV"""
@@ -126,10 +156,26 @@ class DataProcessor:
             })
         
         self.df = pd.DataFrame(data)
+        self._data_version = None
         # Guardar el archivo generado
         self.df.to_csv(self.csv_path, index=False)
         print(f"Datos generados y guardados: {len(self.df)} estudiantes")
     
+    def get_data_version(self):
+        """Obtiene una huella del contenido actual del dataset (cambia si cambian los datos)"""
+        if self.df is None:
+            return None
+        
+        if self._data_version is None:
+            self._data_version = compute_data_version(self.df)
+        
+        return self._data_version
+    
+    def get_snapshot(self):
+        """DataFrame, versión y estadísticas de un mismo estado del dataset (una recarga concurrente no los mezcla)"""
+        with self._lock:
+            return self.df, self.get_data_version(), self.get_statistics()
+    
     def get_statistics(self):
         """Obtiene estadísticas generales del dataset"""
         if self.df is None:
@@ -223,45 +269,8 @@ class DataProcessor:
         return self.df[['calificaciones_anteriores', 'rendimiento_riesgo']].copy()
     
     def validate_data(self, new_data):
-        """Valida nuevos datos antes de agregarlos"""
-        required_fields = [
-            'nombre', 'apellido', 'edad', 'genero', 'carrera', 'semestre',
-            'calificaciones_anteriores', 'asistencia_porcentaje', 'participacion_clase',
-            'horas_estudio_semanal', 'nivel_socioeconomico'
-        ]
-        
-        errors = []
-        
-        for field in required_fields:
-            if field not in new_data or new_data[field] is None or new_data[field] == '':
-                errors.append(f"Campo requerido faltante: {field}")
-        
-        # Validaciones específicas
-        if 'edad' in new_data:
-            try:
-                edad = int(new_data['edad'])
-                if edad < 16 or edad > 50:
-                    errors.append("Edad debe estar entre 16 y 50 años")
-            except (ValueError, TypeError):
-                errors.append("Edad debe ser un número entero")
-        
-        if 'calificaciones_anteriores' in new_data:
-            try:
-                calif = float(new_data['calificaciones_anteriores'])
-                if calif < 0 or calif > 10:
-                    errors.append("Calificaciones deben estar entre 0 y 10")
-            except (ValueError, TypeError):
-                errors.append("Calificaciones deben ser un número")
-        
-        if 'asistencia_porcentaje' in new_data:
-            try:
-                asist = int(new_data['asistencia_porcentaje'])
-                if asist < 0 or asist > 100:
-                    errors.append("Asistencia debe estar entre 0 y 100%")
-            except (ValueError, TypeError):
-                errors.append("Asistencia debe ser un número entero")
-        
-        return errors
+        """Valida nuevos datos antes de agregarlos (mismas reglas que las importaciones masivas)"""
+        return schema_validator.validate_record(new_data)
     
     def add_student(self, student_data):
         """Agrega un nuevo estudiante al dataset"""
@@ -273,28 +282,70 @@ class DataProcessor:
         if errors:
             return False, errors
         
-        # Generar nuevo ID
-        new_id = self.df['id_estudiante'].max() + 1
-        student_data['id_estudiante'] = new_id
-        
-        # Agregar campos faltantes con valores por defecto
-        if 'email' not in student_data:
-            student_data['email'] = f"{student_data['nombre'].lower()}.{student_data['apellido'].lower()}@universidad.edu"
-        
-        if 'telefono' not in student_data:
-            student_data['telefono'] = f"555-{new_id:04d}"
-        
-        if 'fecha_ingreso' not in student_data:
-            student_data['fecha_ingreso'] = datetime.now().strftime('%Y-%m-%d')
-        
-        # Agregar al DataFrame
-        new_row = pd.DataFrame([student_data])
-        self.df = pd.concat([self.df, new_row], ignore_index=True)
-        
-        # Guardar cambios
-        self.df.to_csv(self.csv_path, index=False)
+        with self._lock:
+            # Generar nuevo ID
+            new_id = self._allocate_ids(1)
+            student_data['id_estudiante'] = new_id
+            
+            # Agregar campos faltantes con valores por defecto
+            if 'email' not in student_data:
+                student_data['email'] = f"{student_data['nombre'].lower()}.{student_data['apellido'].lower()}@universidad.edu"
+            
+            if 'telefono' not in student_data:
+                student_data['telefono'] = f"555-{new_id:04d}"
+            
+            if 'fecha_ingreso' not in student_data:
+                student_data['fecha_ingreso'] = datetime.now().strftime('%Y-%m-%d')
+            
+            # Agregar al DataFrame
+            new_row = pd.DataFrame([student_data])
+            columns = self.df.columns
+            self.df = pd.concat([self.df, new_row], ignore_index=True)
+            self._data_version = None
+            
+            # Guardar cambios: se agrega al final del CSV, que puede tener filas de una
+            # importación en curso que todavía no están en self.df
+            new_row.reindex(columns=columns).to_csv(self.csv_path, mode='a', header=False, index=False)
         
         return True, ["Estudiante agregado exitosamente"]
+    
+    def _allocate_ids(self, count):
+        """Reserva `count` ids consecutivos y devuelve el primero (llamar con self._lock tomado)"""
+        if self._next_id is None:
+            self._next_id = 1 if self.df is None or self.df.empty else int(self.df['id_estudiante'].max()) + 1
+        first_id = self._next_id
+        self._next_id += count
+        return first_id
+    
+    def append_students(self, new_rows):
+        """Agrega al CSV un bloque de estudiantes ya validados; devuelve cuántos se agregaron.
+        
+        Solo escribe al final del archivo (no reescribe el dataset ni toca
+        self.df): las importaciones por bloques llaman a load_data al terminar.
+        """
+        rows = new_rows.copy()
+        
+        # Mismos valores por defecto que add_student
+        default_email = rows['nombre'].astype(str).str.lower() + '.' + rows['apellido'].astype(str).str.lower() + '@universidad.edu'
+        rows['email'] = rows['email'].fillna(default_email) if 'email' in rows else default_email
+        if 'fecha_ingreso' not in rows:
+            rows['fecha_ingreso'] = datetime.now().strftime('%Y-%m-%d')
+        
+        # Los ids se reservan y el bloque se escribe sin soltar el lock
+        with self._lock:
+            first_id = self._allocate_ids(len(rows))
+            rows['id_estudiante'] = np.arange(first_id, first_id + len(rows))
+            default_phone = rows['id_estudiante'].map('555-{:04d}'.format)
+            rows['telefono'] = rows['telefono'].fillna(default_phone) if 'telefono' in rows else default_phone
+            rows.reindex(columns=self.df.columns).to_csv(self.csv_path, mode='a', header=False, index=False)
+        return len(rows)
+
+def compute_data_version(df):
+    """Calcula la huella de contenido de un DataFrame"""
+    row_hashes = pd.util.hash_pandas_object(df, index=False)
+    digest = hashlib.sha1(row_hashes.values.tobytes())
+    digest.update(','.join(map(str, df.columns)).encode('utf-8'))
+    return digest.hexdigest()[:16]
 
 # Instancia global del procesador
 data_processor = DataProcessor()
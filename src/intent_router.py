@@ -0,0 +1,301 @@
+import os
+import re
+import threading
+from src.name_index import normalize_name, FILLER_WORDS
+from src.response_cache import normalize_prompt
+
+# Consultas abiertas (explicaciones, recomendaciones, causas): siempre van a la IA externa
+OPEN_ENDED = re.compile(r'\b(por que|porque|recomend\w*|consej\w*|explica\w*|analiza\w*|deberia\w*|'
+                        r'factores|predic\w*|mejorar|ayudar\w*|opinas|crees|sugier\w*|estrategia\w*)\b')
+GREETING = re.compile(r'^(hola|buenas|buenos dias|buenas tardes|buenas noches|saludos)( como estas)?$')
+COUNT = re.compile(r'\b(cuantos|cuantas|numero de|cantidad de|total de|porcentaje)\b')
+STUDENTS = re.compile(r'\b(estudiantes|alumnos)\b')
+AT_RISK = re.compile(r'\ben riesgo\b')
+NOT_AT_RISK = re.compile(r'\b(sin riesgo|no estan en riesgo|no en riesgo)\b')
+PER_CAREER = re.compile(r'\b(por|cada) carreras?\b')
+AVERAGE = re.compile(r'\b(promedio|promedios|media)\b')
+ATTENDANCE = re.compile(r'\basistencia\b')
+CAREER_SUMMARY = re.compile(r'\b(estadisticas|datos|resumen|como esta|como va|como van)\b')
+LETTER = re.compile(r'\b(?:empiece|empiecen|empieza|empiezan|comience|comiencen|comienza|comienzan)\s+'
+                    r'(?:con|por)\s+(?:la\s+)?(?:letra\s+)?([a-z])\b')
+STUDENT_LOOKUP = re.compile(r'\b(informacion (?:sobre|de)|datos de|dime sobre|quiero saber de|'
+                            r'ficha de|como esta|como va)\b')
+GRADES = re.compile(r'\b(calificaciones|notas)\b')
+NAME = re.compile(r'\b(cuy[oa]s?|nombres?)\b')
+CAREER_WORD = re.compile(r'\bcarreras?\b')
+
+def unmatched_words(text, patterns, career_keys=()):
+    """Palabras de la consulta que no reconoce la intención ni son de relleno.
+    
+    Si queda alguna (semestre, números, mayor/menor, mejor/peor, nivel, género,
+    horas, participación...), es un filtro que la respuesta local no aplica y la
+    consulta va a la IA externa.
+    """
+    for pattern in patterns:
+        text = pattern.sub(' ', text)
+    for key in career_keys:
+        text = re.sub(rf'\b{re.escape(key)}\b', ' ', text)
+    if career_keys:
+        # "la carrera de Medicina": la palabra solo es de relleno si se nombró la carrera
+        text = CAREER_WORD.sub(' ', text)
+    return [word for word in text.split() if word not in FILLER_WORDS]
+
+def _pct(part, total):
+    return (part / total * 100) if total else 0.0
+
+def build_router_data(df):
+    """Agregados que necesitan las respuestas locales, calculados una vez por versión de datos"""
+    at_risk = (df['rendimiento_riesgo'] == 1)
+    grouped = df.assign(_en_riesgo=at_risk).groupby('carrera', sort=False).agg(
+        total=('carrera', 'size'),
+        en_riesgo=('_en_riesgo', 'sum'),
+        promedio_calificaciones=('calificaciones_anteriores', 'mean'),
+        promedio_asistencia=('asistencia_porcentaje', 'mean'),
+        promedio_participacion=('participacion_clase', 'mean'),
+        promedio_horas=('horas_estudio_semanal', 'mean')
+    )
+    careers = {
+        carrera: {
+            'total': int(row.total),
+            'en_riesgo': int(row.en_riesgo),
+            'promedio_calificaciones': float(row.promedio_calificaciones),
+            'promedio_asistencia': float(row.promedio_asistencia),
+            'promedio_participacion': float(row.promedio_participacion),
+            'promedio_horas': float(row.promedio_horas)
+        }
+        for carrera, row in zip(grouped.index, grouped.itertuples(index=False))
+    }
+    
+    return {
+        'total': len(df),
+        'en_riesgo': int(at_risk.sum()),
+        'promedio_calificaciones': float(df['calificaciones_anteriores'].mean()),
+        'promedio_asistencia': float(df['asistencia_porcentaje'].mean()),
+        'carreras': careers,
+        'carreras_normalizadas': {normalize_name(carrera): carrera for carrera in careers}
+    }
+
+class IntentRouter:
+    """Responde localmente las consultas analíticas deterministas del chat.
+    
+    Conteos y porcentajes de riesgo, estadísticas por carrera, promedios,
+    listados por inicial y fichas de estudiantes se resuelven con agregados
+    precalculados por versión de datos y con el índice de nombres, en
+    milisegundos. Lo que no encaja en ninguna intención, pide una
+    explicación o recomendación, o agrega un filtro que la intención no
+    aplica (semestre, nivel, umbrales...) se deja pasar a la IA externa.
+    `stats` registra el reparto local / IA externa por intención.
+    """
+    
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._version = None
+        self._data = None
+        self.stats = {'local': 0, 'llm': 0, 'intents': {}}
+    
+    def _get_data(self, df, data_version):
+        with self._lock:
+            if self._data is None or data_version != self._version:
+                self._data = build_router_data(df)
+                self._version = data_version
+            return self._data
+    
+    def route(self, prompt, df, data_version, name_index=None):
+        """Devuelve (intención, respuesta) si la consulta se responde localmente, o None"""
+        if not self.enabled or df is None or df.empty:
+            return None
+        
+        text = normalize_prompt(prompt)
+        data = self._get_data(df, data_version)
+        result = None
+        try:
+            result = self._match(text, prompt, df, data, name_index)
+        except Exception as e:
+            print(f"Error en el enrutador de intenciones: {e}")
+        
+        with self._lock:
+            if result is None:
+                self.stats['llm'] += 1
+            else:
+                self.stats['local'] += 1
+                self.stats['intents'][result[0]] = self.stats['intents'].get(result[0], 0) + 1
+        return result
+    
+    def get_stats(self):
+        """Reparto de consultas entre respuestas locales y la IA externa"""
+        with self._lock:
+            total = self.stats['local'] + self.stats['llm']
+            return {
+                'local': self.stats['local'],
+                'llm': self.stats['llm'],
+                'local_rate': round(self.stats['local'] / total, 3) if total else 0.0,
+                'intents': dict(self.stats['intents'])
+            }
+    
+    def _match(self, text, prompt, df, data, name_index):
+        if GREETING.match(text):
+            return 'saludo', self._answer_greeting(data)
+        if OPEN_ENDED.search(text):
+            return None
+        
+        career_keys = [key for key in data['carreras_normalizadas'] if key and re.search(rf'\b{re.escape(key)}\b', text)]
+        careers = [data['carreras_normalizadas'][key] for key in career_keys]
+        
+        letter = LETTER.search(text)
+        if letter and name_index is not None:
+            if unmatched_words(text, [LETTER, STUDENTS, NAME]):
+                return None
+            return 'lista_por_inicial', self._answer_letter(df, name_index, letter.group(1).upper())
+        
+        if name_index is not None and STUDENT_LOOKUP.search(text):
+            mentions = [m for m in name_index.find_mentions(prompt) if m['tipo'] == 'nombre_completo']
+            if len(mentions) == 1:
+                return 'ficha_estudiante', self._answer_student(df.iloc[mentions[0]['position']].to_dict())
+        
+        if PER_CAREER.search(text) and (CAREER_SUMMARY.search(text) or AT_RISK.search(text) or COUNT.search(text)):
+            if unmatched_words(text, [PER_CAREER, CAREER_SUMMARY, AT_RISK, COUNT, STUDENTS]):
+                return None
+            return 'estadisticas_por_carrera', self._answer_per_career(data)
+        
+        if COUNT.search(text) and (STUDENTS.search(text) or AT_RISK.search(text)):
+            if unmatched_words(text, [COUNT, STUDENTS, NOT_AT_RISK, AT_RISK], career_keys):
+                return None
+            if NOT_AT_RISK.search(text):
+                return 'conteo_sin_riesgo', self._answer_risk_count(data, careers, at_risk=False)
+            if AT_RISK.search(text):
+                return 'conteo_riesgo', self._answer_risk_count(data, careers, at_risk=True)
+            return 'conteo_estudiantes', self._answer_total(data, careers)
+        
+        if AVERAGE.search(text):
+            if unmatched_words(text, [AVERAGE, ATTENDANCE, GRADES, STUDENTS], career_keys):
+                return None
+            return 'promedios', self._answer_averages(data, careers, attendance_only=bool(ATTENDANCE.search(text)))
+        
+        if careers and CAREER_SUMMARY.search(text):
+            if unmatched_words(text, [CAREER_SUMMARY, STUDENTS], career_keys):
+                return None
+            return 'estadisticas_carrera', self._answer_careers(data, careers)
+        
+        return None
+    
+    def _answer_greeting(self, data):
+        return (f"¡Hola! Soy el coordinador académico de la Universidad Tecnosur. Tengo información de "
+                f"{data['total']} estudiantes en {len(data['carreras'])} carreras. ¿En qué puedo ayudarte hoy?")
+    
+    def _answer_risk_count(self, data, careers, at_risk=True):
+        label = "en riesgo académico" if at_risk else "sin riesgo académico"
+        if not careers:
+            count = data['en_riesgo'] if at_risk else data['total'] - data['en_riesgo']
+            return (f"Actualmente hay {count} estudiantes {label} de un total de {data['total']}, "
+                    f"es decir, un {_pct(count, data['total']):.1f}%.")
+        
+        parts = []
+        for carrera in careers:
+            values = data['carreras'][carrera]
+            count = values['en_riesgo'] if at_risk else values['total'] - values['en_riesgo']
+            parts.append(f"En {carrera} hay {count} estudiantes {label} de {values['total']} "
+                         f"({_pct(count, values['total']):.1f}%).")
+        return " ".join(parts)
+    
+    def _answer_total(self, data, careers):
+        if not careers:
+            return (f"Tenemos {data['total']} estudiantes registrados en {len(data['carreras'])} carreras; "
+                    f"{data['en_riesgo']} de ellos están en riesgo académico.")
+        return " ".join(
+            f"{carrera} tiene {data['carreras'][carrera]['total']} estudiantes, "
+            f"{data['carreras'][carrera]['en_riesgo']} en riesgo."
+            for carrera in careers
+        )
+    
+    def _answer_per_career(self, data):
+        ranking = sorted(data['carreras'].items(), key=lambda item: _pct(item[1]['en_riesgo'], item[1]['total']),
+                         reverse=True)
+        response = "📚 Aquí tienes las estadísticas de riesgo por carrera:\n\n"
+        for carrera, values in ranking:
+            response += (f"• {carrera}: {values['en_riesgo']}/{values['total']} estudiantes en riesgo "
+                         f"({_pct(values['en_riesgo'], values['total']):.1f}%), promedio "
+                         f"{values['promedio_calificaciones']:.1f}/10, asistencia {values['promedio_asistencia']:.1f}%\n")
+        
+        worst, best = ranking[0], ranking[-1]
+        response += (f"\n{worst[0]} tiene el mayor porcentaje de riesgo "
+                     f"({_pct(worst[1]['en_riesgo'], worst[1]['total']):.1f}%) y {best[0]} el menor "
+                     f"({_pct(best[1]['en_riesgo'], best[1]['total']):.1f}%).")
+        return response
+    
+    def _answer_averages(self, data, careers, attendance_only=False):
+        if not careers:
+            if attendance_only:
+                return f"La asistencia promedio de los {data['total']} estudiantes es de {data['promedio_asistencia']:.1f}%."
+            return (f"El promedio general de calificaciones es {data['promedio_calificaciones']:.2f}/10 y la "
+                    f"asistencia promedio es de {data['promedio_asistencia']:.1f}%.")
+        
+        parts = []
+        for carrera in careers:
+            values = data['carreras'][carrera]
+            if attendance_only:
+                parts.append(f"En {carrera} la asistencia promedio es de {values['promedio_asistencia']:.1f}%.")
+            else:
+                parts.append(f"En {carrera} el promedio de calificaciones es {values['promedio_calificaciones']:.2f}/10 "
+                             f"y la asistencia promedio {values['promedio_asistencia']:.1f}%.")
+        return " ".join(parts)
+    
+    def _answer_careers(self, data, careers):
+        parts = []
+        for carrera in careers:
+            values = data['carreras'][carrera]
+            parts.append(
+                f"{carrera} tiene {values['total']} estudiantes, {values['en_riesgo']} en riesgo "
+                f"({_pct(values['en_riesgo'], values['total']):.1f}%). Su promedio de calificaciones es "
+                f"{values['promedio_calificaciones']:.2f}/10, la asistencia promedio {values['promedio_asistencia']:.1f}%, "
+                f"la participación {values['promedio_participacion']:.1f}/5 y estudian en promedio "
+                f"{values['promedio_horas']:.1f} horas por semana."
+            )
+        return "\n\n".join(parts)
+    
+    def _answer_letter(self, df, name_index, letter):
+        positions, total = name_index.names_starting_with(letter, limit=10)
+        if not total:
+            return f"No encontré estudiantes cuyo nombre empiece con '{letter}'. ¿Quieres que busque con otra letra?"
+        
+        rows = df.iloc[positions]
+        student_list = [
+            f"• {nombre} {apellido} ({carrera}, {'en riesgo' if riesgo == 1 else 'sin riesgo'})"
+            for nombre, apellido, carrera, riesgo in zip(rows['nombre'], rows['apellido'], rows['carrera'],
+                                                         rows['rendimiento_riesgo'])
+        ]
+        response = f"Te muestro los estudiantes cuyo nombre empieza con '{letter}':\n\n" + "\n".join(student_list)
+        if total > 10:
+            response += f"\n\n(Mostrando los primeros 10 de {total} estudiantes encontrados)"
+        return response + "\n\n¿Te interesa conocer más detalles sobre alguno de ellos?"
+    
+    def _answer_student(self, student):
+        nombre_completo = f"{student['nombre']} {student['apellido']}"
+        promedio = student.get('promedio_general', student.get('calificaciones_anteriores', 0))
+        response = (f"{nombre_completo} estudia {student['carrera']} y está en {student['semestre']}° semestre. "
+                    f"Tiene un promedio de {promedio}/10, una asistencia del {student['asistencia_porcentaje']}% "
+                    f"y dedica {student['horas_estudio_semanal']} horas semanales al estudio.")
+        
+        if student['rendimiento_riesgo'] == 1:
+            response += " Actualmente está en riesgo académico"
+            motivo = student.get('motivo_riesgo')
+            response += f" ({motivo})." if isinstance(motivo, str) and motivo else "."
+        else:
+            response += " No presenta riesgo académico significativo."
+        
+        try:
+            import src.fuzzy_logic as fuzzy
+            mapping_nivel = {'Bajo': 3, 'Medio': 6, 'Alto': 9}
+            riesgo_fuzzy = fuzzy.evaluar_riesgo(
+                mapping_nivel.get(student['nivel_socioeconomico'], 5),
+                student['participacion_clase'] * 2,
+                student['asistencia_porcentaje'],
+                student['calificaciones_anteriores']
+            )
+            response += f" Según el análisis con lógica difusa, su nivel de riesgo es {riesgo_fuzzy:.1f}/10."
+        except Exception as e:
+            print(f"Error evaluando riesgo difuso: {e}")
+        return response
+
+# Instancia global del enrutador de intenciones del chat
+intent_router = IntentRouter(enabled=os.getenv('CHAT_INTENT_ROUTING', '1') == '1')
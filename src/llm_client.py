@@ -0,0 +1,139 @@
+import os
+import json
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Errores transitorios que vale la pena reintentar
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+def parse_stream_line(line):
+    """Texto de una línea SSE de una completion en streaming: None al llegar a [DONE], '' si no trae texto"""
+    # Las líneas que empiezan con ':' son comentarios de keep-alive del proveedor
+    if not line.startswith('data:'):
+        return ''
+    data = line[len('data:'):].strip()
+    if data == '[DONE]':
+        return None
+    
+    chunk = json.loads(data)
+    if chunk.get('error'):
+        raise Exception(chunk['error'].get('message', 'Error en la API de IA'))
+    choice = (chunk.get('choices') or [{}])[0]
+    return (choice.get('delta') or {}).get('content') or choice.get('text') or ''
+
+class LLMClient:
+    """Cliente HTTP compartido para la API de completions (OpenRouter o compatible).
+    
+    Reutiliza un único requests.Session con un pool de conexiones keep-alive,
+    de modo que los mensajes del chat no repiten el handshake TCP/TLS.
+    Reintenta con backoff exponencial los fallos de conexión y las respuestas
+    429/5xx (respetando Retry-After), y limita las llamadas simultáneas con un
+    semáforo. `base_url` permite apuntar a un servidor local de pruebas
+    (benchmarks/fake_llm_server.py).
+    """
+    
+    def __init__(self, base_url='https://openrouter.ai/api/v1', max_retries=2, backoff_factor=0.5,
+                 pool_size=10, max_concurrency=4, connect_timeout=5, read_timeout=30, acquire_timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = (connect_timeout, read_timeout)
+        self.acquire_timeout = acquire_timeout
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self.stats = {'requests': 0, 'errors': 0, 'rejected': 0}
+        
+        # Sin reintentos de lectura: una generación que ya empezó no se repite
+        retry = Retry(
+            total=max_retries,
+            connect=max_retries,
+            read=0,
+            status=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUS_CODES,
+            allowed_methods=frozenset(['POST']),
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+    
+    def _acquire(self):
+        if not self._semaphore.acquire(timeout=self.acquire_timeout):
+            self._count('rejected')
+            raise TimeoutError("Demasiadas consultas simultáneas a la IA externa")
+    
+    def _send(self, path, api_key, payload, stream=False):
+        self._count('requests')
+        return self.session.post(
+            f"{self.base_url}{path}",
+            headers={
+                "Authorization": f"Bearer {api_key}",
+                "Content-Type": "application/json"
+            },
+            json=payload,
+            timeout=self.timeout,
+            stream=stream
+        )
+    
+    def post(self, path, api_key, payload):
+        """Envía un POST JSON a `base_url + path` y devuelve la respuesta de requests"""
+        self._acquire()
+        try:
+            return self._send(path, api_key, payload)
+        except Exception:
+            self._count('errors')
+            raise
+        finally:
+            self._semaphore.release()
+    
+    def chat_completion(self, api_key, payload):
+        """Llama a /chat/completions con el payload de OpenAI/OpenRouter"""
+        return self.post('/chat/completions', api_key, payload)
+    
+    def stream_chat_completion(self, api_key, payload):
+        """Generador con los fragmentos de texto de una completion en streaming (SSE).
+        
+        El cupo de concurrencia se mantiene hasta terminar de leer la respuesta
+        (o hasta que quien consume el generador lo cierre).
+        """
+        self._acquire()
+        response = None
+        try:
+            response = self._send('/chat/completions', api_key, dict(payload, stream=True), stream=True)
+            if response.status_code != 200:
+                raise Exception(f"Error de API: {response.status_code} - {response.text}")
+            
+            # chunk_size=None: cada fragmento se entrega en cuanto llega, sin esperar a llenar un búfer
+            for line in response.iter_lines(chunk_size=None):
+                text = parse_stream_line(line.decode('utf-8') if isinstance(line, bytes) else line)
+                if text is None:
+                    break
+                if text:
+                    yield text
+        except GeneratorExit:
+            raise
+        except Exception:
+            self._count('errors')
+            raise
+        finally:
+            if response is not None:
+                response.close()
+            self._semaphore.release()
+    
+    def close(self):
+        self.session.close()
+    
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+# Instancia global del cliente de la IA externa
+llm_client = LLMClient(
+    base_url=os.getenv('OPENROUTER_BASE_URL', 'https://openrouter.ai/api/v1'),
+    max_retries=int(os.getenv('LLM_MAX_RETRIES', '2')),
+    max_concurrency=int(os.getenv('LLM_MAX_CONCURRENCY', '4')),
+    read_timeout=float(os.getenv('LLM_TIMEOUT', '30'))
+)
@@ -0,0 +1,307 @@
+import threading
+import unicodedata
+from bisect import bisect_left
+from collections import defaultdict, deque
+import numpy as np
+
+def normalize_name(value):
+    """Normaliza un nombre para comparar: sin tildes, en minúsculas y con espacios simples"""
+    if value is None or (isinstance(value, float) and value != value):
+        return ''
+    text = unicodedata.normalize('NFKD', str(value))
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return ' '.join(text.lower().split())
+
+# Palabras de relleno de las consultas del chat (ya normalizadas): pueden cambiar entre
+# paráfrasis sin cambiar la pregunta. Las usan la caché de respuestas y el enrutador de intenciones
+FILLER_WORDS = frozenset((
+    'a al con de del e el en la las lo los o para por sobre un una unos unas y '
+    'hay tenemos tiene tienen son es esta estan existen cuenta cuentan registrados registradas inscritos '
+    'inscritas matriculados actualmente ahora hoy total general todos todas que cual cuales cuanto '
+    'cuanta me nos puedes podrias dime decir dame muestrame muestra mostrar quiero saber conocer ver '
+    'lista listado favor hola universidad tecnosur academico'
+).split())
+
+class AhoCorasick:
+    """Autómata de Aho-Corasick: encuentra todas las apariciones de un conjunto
+    de patrones recorriendo el texto una sola vez.
+    
+    `patterns` es un iterable de (patrón, dato); cada coincidencia devuelve el
+    dato asociado junto con su posición en el texto.
+    """
+    
+    def __init__(self, patterns):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+        
+        for pattern, payload in patterns:
+            if not pattern:
+                continue
+            state = 0
+            for ch in pattern:
+                next_state = self.goto[state].get(ch)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto[state][ch] = next_state
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                state = next_state
+            self.output[state].append((len(pattern), payload))
+        
+        # Enlaces de fallo por niveles (BFS); cada estado hereda las salidas de su fallo
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and ch not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(ch, 0)
+                self.output[next_state] = self.output[next_state] + self.output[self.fail[next_state]]
+    
+    def iter_matches(self, text):
+        """Genera (inicio, fin, dato) para cada patrón encontrado en `text`"""
+        goto, fail, output = self.goto, self.fail, self.output
+        state = 0
+        for end, ch in enumerate(text, 1):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for length, payload in output[state]:
+                yield end - length, end, payload
+
+def _is_word_boundary(text, start, end):
+    # Evita coincidencias dentro de otra palabra ("ana" en "mañana")
+    return ((start == 0 or not text[start - 1].isalnum()) and
+            (end == len(text) or not text[end].isalnum()))
+
+class StudentNameIndex:
+    """Índice de nombres de estudiantes para búsquedas sin recorrer el DataFrame.
+    
+    Respeta el orden de prioridad de la búsqueda original y, dentro de cada
+    prioridad, devuelve la primera fila del dataset que coincide:
+    
+    1. nombre completo exacto (diccionario)
+    2. nombre y apellido exactos con las dos primeras palabras (diccionario)
+    3. la búsqueda está contenida en el nombre completo (índice de trigramas
+       sobre los nombres completos distintos; subcadenas de 1-2 letras en un
+       diccionario aparte)
+    4. algún nombre o apellido está contenido en la búsqueda (recorrido de
+       los nombres y apellidos distintos, no de las filas)
+    
+    Para listados (`search`, `names_starting_with`) mantiene además los
+    nombres completos normalizados de cada fila en un arreglo de numpy y las
+    claves "nombre apellido" / "apellido nombre" ordenadas, de modo que una
+    búsqueda por prefijo es una búsqueda binaria.
+    """
+    
+    def __init__(self, df):
+        nombres = [normalize_name(value) for value in df['nombre'].tolist()]
+        apellidos = [normalize_name(value) for value in df['apellido'].tolist()]
+        
+        self.exact_full = {}
+        self.exact_pair = {}
+        self.tokens = {}
+        self.full_name_positions = defaultdict(list)
+        self.surname_positions = defaultdict(list)
+        self._mention_matcher = None
+        self._mention_lock = threading.Lock()
+        distinct_names = {}
+        
+        for position, (nombre, apellido) in enumerate(zip(nombres, apellidos)):
+            full_name = f"{nombre} {apellido}"
+            self.exact_full.setdefault(full_name, position)
+            self.exact_pair.setdefault((nombre, apellido), position)
+            distinct_names.setdefault(full_name, position)
+            if nombre and apellido:
+                self.full_name_positions[full_name].append(position)
+            if apellido:
+                self.surname_positions[apellido].append(position)
+            for token in (nombre, apellido):
+                if token:
+                    self.tokens.setdefault(token, position)
+        
+        # Prefijos: claves ordenadas con la posición de cada fila (búsqueda binaria)
+        full_names = [f"{nombre} {apellido}" for nombre, apellido in zip(nombres, apellidos)]
+        self.full_names = np.array(full_names, dtype=str)
+        name_keys = sorted((full_name, position) for position, full_name in enumerate(full_names))
+        surname_keys = sorted((f"{apellido} {nombre}", position)
+                              for position, (nombre, apellido) in enumerate(zip(nombres, apellidos)))
+        self.name_keys = [key for key, _ in name_keys]
+        self.name_key_positions = [position for _, position in name_keys]
+        self.surname_keys = [key for key, _ in surname_keys]
+        self.surname_key_positions = [position for _, position in surname_keys]
+        
+        # Subcadenas: trigramas -> nombres completos distintos que los contienen
+        self.names = list(distinct_names)
+        self.name_positions = list(distinct_names.values())
+        self.trigrams = defaultdict(set)
+        self.short_substrings = {}
+        for name_id, full_name in enumerate(self.names):
+            position = self.name_positions[name_id]
+            for i in range(len(full_name)):
+                for length in (1, 2):
+                    piece = full_name[i:i + length]
+                    if len(piece) == length:
+                        previous = self.short_substrings.get(piece)
+                        if previous is None or position < previous:
+                            self.short_substrings[piece] = position
+                if i + 3 <= len(full_name):
+                    self.trigrams[full_name[i:i + 3]].add(name_id)
+    
+    def _find_substring(self, search):
+        """Primera fila cuyo nombre completo contiene la búsqueda"""
+        if len(search) < 3:
+            return self.short_substrings.get(search)
+        
+        grams = {search[i:i + 3] for i in range(len(search) - 2)}
+        postings = sorted((self.trigrams.get(gram, set()) for gram in grams), key=len)
+        if not postings[0]:
+            return None
+        
+        candidates = set.intersection(*postings) if len(postings) > 1 else postings[0]
+        matches = [self.name_positions[name_id] for name_id in candidates if search in self.names[name_id]]
+        return min(matches) if matches else None
+    
+    def find(self, search_name):
+        """Devuelve la posición (fila) del estudiante encontrado o None"""
+        search = normalize_name(search_name)
+        if not search:
+            return None
+        
+        # Prioridad 1: nombre completo exacto
+        position = self.exact_full.get(search)
+        if position is not None:
+            return position
+        
+        # Prioridad 2: nombre y apellido exactos por separado
+        parts = search.split()
+        if len(parts) >= 2:
+            position = self.exact_pair.get((parts[0], parts[1]))
+            if position is not None:
+                return position
+        
+        # Prioridad 3: búsqueda parcial (contiene)
+        position = self._find_substring(search)
+        if position is not None:
+            return position
+        
+        # Prioridad 4: búsqueda inversa (nombre o apellido contenido en la búsqueda)
+        matches = [position for token, position in self.tokens.items() if token in search]
+        return min(matches) if matches else None
+    
+    @staticmethod
+    def _prefix_range(keys, prefix):
+        # Todas las claves que empiezan con el prefijo quedan entre prefix y prefix + el mayor carácter
+        return bisect_left(keys, prefix), bisect_left(keys, prefix + '\U0010ffff')
+    
+    def names_starting_with(self, prefix, limit=None):
+        """Posiciones de los estudiantes cuyo nombre empieza con `prefix` (en orden alfabético) y el total"""
+        start, end = self._prefix_range(self.name_keys, normalize_name(prefix))
+        stop = end if limit is None else min(end, start + limit)
+        return self.name_key_positions[start:stop], end - start
+    
+    def search(self, term, limit=10, chunk_size=4096):
+        """Hasta `limit` posiciones de estudiantes cuyo nombre o apellido empieza con la búsqueda o la contiene.
+        
+        Primero los que empiezan con la búsqueda (búsqueda binaria sobre las
+        claves ordenadas) y después los que la contienen, recorriendo el
+        arreglo de nombres normalizados por bloques y deteniéndose en cuanto se
+        juntan `limit` resultados.
+        """
+        term = normalize_name(term)
+        results = []
+        seen = set()
+        
+        for keys, positions in ((self.name_keys, self.name_key_positions),
+                                (self.surname_keys, self.surname_key_positions)):
+            start, end = self._prefix_range(keys, term)
+            for position in positions[start:end]:
+                if position not in seen:
+                    seen.add(position)
+                    results.append(position)
+                    if len(results) >= limit:
+                        return results
+        
+        for offset in range(0, len(self.full_names), chunk_size):
+            chunk = self.full_names[offset:offset + chunk_size]
+            for position in (np.flatnonzero(np.char.find(chunk, term) >= 0) + offset).tolist():
+                if position not in seen:
+                    seen.add(position)
+                    results.append(position)
+                    if len(results) >= limit:
+                        return results
+        return results
+    
+    def _get_mention_matcher(self):
+        """Autómata sobre nombres completos y apellidos (se construye en el primer uso)"""
+        with self._mention_lock:
+            if self._mention_matcher is None:
+                patterns = [(name, ('nombre_completo', name)) for name in self.full_name_positions]
+                patterns += [(surname, ('apellido', surname)) for surname in self.surname_positions]
+                self._mention_matcher = AhoCorasick(patterns)
+            return self._mention_matcher
+    
+    def find_mentions(self, text, max_surname_candidates=3):
+        """Devuelve todos los estudiantes mencionados en un texto libre.
+        
+        Recorre el texto una sola vez y reconoce nombres completos y apellidos
+        como palabras enteras. Un apellido que forma parte de un nombre
+        completo ya reconocido no se cuenta aparte, y los apellidos sueltos
+        (ambiguos) aportan como máximo `max_surname_candidates` filas cada uno.
+        Resultado: lista de {'position', 'texto', 'tipo'} en orden de aparición.
+        """
+        text = normalize_name(text)
+        if not text:
+            return []
+        
+        full_matches = []
+        surname_matches = []
+        for start, end, (kind, key) in self._get_mention_matcher().iter_matches(text):
+            if not _is_word_boundary(text, start, end):
+                continue
+            if kind == 'nombre_completo':
+                full_matches.append((start, end, key))
+            else:
+                surname_matches.append((start, end, key))
+        
+        spans = [(start, end) for start, end, _ in full_matches]
+        surname_matches = [
+            (start, end, key) for start, end, key in surname_matches
+            if not any(span_start <= start and end <= span_end for span_start, span_end in spans)
+        ]
+        
+        mentions = []
+        seen = set()
+        candidates = [(start, key, 'nombre_completo', self.full_name_positions[key])
+                      for start, _, key in full_matches]
+        candidates += [(start, key, 'apellido', self.surname_positions[key][:max_surname_candidates])
+                       for start, _, key in surname_matches]
+        for _, key, kind, positions in sorted(candidates, key=lambda item: item[0]):
+            for position in positions:
+                if position not in seen:
+                    seen.add(position)
+                    mentions.append({'position': position, 'texto': key, 'tipo': kind})
+        return mentions
+
+class NameIndexCache:
+    """Mantiene el índice de nombres de la versión actual del dataset"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._index = None
+    
+    def get(self, df, data_version):
+        """Devuelve el índice, reconstruyéndolo solo si cambió la versión de los datos"""
+        with self._lock:
+            if self._index is None or data_version != self._version:
+                self._index = StudentNameIndex(df)
+                self._version = data_version
+            return self._index
+
+# Instancia global de la caché del índice de nombres
+name_index_cache = NameIndexCache()
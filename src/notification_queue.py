@@ -0,0 +1,256 @@
+import os
+import queue
+import smtplib
+import threading
+import time
+import atexit
+from datetime import datetime
+from email.message import EmailMessage
+
+DEFAULT_COORDINATOR_EMAIL = 'coordinador@universidad.edu'
+DEFAULT_SENDER_EMAIL = 'alertas@universidad.edu'
+
+class FileSink:
+    """Guarda cada correo como archivo .eml en un directorio local (modo sin conexión)"""
+    
+    def __init__(self, directory='data/outbox'):
+        self.directory = directory
+    
+    def send(self, email):
+        os.makedirs(self.directory, exist_ok=True)
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+        recipient = email['To'].split('@')[0]
+        filepath = os.path.join(self.directory, f"{timestamp}_{recipient}.eml")
+        with open(filepath, 'wb') as f:
+            f.write(email.as_bytes())
+        return filepath
+
+class SMTPSink:
+    """Envía los correos por SMTP.
+    
+    Para probar sin un servidor real se puede levantar un servidor de
+    depuración local, por ejemplo: python -m aiosmtpd -n -l localhost:1025
+    """
+    
+    def __init__(self, host='localhost', port=1025, username=None, password=None,
+                 use_tls=False, timeout=10):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.timeout = timeout
+    
+    def send(self, email):
+        with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as smtp:
+            if self.use_tls:
+                smtp.starttls()
+            if self.username:
+                smtp.login(self.username, self.password)
+            smtp.send_message(email)
+        return f"smtp://{self.host}:{self.port}"
+
+def build_digest_email(recipient, alerts, sender=DEFAULT_SENDER_EMAIL):
+    """Construye un único correo con el resumen de varias alertas"""
+    email = EmailMessage()
+    email['From'] = sender
+    email['To'] = recipient
+    
+    if len(alerts) == 1:
+        email['Subject'] = f"[ALERTA ACADÉMICA] {alerts[0]['type_name']}"
+    else:
+        email['Subject'] = f"[ALERTAS ACADÉMICAS] {len(alerts)} nuevas alertas"
+    
+    lines = [
+        "Estimado Coordinador Académico,",
+        "",
+        f"Se han generado {len(alerts)} alerta(s) nuevas en el sistema:",
+        ""
+    ]
+    for alert in alerts:
+        lines.extend([
+            f"- [{alert['priority']}] {alert['type_name']}: {alert['student_name']}",
+            f"  {alert['message']}",
+            f"  Fecha: {alert['timestamp']}",
+            ""
+        ])
+    lines.extend([
+        "Por favor, revise el sistema para más detalles.",
+        "",
+        "Saludos,",
+        "Sistema de Alertas Académicas"
+    ])
+    email.set_content("\n".join(lines))
+    
+    return email
+
+class NotificationDispatcher:
+    """Cola de notificaciones en segundo plano.
+    
+    Las alertas se encolan sin bloquear a quien las crea. Un hilo agrupa las
+    alertas por destinatario y cada `digest_interval` segundos genera un único
+    correo resumen por coordinador; los hilos de trabajo entregan esos correos
+    al `sink` reintentando con espera exponencial si la entrega falla.
+    """
+    
+    def __init__(self, sink, digest_interval=60, num_workers=2, max_retries=3,
+                 backoff_base=1.0, backoff_max=60.0, recipient_resolver=None):
+        self.sink = sink
+        self.digest_interval = digest_interval
+        self.num_workers = num_workers
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.recipient_resolver = recipient_resolver or (lambda alert: DEFAULT_COORDINATOR_EMAIL)
+        
+        self._incoming = queue.Queue()
+        self._outbox = queue.Queue()
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._threads = []
+        
+        self.failed = []
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            'enqueued': 0,
+            'digests': 0,
+            'sent': 0,
+            'retries': 0,
+            'failed': 0
+        }
+    
+    def start(self):
+        """Inicia el hilo agrupador y los hilos de entrega"""
+        if self._threads:
+            return self
+        
+        self._stop_event.clear()
+        batcher = threading.Thread(target=self._batch_loop, name='alert-digest', daemon=True)
+        self._threads.append(batcher)
+        for i in range(self.num_workers):
+            worker = threading.Thread(target=self._worker_loop, name=f'alert-mailer-{i}', daemon=True)
+            self._threads.append(worker)
+        
+        for thread in self._threads:
+            thread.start()
+        return self
+    
+    def stop(self, flush=True, timeout=10):
+        """Detiene los hilos; con flush=True entrega antes lo que esté pendiente"""
+        if flush:
+            self.flush()
+        self._stop_event.set()
+        for _ in range(self.num_workers):
+            self._outbox.put(None)
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+    
+    def enqueue(self, alert):
+        """Encola una alerta para notificación (no bloquea)"""
+        self._incoming.put_nowait(alert)
+        self._count('enqueued')
+    
+    def flush(self):
+        """Genera de inmediato los correos resumen pendientes"""
+        self._drain_incoming()
+        self._emit_digests()
+    
+    def _count(self, key):
+        with self._stats_lock:
+            self.stats[key] += 1
+    
+    def _drain_incoming(self):
+        """Pasa las alertas recibidas a los grupos por destinatario"""
+        while True:
+            try:
+                alert = self._incoming.get_nowait()
+            except queue.Empty:
+                break
+            recipient = self.recipient_resolver(alert)
+            with self._pending_lock:
+                self._pending.setdefault(recipient, []).append(alert)
+    
+    def _emit_digests(self):
+        """Convierte cada grupo pendiente en un correo resumen"""
+        with self._pending_lock:
+            pending, self._pending = self._pending, {}
+        
+        for recipient, alerts in pending.items():
+            self._outbox.put((build_digest_email(recipient, alerts), 0))
+            self._count('digests')
+    
+    def _batch_loop(self):
+        next_digest = time.monotonic() + self.digest_interval
+        while not self._stop_event.is_set():
+            try:
+                alert = self._incoming.get(timeout=min(max(0.0, next_digest - time.monotonic()), 1.0))
+                recipient = self.recipient_resolver(alert)
+                with self._pending_lock:
+                    self._pending.setdefault(recipient, []).append(alert)
+            except queue.Empty:
+                pass
+            
+            if time.monotonic() >= next_digest:
+                self._emit_digests()
+                next_digest = time.monotonic() + self.digest_interval
+    
+    def _worker_loop(self):
+        while True:
+            job = self._outbox.get()
+            if job is None:
+                break
+            
+            email, attempt = job
+            try:
+                self.sink.send(email)
+                self._count('sent')
+            except Exception as e:
+                # Durante stop() un reintento quedaría detrás de las marcas de fin y se perdería:
+                # si el despachador se detiene (antes o durante la espera) el correo cuenta como fallido
+                if attempt < self.max_retries and not self._stop_event.is_set():
+                    delay = min(self.backoff_base * (2 ** attempt), self.backoff_max)
+                    print(f"Error enviando correo a {email['To']} (reintento en {delay:.1f}s): {e}")
+                    if not self._stop_event.wait(delay):
+                        self._count('retries')
+                        self._outbox.put((email, attempt + 1))
+                        continue
+                
+                self._count('failed')
+                self.failed.append({'to': email['To'], 'subject': email['Subject'], 'error': str(e)})
+                print(f"No se pudo enviar el correo a {email['To']}: {e}")
+
+def create_dispatcher_from_env():
+    """Crea y arranca el despachador según las variables de entorno.
+    
+    ALERT_NOTIFY_SINK=file|smtp activa las notificaciones; si no está
+    definida se devuelve None y las alertas no se notifican.
+    """
+    sink_type = os.getenv('ALERT_NOTIFY_SINK', '').strip().lower()
+    if not sink_type:
+        return None
+    
+    if sink_type == 'smtp':
+        sink = SMTPSink(
+            host=os.getenv('SMTP_HOST', 'localhost'),
+            port=int(os.getenv('SMTP_PORT', '1025')),
+            username=os.getenv('SMTP_USER') or None,
+            password=os.getenv('SMTP_PASSWORD') or None,
+            use_tls=os.getenv('SMTP_TLS', '').lower() in ('1', 'true', 'yes')
+        )
+    else:
+        sink = FileSink(os.getenv('ALERT_OUTBOX_DIR', 'data/outbox'))
+    
+    coordinator = os.getenv('ALERT_COORDINATOR_EMAIL', DEFAULT_COORDINATOR_EMAIL)
+    dispatcher = NotificationDispatcher(
+        sink,
+        digest_interval=float(os.getenv('ALERT_DIGEST_INTERVAL', '60')),
+        num_workers=int(os.getenv('ALERT_NOTIFY_WORKERS', '2')),
+        max_retries=int(os.getenv('ALERT_NOTIFY_RETRIES', '3')),
+        recipient_resolver=lambda alert: coordinator
+    )
+    dispatcher.start()
+    atexit.register(dispatcher.stop)
+    
+    return dispatcher
@@ -0,0 +1,266 @@
+import io
+import os
+import re
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+from reportlab.platypus import Frame, Table
+
+class MemoryPDFSink:
+    """Destino en memoria: el resultado son los bytes del PDF"""
+    
+    def open(self):
+        self._buffer = io.BytesIO()
+        return self._buffer
+    
+    def result(self):
+        return self._buffer.getvalue()
+
+class FilePDFSink:
+    """Destino en archivo: el resultado es la ruta escrita"""
+    
+    def __init__(self, path):
+        self.path = path
+    
+    def open(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        return self.path
+    
+    def result(self):
+        return self.path
+
+class StreamPDFSink:
+    """Destino en un flujo ya abierto (respuesta HTTP, socket.makefile('wb'), etc.); con IncrementalPDFWriter recibe el PDF por segmentos"""
+    
+    def __init__(self, stream):
+        self.stream = stream
+    
+    def open(self):
+        return self.stream
+    
+    def result(self):
+        return self.stream
+
+def as_pdf_sink(target):
+    """Convierte una ruta o un objeto con `write` en el destino correspondiente"""
+    if target is None:
+        return MemoryPDFSink()
+    if hasattr(target, 'open') and hasattr(target, 'result'):
+        return target
+    if isinstance(target, (str, os.PathLike)):
+        return FilePDFSink(target)
+    return StreamPDFSink(target)
+
+def iter_table_chunks(header, rows, rows_per_chunk=35, style=None, col_widths=None):
+    """Divide una tabla grande en tablas de `rows_per_chunk` filas con el encabezado repetido.
+    
+    `rows` puede ser cualquier iterable (por ejemplo un generador sobre el
+    DataFrame): solo se mantiene en memoria el bloque que se está maquetando.
+    """
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= rows_per_chunk:
+            yield _make_table(header, chunk, style, col_widths)
+            chunk = []
+    if chunk:
+        yield _make_table(header, chunk, style, col_widths)
+
+def _make_table(header, rows, style, col_widths):
+    table = Table([header] + rows, colWidths=col_widths, repeatRows=1)
+    if style is not None:
+        table.setStyle(style)
+    return table
+
+# Páginas por segmento: cada segmento se maqueta en un canvas propio y se
+# escribe en el destino en cuanto se completa
+SEGMENT_PAGES = int(os.getenv('PDF_SEGMENT_PAGES', '50'))
+
+OBJECT_REF = re.compile(rb'\((?:\\.|[^\\)])*\)|(\d+) 0 R')
+ROOT_REF = re.compile(rb'/Root (\d+) 0 R')
+INFO_REF = re.compile(rb'/Info (\d+) 0 R')
+PAGES_REF = re.compile(rb'/Pages (\d+) 0 R')
+KIDS = re.compile(rb'/Kids \[([^\]]*)\]')
+
+def parse_pdf_objects(data):
+    """Objetos de un PDF de reportlab: ({número: bytes del objeto}, trailer, cabecera)"""
+    xref_offset = int(data[data.rindex(b'startxref') + 9:].split()[0])
+    lines = data[xref_offset:].split(b'\n', 2)
+    first, count = (int(value) for value in lines[1].split())
+    entries = lines[2][:count * 20]
+    offsets = {}
+    for index in range(count):
+        entry = entries[index * 20:index * 20 + 18].split()
+        if entry[2] == b'n':
+            offsets[first + index] = int(entry[0])
+    
+    # Cada objeto llega hasta el siguiente (o hasta la tabla xref): no se busca
+    # "endobj", que podría aparecer dentro de un flujo
+    ordered = sorted(offsets.items(), key=lambda item: item[1])
+    objects = {}
+    for position, (number, offset) in enumerate(ordered):
+        end = ordered[position + 1][1] if position + 1 < len(ordered) else xref_offset
+        objects[number] = data[offset:end]
+    header = data[:ordered[0][1]] if ordered else b'%PDF-1.4\n'
+    return objects, data[data.index(b'trailer', xref_offset):], header
+
+def renumber_object(raw, number, mapping):
+    """Cambia el número del objeto y sus referencias (solo en el diccionario, no en el flujo)"""
+    body = raw.split(b' obj', 1)[1]
+    stream_at = body.find(b'\nstream\n')
+    head, tail = (body, b'') if stream_at < 0 else (body[:stream_at], body[stream_at:])
+    
+    def replace(match):
+        if match.group(1) is None:
+            return match.group(0)
+        return b'%d 0 R' % mapping[int(match.group(1))]
+    return b'%d 0 obj' % number + OBJECT_REF.sub(replace, head) + tail
+
+class IncrementalPDFWriter:
+    """Maqueta un PDF a medida que se reciben los elementos y lo escribe por segmentos.
+    
+    A diferencia de SimpleDocTemplate.build, no necesita la lista completa de
+    elementos: consume iterables (generadores) y va cerrando cada página en
+    cuanto se llena. Cada `segment_pages` páginas el canvas actual se cierra,
+    sus objetos se renumeran y se escriben en el destino (`sink`: ruta de
+    archivo o cualquier objeto con `write`, p. ej. una respuesta o un socket),
+    y se empieza un canvas nuevo; `close` agrega el catálogo, el árbol de
+    páginas y la tabla xref. La memoria queda acotada a un segmento sin
+    importar el tamaño del PDF resultante.
+    """
+    
+    def __init__(self, sink, pagesize=A4, margin=50, title=None, footer=None, segment_pages=None):
+        self.pagesize = pagesize
+        self.margin = margin
+        self.title = title
+        self.footer = footer
+        self.segment_pages = segment_pages or SEGMENT_PAGES
+        if isinstance(sink, (str, os.PathLike)):
+            self._output = open(sink, 'wb')
+            self._owns_output = True
+        else:
+            self._output = sink
+            self._owns_output = False
+        self._position = 0
+        self._offsets = {}
+        self._page_refs = []
+        self._info_number = None
+        self._next_number = 3  # 1: catálogo, 2: árbol de páginas
+        self._new_canvas()
+        self.page_count = 0
+        self.errors = []
+        self._frame = None
+        self._frame_empty = True
+    
+    def _new_canvas(self):
+        self.canvas = canvas.Canvas(io.BytesIO(), pagesize=self.pagesize, pageCompression=1)
+        if self.title:
+            self.canvas.setTitle(self.title)
+        self._segment_count = 0
+    
+    def _write(self, data):
+        self._output.write(data)
+        self._position += len(data)
+    
+    def _write_object(self, number, raw):
+        self._offsets[number] = self._position
+        self._write(raw)
+    
+    def _flush_segment(self):
+        """Escribe en el destino las páginas del canvas actual"""
+        objects, trailer, header = parse_pdf_objects(self.canvas.getpdfdata())
+        root = int(ROOT_REF.search(trailer).group(1))
+        info = int(INFO_REF.search(trailer).group(1))
+        pages = int(PAGES_REF.search(objects[root]).group(1))
+        kids = [int(ref) for ref in re.findall(rb'(\d+) 0 R', KIDS.search(objects[pages]).group(1))]
+        
+        # El catálogo y el árbol de páginas de cada segmento se reemplazan por los
+        # del documento final; la información (título) se toma del primer segmento
+        skipped = {root, pages} if self._info_number is None else {root, pages, info}
+        mapping = {pages: 2}
+        for number in sorted(objects):
+            if number not in skipped:
+                mapping[number] = self._next_number
+                self._next_number += 1
+        if self._info_number is None:
+            self._info_number = mapping[info]
+        
+        if self._position == 0:
+            self._write(header)
+        for number in sorted(objects):
+            if number not in skipped:
+                self._write_object(mapping[number], renumber_object(objects[number], mapping[number], mapping))
+        self._page_refs.extend(mapping[kid] for kid in kids)
+    
+    def _start_page(self):
+        width, height = self.pagesize
+        self._frame = Frame(self.margin, self.margin, width - 2 * self.margin, height - 2 * self.margin,
+                            showBoundary=0)
+        self._frame_empty = True
+    
+    def add(self, flowables):
+        """Maqueta los elementos de un iterable, abriendo páginas nuevas según haga falta"""
+        for flowable in flowables:
+            pending = [flowable]
+            while pending:
+                if self._frame is None:
+                    self._start_page()
+                
+                head = pending[0]
+                if self._frame.add(head, self.canvas, trySplit=0):
+                    pending.pop(0)
+                    self._frame_empty = False
+                    continue
+                
+                # No cabe entero: se parte (p. ej. una tabla) y el resto va a la página siguiente
+                parts = self._frame.split(head, self.canvas)
+                if parts and parts[0] is not head:
+                    pending[0:1] = parts
+                elif self._frame_empty:
+                    # No cabe ni en una página vacía: se descarta para no quedar en bucle
+                    self.errors.append(f"Elemento demasiado grande para una página: {type(head).__name__}")
+                    pending.pop(0)
+                else:
+                    self.new_page()
+    
+    def new_page(self):
+        """Cierra la página actual (si tiene contenido) y la agrega al documento"""
+        if self._frame is None:
+            return
+        
+        self.page_count += 1
+        width, _ = self.pagesize
+        self.canvas.setFont('Helvetica', 8)
+        if self.footer:
+            self.canvas.drawString(self.margin, self.margin / 2, self.footer)
+        self.canvas.drawRightString(width - self.margin, self.margin / 2, f"Página {self.page_count}")
+        self.canvas.showPage()
+        self._frame = None
+        
+        self._segment_count += 1
+        if self._segment_count >= self.segment_pages:
+            self._flush_segment()
+            self._new_canvas()
+    
+    def close(self):
+        """Cierra la última página, escribe el último segmento y completa el documento"""
+        self.new_page()
+        if self._segment_count or not self._page_refs:
+            self._flush_segment()
+        
+        kids = b' '.join(b'%d 0 R' % number for number in self._page_refs)
+        self._write_object(1, b'1 0 obj\n<<\n/PageMode /UseNone /Pages 2 0 R /Type /Catalog\n>>\nendobj\n')
+        self._write_object(2, b'2 0 obj\n<<\n/Count %d /Kids [ %s ] /Type /Pages\n>>\nendobj\n'
+                           % (len(self._page_refs), kids))
+        
+        xref_offset = self._position
+        size = self._next_number
+        entries = [b'0000000000 65535 f \n'] + [b'%010d 00000 n \n' % self._offsets[number]
+                                                  for number in range(1, size)]
+        self._write(b'xref\n0 %d\n' % size + b''.join(entries))
+        self._write(b'trailer\n<<\n/Info %d 0 R\n/Root 1 0 R\n/Size %d\n>>\nstartxref\n%d\n%%%%EOF\n'
+                    % (self._info_number, size, xref_offset))
+        if self._owns_output:
+            self._output.close()
+        return self.page_count
@@ -0,0 +1,178 @@
+import numpy as np
+import pandas as pd
+
+# Columnas numéricas que usan las secciones del reporte general
+MOMENT_COLUMNS = ['calificaciones_anteriores', 'asistencia_porcentaje', 'participacion_clase',
+                  'horas_estudio_semanal', 'rendimiento_riesgo']
+
+# Columnas y estadísticos de los análisis por carrera y por semestre
+GROUP_ANALYSIS_SPEC = {
+    'calificaciones_anteriores': ['mean', 'std', 'count'],
+    'asistencia_porcentaje': ['mean', 'std'],
+    'participacion_clase': ['mean', 'std'],
+    'rendimiento_riesgo': ['sum', 'mean']
+}
+
+HIGH_PERFORMER_MIN = 8.5
+LOW_PERFORMER_MAX = 6.0
+
+def _to_native(value):
+    """Convierte escalares de numpy a tipos nativos de Python"""
+    return value.item() if isinstance(value, np.generic) else value
+
+class ReportAggregates:
+    """Momentos del dataset calculados en una sola pasada.
+    
+    Se recorren las columnas numéricas una vez para acumular, por carrera y
+    por semestre, el conteo, la suma y la suma de cuadrados de cada columna,
+    además de la matriz de productos cruzados global. Todas las secciones del
+    reporte general (riesgo, carreras, semestres, tendencias) se derivan de
+    estos momentos sin volver a agrupar el DataFrame.
+    """
+    
+    def __init__(self, students_df, group_keys=('carrera', 'semestre')):
+        # Se trabaja por columnas (una fila del arreglo por variable) para que
+        # cada recorrido lea memoria contigua
+        columns = np.ascontiguousarray(students_df[MOMENT_COLUMNS].to_numpy(dtype=float).T)
+        m, n = columns.shape
+        valid = ~np.isnan(columns)
+        self.has_missing = not valid.all()
+        
+        # Centrar por la media global mejora la estabilidad numérica de
+        # var = (sum_sq - sum^2 / n) / (n - 1)
+        if self.has_missing:
+            counts = valid.sum(axis=1)
+            centered = np.where(valid, columns, 0.0)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                self.shift = np.where(counts > 0, centered.sum(axis=1) / np.maximum(counts, 1), 0.0)
+            centered = np.where(valid, columns - self.shift[:, None], 0.0)
+        else:
+            counts = np.full(m, n)
+            self.shift = columns.mean(axis=1) if n else np.zeros(m)
+            centered = columns - self.shift[:, None]
+        
+        self.n_rows = n
+        self.count = counts
+        self.sum = centered.sum(axis=1)
+        self.cross = centered @ centered.T
+        
+        # Momentos por grupo: conteo, x y x^2 de cada columna acumulados con bincount
+        squared = centered * centered
+        self.groups = {}
+        for key in group_keys:
+            codes, labels = pd.factorize(students_df[key], sort=True)
+            rows_x, rows_sq, rows_valid = centered, squared, valid
+            if (codes < 0).any():
+                # Filas sin grupo (clave faltante): groupby también las descarta
+                in_group = codes >= 0
+                codes = codes[in_group]
+                rows_x, rows_sq, rows_valid = centered[:, in_group], squared[:, in_group], valid[:, in_group]
+            
+            k = len(labels)
+            if self.has_missing:
+                group_count = np.column_stack([np.bincount(codes, weights=row, minlength=k) for row in rows_valid])
+            else:
+                group_count = np.repeat(np.bincount(codes, minlength=k)[:, None].astype(float), m, axis=1)
+            
+            self.groups[key] = {
+                'labels': [_to_native(label) for label in labels],
+                'count': group_count,
+                'sum': np.column_stack([np.bincount(codes, weights=row, minlength=k) for row in rows_x]),
+                'sum_sq': np.column_stack([np.bincount(codes, weights=row, minlength=k) for row in rows_sq])
+            }
+        
+        # Subconjuntos de alto y bajo rendimiento mediante máscaras
+        calif = columns[MOMENT_COLUMNS.index('calificaciones_anteriores')]
+        with np.errstate(invalid='ignore'):
+            masks = np.vstack([calif >= HIGH_PERFORMER_MIN, calif < LOW_PERFORMER_MAX]).astype(float)
+        self.subset_rows = masks.sum(axis=1)
+        self.subset_count = masks @ valid.T.astype(float)
+        self.subset_sum = masks @ centered.T
+        
+        self._students_df = students_df
+    
+    def _col(self, name):
+        return MOMENT_COLUMNS.index(name)
+    
+    @staticmethod
+    def _mean(count, total, shift):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(count > 0, total / np.maximum(count, 1) + shift, np.nan)
+    
+    @staticmethod
+    def _std(count, total, sum_sq):
+        # Desviación estándar muestral (ddof=1), igual que pandas
+        with np.errstate(invalid='ignore', divide='ignore'):
+            var = (sum_sq - total * total / np.maximum(count, 1)) / (count - 1)
+            return np.where(count > 1, np.sqrt(np.maximum(var, 0.0)), np.nan)
+    
+    def _group_stat(self, key, column, stat):
+        group = self.groups[key]
+        j = self._col(column)
+        count = group['count'][:, j]
+        if stat == 'count':
+            return count
+        if stat == 'sum':
+            return group['sum'][:, j] + count * self.shift[j]
+        if stat == 'mean':
+            return self._mean(count, group['sum'][:, j], self.shift[j])
+        if stat == 'std':
+            return self._std(count, group['sum'][:, j], group['sum_sq'][:, j])
+        raise ValueError(f"Estadístico no soportado: {stat}")
+    
+    def risk_by_group(self, key, decimals=3):
+        """Conteo, suma y media de rendimiento_riesgo por grupo"""
+        stats = {stat: np.round(self._group_stat(key, 'rendimiento_riesgo', stat), decimals)
+                 for stat in ('count', 'sum', 'mean')}
+        return {
+            label: {stat: float(stats[stat][i]) for stat in stats}
+            for i, label in enumerate(self.groups[key]['labels'])
+        }
+    
+    def group_analysis(self, key, decimals=2):
+        """Estadísticos por grupo con el mismo formato que groupby().agg().to_dict('index')"""
+        columns = {
+            (column, stat): np.round(self._group_stat(key, column, stat), decimals)
+            for column, stats in GROUP_ANALYSIS_SPEC.items()
+            for stat in stats
+        }
+        return {
+            label: {column_stat: float(values[i]) for column_stat, values in columns.items()}
+            for i, label in enumerate(self.groups[key]['labels'])
+        }
+    
+    def total(self, column):
+        j = self._col(column)
+        return self.sum[j] + self.count[j] * self.shift[j]
+    
+    def mean(self, column):
+        j = self._col(column)
+        return float(self._mean(self.count[j], self.sum[j], self.shift[j]))
+    
+    def correlations(self, decimals=3):
+        """Matriz de correlación de Pearson derivada de los productos cruzados"""
+        if self.has_missing:
+            # Con valores faltantes pandas usa pares completos; se delega en él
+            return self._students_df[MOMENT_COLUMNS].corr().round(decimals)
+        
+        n = self.n_rows
+        mean_dev = self.sum / max(n, 1)
+        cov = self.cross - n * np.outer(mean_dev, mean_dev)
+        std = np.sqrt(np.diag(cov))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            corr = cov / np.outer(std, std)
+        np.fill_diagonal(corr, np.where(std > 0, 1.0, np.nan))
+        return pd.DataFrame(corr, index=MOMENT_COLUMNS, columns=MOMENT_COLUMNS).round(decimals)
+    
+    def performer_profile(self, high=True):
+        """Conteo y medias de asistencia, participación y horas de estudio del subconjunto"""
+        i = 0 if high else 1
+        means = self._mean(self.subset_count[i], self.subset_sum[i], self.shift)
+        return {
+            'count': int(self.subset_rows[i]),
+            'caracteristicas': {
+                'asistencia_promedio': float(means[self._col('asistencia_porcentaje')]),
+                'participacion_promedio': float(means[self._col('participacion_clase')]),
+                'horas_estudio_promedio': float(means[self._col('horas_estudio_semanal')])
+            }
+        }
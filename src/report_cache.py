@@ -0,0 +1,86 @@
+import os
+import json
+import pickle
+import hashlib
+import threading
+from collections import OrderedDict
+
+class ReportCache:
+    """Caché LRU de reportes generados, limitada por tamaño en bytes.
+    
+    La clave se deriva del contenido: (versión del dataset, tipo de reporte,
+    parámetros). Mientras los datos no cambien, pedir dos veces el mismo
+    reporte devuelve el resultado guardado sin recalcular agregaciones ni PDF.
+    """
+    
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+    
+    @staticmethod
+    def make_key(data_version, report_type, params=None):
+        """Construye la clave de caché a partir de la versión de datos y los parámetros"""
+        payload = json.dumps([data_version, report_type, params or {}], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    @staticmethod
+    def _estimate_size(value):
+        """Estima el tamaño en bytes de un reporte (PDF + resto del diccionario)"""
+        try:
+            return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        except Exception:
+            return 0
+    
+    def get(self, key):
+        """Obtiene un reporte de la caché o None si no está"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+            
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return entry[0]
+    
+    def put(self, key, value):
+        """Guarda un reporte expulsando los menos usados si se supera el presupuesto"""
+        size = self._estimate_size(value)
+        if size > self.max_bytes:
+            return False
+        
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._total_bytes -= previous[1]
+            
+            self._entries[key] = (value, size)
+            self._total_bytes += size
+            
+            while self._total_bytes > self.max_bytes and self._entries:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._total_bytes -= evicted_size
+                self.stats['evictions'] += 1
+        
+        return True
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+    
+    def get_stats(self):
+        """Estadísticas de uso de la caché"""
+        with self._lock:
+            return {
+                **self.stats,
+                'entries': len(self._entries),
+                'bytes': self._total_bytes,
+                'max_bytes': self.max_bytes
+            }
+
+# Instancia global de la caché de reportes
+report_cache = ReportCache(max_bytes=int(os.getenv('REPORT_CACHE_MB', '64')) * 1024 * 1024)
@@ -1,11 +1,55 @@
 import pandas as pd
 from datetime import datetime
-import matplotlib.pyplot as plt
-import seaborn as sns
-import io
-import base64
-from matplotlib.backends.backend_pdf import PdfPages
 import numpy as np
+import os
+import re
+from functools import lru_cache
+from xml.sax.saxutils import escape
+from src.report_aggregates import ReportAggregates
+
+# matplotlib no se importa al cargar el módulo: los PDF se generan con
+# reportlab y los gráficos se rasterizan bajo demanda en src.chart_renderer
+
+@lru_cache(maxsize=1)
+def get_pdf_styles():
+    """Hoja de estilos de reportlab compartida; se construye una sola vez por proceso"""
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    
+    styles = getSampleStyleSheet()
+    styles.add(ParagraphStyle('CustomTitle', parent=styles['Heading1'], fontSize=18, spaceAfter=30, alignment=1))
+    styles.add(ParagraphStyle('StudentTitle', parent=styles['Heading1'], fontSize=16, spaceAfter=12, alignment=1))
+    return styles
+
+@lru_cache(maxsize=None)
+def get_table_style(header_color='grey', body_color='beige', header_font_size=10):
+    """Estilo de tabla compartido: encabezado coloreado, cuerpo y cuadrícula"""
+    from reportlab.platypus import TableStyle
+    from reportlab.lib import colors
+    
+    return TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), getattr(colors, header_color)),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), header_font_size),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), getattr(colors, body_color)),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ])
+
+def chart_images_table(images, chart_names=('radar', 'notas_materias', 'progreso_creditos'), width=148):
+    """Fila de imágenes PNG de gráficos para insertar en el PDF (None si no hay)"""
+    from reportlab.platypus import Image, Table
+    
+    cells = [Image(images[name], width=width, height=width * 0.75) for name in chart_names if name in images]
+    if not cells:
+        return None
+    return Table([cells], colWidths=[width + 2] * len(cells))
+
+def student_pdf_filename(report):
+    """Nombre de archivo seguro para el PDF individual de un estudiante"""
+    student_id = re.sub(r'[^A-Za-z0-9_-]', '_', str(report['student_info']['id'])) or 'sin_id'
+    return f"reporte_estudiante_{student_id}.pdf"
 
 class ReportGenerator:
     def __init__(self):
@@ -15,6 +59,8 @@ class ReportGenerator:
             'text_size': 12,
             'colors': ['#3498db', '#e74c3c', '#2ecc71', '#f39c12', '#9b59b6']
         }
+        # Incluir gráficos rasterizados (matplotlib) en los PDF
+        self.include_charts = os.getenv('REPORT_CHARTS', '1').lower() in ('1', 'true', 'yes')
     
     def generate_student_report(self, student_data, predictions=None):
         """Genera reporte individual de estudiante"""
@@ -232,18 +278,131 @@ class ReportGenerator:
         
         return charts
     
-    def generate_general_report(self, students_df, statistics):
-        """Genera reporte general del sistema y crea archivo PDF en memoria"""
+    def render_student_charts(self, report, data_version=None):
+        """Rutas PNG de los gráficos del estudiante (cacheadas en disco por versión de datos)"""
+        if not self.include_charts:
+            return {}
+        
+        from src.chart_renderer import chart_renderer
+        return chart_renderer.render_student_charts(report, data_version)
+    
+    def build_student_story(self, report, charts=None):
+        """Construye los elementos del PDF individual de un estudiante"""
+        from reportlab.platypus import Paragraph, Spacer, Table
+        
+        styles = get_pdf_styles()
+        info = report['student_info']
+        summary = report['academic_summary']
+        risk = report['risk_analysis']
+        
+        story = [
+            Paragraph(f"REPORTE ACADÉMICO: {escape(str(info['nombre_completo']))}", styles['StudentTitle']),
+            Paragraph(f"<b>Fecha de Generación:</b> {report['timestamp']}", styles['Normal']),
+            Spacer(1, 15)
+        ]
+        
+        # Datos del estudiante
+        info_data = [
+            ['Dato', 'Valor'],
+            ['ID', str(info['id'])],
+            ['Carrera', str(info['carrera'])],
+            ['Semestre', str(info['semestre'])],
+            ['Email', str(info['email'])],
+            ['Estado Académico', str(info['estado_academico'])]
+        ]
+        info_table = Table(info_data)
+        info_table.setStyle(get_table_style())
+        story.extend([info_table, Spacer(1, 20)])
+        
+        # Resumen académico
+        story.append(Paragraph("RESUMEN ACADÉMICO", styles['Heading2']))
+        summary_data = [
+            ['Métrica', 'Valor'],
+            ['Promedio General', f"{summary['promedio_general']:.2f}"],
+            ['Calificaciones Anteriores', f"{summary['calificaciones_anteriores']:.2f}"],
+            ['Asistencia', f"{summary['asistencia_porcentaje']:.1f}%"],
+            ['Participación en Clase', str(summary['participacion_clase'])],
+            ['Horas de Estudio Semanal', str(summary['horas_estudio_semanal'])],
+            ['Créditos', f"{summary['creditos_aprobados']}/{summary['creditos_totales']} ({summary['porcentaje_avance']}%)"]
+        ]
+        summary_table = Table(summary_data)
+        summary_table.setStyle(get_table_style())
+        story.extend([summary_table, Spacer(1, 15)])
+        
+        notas = summary['notas_por_materia']
+        notas_table = Table([list(notas.keys()), [f"{nota:.1f}" for nota in notas.values()]])
+        notas_table.setStyle(get_table_style(header_color='steelblue', body_color='aliceblue'))
+        story.extend([notas_table, Spacer(1, 20)])
+        
+        # Gráficos del perfil académico
+        charts_table = chart_images_table(charts or {})
+        if charts_table is not None:
+            story.extend([charts_table, Spacer(1, 20)])
+        
+        # Análisis de riesgo
+        story.append(Paragraph("ANÁLISIS DE RIESGO", styles['Heading2']))
+        story.append(Paragraph(f"<b>Nivel de Riesgo:</b> {risk['nivel_riesgo']}", styles['Normal']))
+        if risk.get('motivo_riesgo'):
+            story.append(Paragraph(f"<b>Motivo:</b> {escape(str(risk['motivo_riesgo']))}", styles['Normal']))
+        
+        for titulo, factores in (("Factores de Riesgo", risk['factores_riesgo']),
+                                 ("Factores Protectores", risk['factores_protectores'])):
+            if factores:
+                story.append(Paragraph(f"<b>{titulo}:</b>", styles['Normal']))
+                story.extend(Paragraph(f"• {factor}", styles['Normal']) for factor in factores)
+        story.append(Spacer(1, 20))
+        
+        # Recomendaciones
+        if report['recommendations']:
+            story.append(Paragraph("RECOMENDACIONES", styles['Heading2']))
+            for i, rec in enumerate(report['recommendations'], 1):
+                story.append(Paragraph(f"<b>{i}. {rec['titulo']}</b> (Prioridad {rec['prioridad']})", styles['Heading3']))
+                story.append(Paragraph(rec['descripcion'], styles['Normal']))
+                story.extend(Paragraph(f"• {accion}", styles['Normal']) for accion in rec.get('acciones', []))
+                story.append(Spacer(1, 10))
+        
+        return story
+    
+    def create_student_pdf(self, report, charts=None):
+        """Crea el PDF individual del estudiante en memoria y devuelve sus bytes"""
+        from reportlab.lib.pagesizes import A4
+        from reportlab.platypus import SimpleDocTemplate
+        import io
+        
+        buffer = io.BytesIO()
+        doc = SimpleDocTemplate(buffer, pagesize=A4, title=report['student_info']['nombre_completo'])
+        doc.build(self.build_student_story(report, charts))
+        return buffer.getvalue()
+    
+    def generate_general_report(self, students_df, statistics, output_path=None, data_version=None,
+                                include_student_annex=False):
+        """Genera reporte general del sistema y crea archivo PDF en memoria.
+        
+        Si se indica `output_path`, el PDF se escribe por segmentos de páginas en
+        ese archivo en lugar de generarse en memoria; el anexo por estudiante
+        solo se agrega con `include_student_annex=True`.
+        """
+        # Una sola pasada sobre el dataset alimenta todas las secciones agregadas
+        aggregates = ReportAggregates(students_df)
+        
         report = {
             'summary': self._generate_general_summary(statistics),
-            'risk_distribution': self._generate_risk_distribution(students_df),
-            'career_analysis': self._generate_career_analysis(students_df),
-            'semester_analysis': self._generate_semester_analysis(students_df),
-            'performance_trends': self._generate_performance_trends(students_df),
+            'risk_distribution': self._generate_risk_distribution(students_df, aggregates),
+            'career_analysis': self._generate_career_analysis(students_df, aggregates),
+            'semester_analysis': self._generate_semester_analysis(students_df, aggregates),
+            'performance_trends': self._generate_performance_trends(students_df, aggregates),
             'recommendations': self._generate_institutional_recommendations(statistics),
-            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'data_version': data_version
         }
         
+        if output_path:
+            # Datasets grandes: maquetado incremental directo a archivo
+            self.write_general_pdf(report, students_df, output_path, include_student_annex)
+            report['pdf_path'] = output_path
+            report['pdf_filename'] = os.path.basename(output_path)
+            return report
+        
         # Generar PDF en memoria para descarga
         pdf_buffer = self._create_pdf_in_memory(report, students_df)
         report['pdf_buffer'] = pdf_buffer
@@ -251,298 +410,204 @@ class ReportGenerator:
         
         return report
     
+    def render_general_pdf(self, report_data, students_df, sink=None, incremental=False,
+                           include_student_annex=False):
+        """Pipeline único de renderizado del reporte general.
+        
+        `sink` puede ser None (bytes en memoria), una ruta de archivo, un flujo
+        con `write` o un destino de src.pdf_stream. Los estilos se toman de la
+        caché del módulo; con `incremental=True` las páginas se maquetan a medida
+        que se generan los elementos (ver write_general_pdf).
+        """
+        from reportlab.lib.pagesizes import A4
+        from reportlab.platypus import SimpleDocTemplate
+        from src.pdf_stream import IncrementalPDFWriter, as_pdf_sink
+        
+        sink = as_pdf_sink(sink)
+        target = sink.open()
+        story = self._iter_general_story(report_data, students_df, include_student_annex)
+        
+        if incremental:
+            writer = IncrementalPDFWriter(target, title="Reporte General del Sistema Académico",
+                                          footer=f"Reporte general - {report_data['timestamp']}")
+            writer.add(story)
+            writer.close()
+            for error in writer.errors:
+                print(f"Error maquetando reporte general: {error}")
+        else:
+            SimpleDocTemplate(target, pagesize=A4).build(list(story))
+        
+        return sink.result()
+    
     def _create_pdf_in_memory(self, report_data, students_df):
         """Crea PDF en memoria para descarga directa"""
         try:
-            from reportlab.lib.pagesizes import A4
-            from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-            from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-            from reportlab.lib import colors
-            import io
-            
-            # Crear buffer en memoria
-            buffer = io.BytesIO()
-            
-            # Crear documento PDF en memoria
-            doc = SimpleDocTemplate(buffer, pagesize=A4)
-            styles = getSampleStyleSheet()
-            story = []
-            
-            # Título
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Heading1'],
-                fontSize=18,
-                spaceAfter=30,
-                alignment=1  # Centrado
-            )
-            story.append(Paragraph("📊 REPORTE GENERAL DEL SISTEMA ACADÉMICO", title_style))
-            story.append(Spacer(1, 20))
-            
-            # Fecha de generación
-            story.append(Paragraph(f"<b>Fecha de Generación:</b> {report_data['timestamp']}", styles['Normal']))
-            story.append(Spacer(1, 20))
-            
-            # Resumen Ejecutivo
-            story.append(Paragraph("🎯 RESUMEN EJECUTIVO", styles['Heading2']))
-            summary = report_data['summary']
-            
-            summary_data = [
-                ['Métrica', 'Valor'],
-                ['Total de Estudiantes', str(summary['total_estudiantes'])],
-                ['Estudiantes en Riesgo', str(summary['estudiantes_riesgo'])],
-                ['Porcentaje en Riesgo', f"{summary['porcentaje_riesgo']}%"],
-                ['Promedio General', f"{summary['promedio_general']:.2f}"],
-                ['Promedio de Asistencia', f"{summary['promedio_asistencia']:.1f}%"],
-                ['Total de Carreras', str(summary['total_carreras'])],
-                ['Semestres Activos', str(summary['semestres_activos'])]
-            ]
-            
-            summary_table = Table(summary_data)
-            summary_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 12),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-            
-            story.append(summary_table)
-            story.append(Spacer(1, 30))
-            
-            # Distribución de Riesgo por Carrera
-            story.append(Paragraph("📚 DISTRIBUCIÓN DE RIESGO POR CARRERA", styles['Heading2']))
-            
-            risk_by_career = report_data['risk_distribution']['por_carrera']
-            career_data = [['Carrera', 'Total Estudiantes', 'En Riesgo', '% Riesgo']]
-            
-            for carrera, stats in risk_by_career.items():
-                total = int(stats['count'])
-                en_riesgo = int(stats['sum'])
-                porcentaje = f"{stats['mean']*100:.1f}%"
-                career_data.append([carrera, str(total), str(en_riesgo), porcentaje])
-            
-            career_table = Table(career_data)
-            career_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-            
-            story.append(career_table)
-            story.append(Spacer(1, 30))
-            
-            # Recomendaciones Institucionales
-            story.append(Paragraph("💡 RECOMENDACIONES INSTITUCIONALES", styles['Heading2']))
-            
-            for i, rec in enumerate(report_data['recommendations'], 1):
-                story.append(Paragraph(f"<b>{i}. {rec['titulo']}</b>", styles['Heading3']))
-                story.append(Paragraph(f"<b>Categoría:</b> {rec['categoria']}", styles['Normal']))
-                story.append(Paragraph(f"<b>Descripción:</b> {rec['descripcion']}", styles['Normal']))
-                
-                if 'acciones' in rec:
-                    story.append(Paragraph("<b>Acciones Recomendadas:</b>", styles['Normal']))
-                    for accion in rec['acciones']:
-                        story.append(Paragraph(f"• {accion}", styles['Normal']))
-                
-                story.append(Spacer(1, 15))
-            
-            # Estadísticas Adicionales
-            story.append(Paragraph("📈 ESTADÍSTICAS DETALLADAS", styles['Heading2']))
-            
-            # Top 5 estudiantes en riesgo
-            students_at_risk = students_df[students_df['rendimiento_riesgo'] == 1].head(5)
-            if not students_at_risk.empty:
-                story.append(Paragraph("<b>Estudiantes que Requieren Atención Inmediata:</b>", styles['Heading3']))
-                
-                risk_students_data = [['Nombre', 'Carrera', 'Semestre', 'Promedio', 'Asistencia']]
-                for _, student in students_at_risk.iterrows():
-                    nombre = f"{student['nombre']} {student['apellido']}"
-                    carrera = student['carrera']
-                    semestre = str(student['semestre'])
-                    promedio = f"{student['calificaciones_anteriores']:.2f}"
-                    asistencia = f"{student['asistencia_porcentaje']:.1f}%"
-                    risk_students_data.append([nombre, carrera, semestre, promedio, asistencia])
-                
-                risk_table = Table(risk_students_data)
-                risk_table.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.red),
-                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                    ('FONTSIZE', (0, 0), (-1, 0), 9),
-                    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                    ('BACKGROUND', (0, 1), (-1, -1), colors.lightcoral),
-                    ('GRID', (0, 0), (-1, -1), 1, colors.black)
-                ]))
-                
-                story.append(risk_table)
-            
-            # Generar PDF en memoria
-            doc.build(story)
-            
-            # Obtener contenido del buffer
-            buffer.seek(0)
-            return buffer.getvalue()
-            
+            return self.render_general_pdf(report_data, students_df)
         except Exception as e:
             print(f"Error generando PDF en memoria: {e}")
             return None
     
+    def write_general_pdf(self, report_data, students_df, sink, include_student_annex=False):
+        """Escribe el reporte general (y, si se pide, el anexo por estudiante) en un archivo o flujo.
+        
+        Pensado para datasets grandes: los elementos se generan bajo demanda y
+        el anexo se pagina en tablas de tamaño fijo, así que nunca se arma la
+        lista completa de elementos, y las páginas llegan al destino por
+        segmentos a medida que se maquetan (ver IncrementalPDFWriter).
+        """
+        return self.render_general_pdf(report_data, students_df, sink, incremental=True,
+                                       include_student_annex=include_student_annex)
+    
+    def _iter_general_story(self, report_data, students_df, include_student_annex=False):
+        """Genera uno a uno los elementos del PDF del reporte general"""
+        from reportlab.platypus import Paragraph, Spacer, Table
+        
+        styles = get_pdf_styles()
+        
+        # Título
+        yield Paragraph("📊 REPORTE GENERAL DEL SISTEMA ACADÉMICO", styles['CustomTitle'])
+        yield Spacer(1, 20)
+        
+        # Fecha de generación
+        yield Paragraph(f"<b>Fecha de Generación:</b> {report_data['timestamp']}", styles['Normal'])
+        yield Spacer(1, 20)
+        
+        # Resumen Ejecutivo
+        yield Paragraph("🎯 RESUMEN EJECUTIVO", styles['Heading2'])
+        summary = report_data['summary']
+        
+        summary_data = [
+            ['Métrica', 'Valor'],
+            ['Total de Estudiantes', str(summary['total_estudiantes'])],
+            ['Estudiantes en Riesgo', str(summary['estudiantes_riesgo'])],
+            ['Porcentaje en Riesgo', f"{summary['porcentaje_riesgo']}%"],
+            ['Promedio General', f"{summary['promedio_general']:.2f}"],
+            ['Promedio de Asistencia', f"{summary['promedio_asistencia']:.1f}%"],
+            ['Total de Carreras', str(summary['total_carreras'])],
+            ['Semestres Activos', str(summary['semestres_activos'])]
+        ]
+        
+        summary_table = Table(summary_data)
+        summary_table.setStyle(get_table_style(header_font_size=12))
+        yield summary_table
+        yield Spacer(1, 30)
+        
+        # Distribución de Riesgo por Carrera
+        yield Paragraph("📚 DISTRIBUCIÓN DE RIESGO POR CARRERA", styles['Heading2'])
+        
+        risk_by_career = report_data['risk_distribution']['por_carrera']
+        career_data = [['Carrera', 'Total Estudiantes', 'En Riesgo', '% Riesgo']]
+        
+        for carrera, stats in risk_by_career.items():
+            total = int(stats['count'])
+            en_riesgo = int(stats['sum'])
+            porcentaje = f"{stats['mean']*100:.1f}%"
+            career_data.append([carrera, str(total), str(en_riesgo), porcentaje])
+        
+        career_table = Table(career_data)
+        career_table.setStyle(get_table_style(header_font_size=10))
+        yield career_table
+        yield Spacer(1, 30)
+        
+        # Recomendaciones Institucionales
+        yield Paragraph("💡 RECOMENDACIONES INSTITUCIONALES", styles['Heading2'])
+        
+        for i, rec in enumerate(report_data['recommendations'], 1):
+            yield Paragraph(f"<b>{i}. {rec['titulo']}</b>", styles['Heading3'])
+            yield Paragraph(f"<b>Categoría:</b> {rec['categoria']}", styles['Normal'])
+            yield Paragraph(f"<b>Descripción:</b> {rec['descripcion']}", styles['Normal'])
+            
+            if 'acciones' in rec:
+                yield Paragraph("<b>Acciones Recomendadas:</b>", styles['Normal'])
+                for accion in rec['acciones']:
+                    yield Paragraph(f"• {accion}", styles['Normal'])
+            
+            yield Spacer(1, 15)
+        
+        # Estadísticas Adicionales
+        yield Paragraph("📈 ESTADÍSTICAS DETALLADAS", styles['Heading2'])
+        
+        # Top 5 estudiantes en riesgo
+        students_at_risk = students_df[students_df['rendimiento_riesgo'] == 1].head(5)
+        if not students_at_risk.empty:
+            yield Paragraph("<b>Estudiantes que Requieren Atención Inmediata:</b>", styles['Heading3'])
+            
+            risk_students_data = [['Nombre', 'Carrera', 'Semestre', 'Promedio', 'Asistencia']]
+            for _, student in students_at_risk.iterrows():
+                nombre = f"{student['nombre']} {student['apellido']}"
+                carrera = student['carrera']
+                semestre = str(student['semestre'])
+                promedio = f"{student['calificaciones_anteriores']:.2f}"
+                asistencia = f"{student['asistencia_porcentaje']:.1f}%"
+                risk_students_data.append([nombre, carrera, semestre, promedio, asistencia])
+            
+            risk_table = Table(risk_students_data)
+            risk_table.setStyle(get_table_style(header_color='red', body_color='lightcoral', header_font_size=9))
+            yield risk_table
+            
+            if self.include_charts:
+                yield from self._iter_student_charts(students_at_risk, report_data.get('data_version'))
+        
+        if include_student_annex:
+            yield from self._iter_student_annex(students_df)
+    
+    def _iter_student_charts(self, students, data_version=None):
+        """Perfil gráfico de cada estudiante listado (reutiliza la caché de imágenes)"""
+        from reportlab.platypus import Paragraph, Spacer
+        
+        styles = get_pdf_styles()
+        columns = list(students.columns)
+        for values in students.itertuples(index=False, name=None):
+            report = self.generate_student_report(dict(zip(columns, values)))
+            charts_table = chart_images_table(self.render_student_charts(report, data_version))
+            if charts_table is None:
+                continue
+            
+            yield Spacer(1, 10)
+            yield Paragraph(f"<b>{escape(str(report['student_info']['nombre_completo']))}</b>", styles['Normal'])
+            yield charts_table
+    
+    def _iter_student_annex(self, students_df, rows_per_chunk=35):
+        """Anexo con una fila por estudiante, paginado en tablas de tamaño fijo"""
+        from reportlab.platypus import Paragraph, Spacer, PageBreak
+        from src.pdf_stream import iter_table_chunks
+        
+        styles = get_pdf_styles()
+        yield PageBreak()
+        yield Paragraph("📋 ANEXO: DETALLE POR ESTUDIANTE", styles['Heading2'])
+        yield Spacer(1, 10)
+        
+        columns = ['id_estudiante', 'nombre', 'apellido', 'carrera', 'semestre',
+                   'calificaciones_anteriores', 'asistencia_porcentaje', 'rendimiento_riesgo']
+        rows = (
+            [str(sid), f"{nombre} {apellido}", str(carrera), str(semestre),
+             f"{calif:.2f}", f"{asist:.1f}%", 'Sí' if riesgo == 1 else 'No']
+            for sid, nombre, apellido, carrera, semestre, calif, asist, riesgo
+            in students_df[columns].itertuples(index=False, name=None)
+        )
+        
+        # Anchos fijos: evita que reportlab mida todas las celdas de cada bloque
+        yield from iter_table_chunks(
+            ['ID', 'Nombre', 'Carrera', 'Sem.', 'Promedio', 'Asistencia', 'Riesgo'],
+            rows,
+            rows_per_chunk=rows_per_chunk,
+            style=get_table_style(header_font_size=9),
+            col_widths=[40, 140, 110, 35, 55, 60, 45]
+        )
+    
     def _create_pdf_report(self, report_data, students_df):
         """Crea archivo PDF físico del reporte"""
-        import os
-        from reportlab.lib.pagesizes import letter, A4
-        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-        from reportlab.lib.units import inch
-        from reportlab.lib import colors
-        
         # Crear directorio de reportes si no existe
         reports_dir = 'reportes'
         os.makedirs(reports_dir, exist_ok=True)
         
         # Nombre del archivo con timestamp
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f'reporte_general_{timestamp}.pdf'
-        filepath = os.path.join(reports_dir, filename)
+        filepath = os.path.join(reports_dir, f'reporte_general_{timestamp}.pdf')
+        summary = report_data['summary']
         
         try:
-            # Crear documento PDF
-            doc = SimpleDocTemplate(filepath, pagesize=A4)
-            styles = getSampleStyleSheet()
-            story = []
-            
-            # Título
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Heading1'],
-                fontSize=18,
-                spaceAfter=30,
-                alignment=1  # Centrado
-            )
-            story.append(Paragraph("📊 REPORTE GENERAL DEL SISTEMA ACADÉMICO", title_style))
-            story.append(Spacer(1, 20))
-            
-            # Fecha de generación
-            story.append(Paragraph(f"<b>Fecha de Generación:</b> {report_data['timestamp']}", styles['Normal']))
-            story.append(Spacer(1, 20))
-            
-            # Resumen Ejecutivo
-            story.append(Paragraph("🎯 RESUMEN EJECUTIVO", styles['Heading2']))
-            summary = report_data['summary']
-            
-            summary_data = [
-                ['Métrica', 'Valor'],
-                ['Total de Estudiantes', str(summary['total_estudiantes'])],
-                ['Estudiantes en Riesgo', str(summary['estudiantes_riesgo'])],
-                ['Porcentaje en Riesgo', f"{summary['porcentaje_riesgo']}%"],
-                ['Promedio General', f"{summary['promedio_general']:.2f}"],
-                ['Promedio de Asistencia', f"{summary['promedio_asistencia']:.1f}%"],
-                ['Total de Carreras', str(summary['total_carreras'])],
-                ['Semestres Activos', str(summary['semestres_activos'])]
-            ]
-            
-            summary_table = Table(summary_data)
-            summary_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 12),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-            
-            story.append(summary_table)
-            story.append(Spacer(1, 30))
-            
-            # Distribución de Riesgo por Carrera
-            story.append(Paragraph("📚 DISTRIBUCIÓN DE RIESGO POR CARRERA", styles['Heading2']))
-            
-            risk_by_career = report_data['risk_distribution']['por_carrera']
-            career_data = [['Carrera', 'Total Estudiantes', 'En Riesgo', '% Riesgo']]
-            
-            for carrera, stats in risk_by_career.items():
-                total = int(stats['count'])
-                en_riesgo = int(stats['sum'])
-                porcentaje = f"{stats['mean']*100:.1f}%"
-                career_data.append([carrera, str(total), str(en_riesgo), porcentaje])
-            
-            career_table = Table(career_data)
-            career_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-            
-            story.append(career_table)
-            story.append(Spacer(1, 30))
-            
-            # Recomendaciones Institucionales
-            story.append(Paragraph("💡 RECOMENDACIONES INSTITUCIONALES", styles['Heading2']))
-            
-            for i, rec in enumerate(report_data['recommendations'], 1):
-                story.append(Paragraph(f"<b>{i}. {rec['titulo']}</b>", styles['Heading3']))
-                story.append(Paragraph(f"<b>Categoría:</b> {rec['categoria']}", styles['Normal']))
-                story.append(Paragraph(f"<b>Descripción:</b> {rec['descripcion']}", styles['Normal']))
-                
-                if 'acciones' in rec:
-                    story.append(Paragraph("<b>Acciones Recomendadas:</b>", styles['Normal']))
-                    for accion in rec['acciones']:
-                        story.append(Paragraph(f"• {accion}", styles['Normal']))
-                
-                story.append(Spacer(1, 15))
-            
-            # Estadísticas Adicionales
-            story.append(Paragraph("📈 ESTADÍSTICAS DETALLADAS", styles['Heading2']))
-            
-            # Top 5 estudiantes en riesgo
-            students_at_risk = students_df[students_df['rendimiento_riesgo'] == 1].head(5)
-            if not students_at_risk.empty:
-                story.append(Paragraph("<b>Estudiantes que Requieren Atención Inmediata:</b>", styles['Heading3']))
-                
-                risk_students_data = [['Nombre', 'Carrera', 'Semestre', 'Promedio', 'Asistencia']]
-                for _, student in students_at_risk.iterrows():
-                    nombre = f"{student['nombre']} {student['apellido']}"
-                    carrera = student['carrera']
-                    semestre = str(student['semestre'])
-                    promedio = f"{student['calificaciones_anteriores']:.2f}"
-                    asistencia = f"{student['asistencia_porcentaje']:.1f}%"
-                    risk_students_data.append([nombre, carrera, semestre, promedio, asistencia])
-                
-                risk_table = Table(risk_students_data)
-                risk_table.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.red),
-                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                    ('FONTSIZE', (0, 0), (-1, 0), 9),
-                    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                    ('BACKGROUND', (0, 1), (-1, -1), colors.lightcoral),
-                    ('GRID', (0, 0), (-1, -1), 1, colors.black)
-                ]))
-                
-                story.append(risk_table)
-            
-            # Generar PDF
-            doc.build(story)
-            
-            return filepath
+            return self.render_general_pdf(report_data, students_df, filepath)
             
         except ImportError:
             # Si reportlab no está disponible, crear un archivo de texto simple
@@ -587,70 +652,36 @@ class ReportGenerator:
             'semestres_activos': len(statistics.get('semestres', []))
         }
     
-    def _generate_risk_distribution(self, students_df):
+    def _generate_risk_distribution(self, students_df, aggregates=None):
         """Genera análisis de distribución de riesgo"""
-        risk_by_career = students_df.groupby('carrera')['rendimiento_riesgo'].agg(['count', 'sum', 'mean']).round(3)
-        risk_by_semester = students_df.groupby('semestre')['rendimiento_riesgo'].agg(['count', 'sum', 'mean']).round(3)
+        aggregates = aggregates or ReportAggregates(students_df)
         
         return {
-            'por_carrera': risk_by_career.to_dict('index'),
-            'por_semestre': risk_by_semester.to_dict('index'),
-            'total_riesgo': students_df['rendimiento_riesgo'].sum(),
-            'porcentaje_riesgo': round(students_df['rendimiento_riesgo'].mean() * 100, 1)
+            'por_carrera': aggregates.risk_by_group('carrera'),
+            'por_semestre': aggregates.risk_by_group('semestre'),
+            'total_riesgo': int(round(aggregates.total('rendimiento_riesgo'))),
+            'porcentaje_riesgo': round(aggregates.mean('rendimiento_riesgo') * 100, 1)
         }
     
-    def _generate_career_analysis(self, students_df):
+    def _generate_career_analysis(self, students_df, aggregates=None):
         """Genera análisis por carrera"""
-        career_stats = students_df.groupby('carrera').agg({
-            'calificaciones_anteriores': ['mean', 'std', 'count'],
-            'asistencia_porcentaje': ['mean', 'std'],
-            'participacion_clase': ['mean', 'std'],
-            'rendimiento_riesgo': ['sum', 'mean']
-        }).round(2)
-        
-        return career_stats.to_dict('index')
+        aggregates = aggregates or ReportAggregates(students_df)
+        return aggregates.group_analysis('carrera')
     
-    def _generate_semester_analysis(self, students_df):
+    def _generate_semester_analysis(self, students_df, aggregates=None):
         """Genera análisis por semestre"""
-        semester_stats = students_df.groupby('semestre').agg({
-            'calificaciones_anteriores': ['mean', 'std', 'count'],
-            'asistencia_porcentaje': ['mean', 'std'],
-            'participacion_clase': ['mean', 'std'],
-            'rendimiento_riesgo': ['sum', 'mean']
-        }).round(2)
-        
-        return semester_stats.to_dict('index')
+        aggregates = aggregates or ReportAggregates(students_df)
+        return aggregates.group_analysis('semestre')
     
-    def _generate_performance_trends(self, students_df):
+    def _generate_performance_trends(self, students_df, aggregates=None):
         """Genera análisis de tendencias de rendimiento"""
-        # Correlaciones entre variables
-        numeric_cols = ['calificaciones_anteriores', 'asistencia_porcentaje', 'participacion_clase', 
-                       'horas_estudio_semanal', 'rendimiento_riesgo']
-        
-        correlations = students_df[numeric_cols].corr().round(3)
-        
-        # Identificar estudiantes de alto y bajo rendimiento
-        high_performers = students_df[students_df['calificaciones_anteriores'] >= 8.5]
-        low_performers = students_df[students_df['calificaciones_anteriores'] < 6.0]
+        aggregates = aggregates or ReportAggregates(students_df)
         
+        # Correlaciones y perfiles de alto y bajo rendimiento a partir de los momentos
         return {
-            'correlaciones': correlations.to_dict(),
-            'alto_rendimiento': {
-                'count': len(high_performers),
-                'caracteristicas': {
-                    'asistencia_promedio': high_performers['asistencia_porcentaje'].mean(),
-                    'participacion_promedio': high_performers['participacion_clase'].mean(),
-                    'horas_estudio_promedio': high_performers['horas_estudio_semanal'].mean()
-                }
-            },
-            'bajo_rendimiento': {
-                'count': len(low_performers),
-                'caracteristicas': {
-                    'asistencia_promedio': low_performers['asistencia_porcentaje'].mean(),
-                    'participacion_promedio': low_performers['participacion_clase'].mean(),
-                    'horas_estudio_promedio': low_performers['horas_estudio_semanal'].mean()
-                }
-            }
+            'correlaciones': aggregates.correlations().to_dict(),
+            'alto_rendimiento': aggregates.performer_profile(high=True),
+            'bajo_rendimiento': aggregates.performer_profile(high=False)
         }
     
     def _generate_institutional_recommendations(self, statistics):
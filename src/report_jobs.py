@@ -0,0 +1,176 @@
+import os
+import re
+import tempfile
+import unicodedata
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from src.report_cache import report_cache
+
+# A partir de este número de estudiantes el reporte general se escribe por
+# segmentos directo a un archivo temporal en lugar de devolverse como bytes
+STREAMING_MIN_ROWS = int(os.getenv('REPORT_STREAMING_MIN_ROWS', '5000'))
+
+def _build_general_report(students_df, statistics, data_version=None, include_student_annex=False):
+    """Genera el reporte general dentro de un proceso del pool"""
+    from src.report_generator import report_generator
+    
+    # El anexo (una fila por estudiante) solo se incluye si se pide y siempre va a archivo
+    if include_student_annex or len(students_df) >= STREAMING_MIN_ROWS:
+        filename = f"reporte_general_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+        output_path = os.path.join(tempfile.gettempdir(), f"{uuid.uuid4().hex[:8]}_{filename}")
+        report = report_generator.generate_general_report(students_df, statistics, output_path=output_path,
+                                                          data_version=data_version,
+                                                          include_student_annex=include_student_annex)
+        report['pdf_filename'] = filename
+        return report
+    
+    return report_generator.generate_general_report(students_df, statistics, data_version=data_version)
+
+def _build_cohort_report(students_df, carrera, output_format, data_version=None):
+    """Genera los reportes individuales de la cohorte en un archivo temporal"""
+    from src.cohort_reports import cohort_reports, select_cohort
+    
+    cohort = select_cohort(students_df, carrera=carrera)
+    ascii_name = unicodedata.normalize('NFKD', carrera or 'todas').encode('ascii', 'ignore').decode('ascii')
+    slug = re.sub(r'[^A-Za-z0-9]+', '_', ascii_name).strip('_').lower() or 'cohorte'
+    extension = 'zip' if output_format == 'zip' else 'pdf'
+    # Sufijo único: dos trabajos en el mismo segundo no deben pisarse el archivo ni el artefacto
+    filename = f"reportes_{slug}_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}.{extension}"
+    output_path = os.path.join(tempfile.gettempdir(), filename)
+    
+    if output_format == 'zip':
+        result = cohort_reports.build_zip(cohort, output_path, data_version=data_version)
+    else:
+        # El PDF combinado se escribe en disco por segmentos de páginas (ver IncrementalPDFWriter)
+        result = cohort_reports.build_merged_pdf(cohort, output_path, data_version=data_version)
+    
+    result.update({'filename': filename, 'carrera': carrera, 'format': extension})
+    return result
+
+class ReportJobQueue:
+    """Cola de trabajos de reportes respaldada por un pool de procesos.
+    
+    Los callbacks encolan el trabajo y reciben un id al instante; la
+    interfaz consulta después el estado con `get_job` hasta que termina.
+    El pool está acotado a `max_workers` procesos, de modo que varias
+    solicitudes simultáneas esperan su turno sin ocupar los hilos del
+    servidor web.
+    """
+    
+    def __init__(self, max_workers=2, max_jobs=100, cache=None):
+        self.max_workers = max_workers
+        self.max_jobs = max_jobs
+        self.cache = cache
+        self._executor = None
+        self._coordinator = None
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def _get_executor(self):
+        # El pool se crea en el primer uso para no lanzar procesos al importar
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+    
+    def _get_coordinator(self):
+        # Los reportes por cohorte administran su propio pool de procesos; aquí
+        # solo se coordina su ejecución, uno a la vez, en un hilo aparte
+        if self._coordinator is None:
+            self._coordinator = ThreadPoolExecutor(max_workers=1, thread_name_prefix='cohort-reports')
+        return self._coordinator
+    
+    def submit_general_report(self, students_df, statistics, data_version=None, include_student_annex=False):
+        """Encola la generación del reporte general y devuelve el id del trabajo"""
+        if data_version is None:
+            # Importación diferida: los procesos del pool no necesitan cargar el dataset
+            from src.data_processor import compute_data_version
+            data_version = compute_data_version(students_df)
+        params = {'anexo': True} if include_student_annex else None
+        cache_key = self.cache.make_key(data_version, 'general', params) if self.cache else None
+        return self._submit('general', cache_key, _build_general_report, students_df, statistics, data_version,
+                            include_student_annex)
+    
+    def submit_cohort_report(self, students_df, carrera=None, output_format='zip', data_version=None):
+        """Encola los reportes individuales de los estudiantes en riesgo de una carrera"""
+        return self._submit('cohort', None, _build_cohort_report, students_df, carrera, output_format,
+                            data_version, executor=self._get_coordinator())
+    
+    def _submit(self, report_type, cache_key, fn, *args, executor=None):
+        job_id = uuid.uuid4().hex
+        cached = self.cache.get(cache_key) if cache_key else None
+        
+        with self._lock:
+            if cached is not None:
+                # Mismos datos y parámetros: se reutiliza el reporte ya generado
+                future = Future()
+                future.set_result(cached)
+            else:
+                future = (executor or self._get_executor()).submit(fn, *args)
+                if cache_key:
+                    future.add_done_callback(lambda f: self._store_result(cache_key, f))
+            
+            self._jobs[job_id] = {
+                'type': report_type,
+                'future': future,
+                'created': datetime.now().isoformat()
+            }
+            self._prune()
+        return job_id
+    
+    def _store_result(self, cache_key, future):
+        """Guarda en caché el resultado de un trabajo terminado correctamente"""
+        if future.cancelled() or future.exception() is not None:
+            return
+        # Los reportes escritos en disco se mueven al almacén de artefactos; no se cachean
+        if not future.result().get('pdf_path'):
+            self.cache.put(cache_key, future.result())
+    
+    def _prune(self):
+        """Descarta los trabajos terminados más antiguos si se supera el límite"""
+        excess = len(self._jobs) - self.max_jobs
+        for job_id in list(self._jobs):
+            if excess <= 0:
+                break
+            if self._jobs[job_id]['future'].done():
+                del self._jobs[job_id]
+                excess -= 1
+    
+    def get_job(self, job_id):
+        """Devuelve el estado del trabajo: pending, running, done o error"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        
+        future = job['future']
+        status = {'id': job_id, 'type': job['type'], 'created': job['created']}
+        
+        if not future.done():
+            status['status'] = 'running' if future.running() else 'pending'
+        elif future.exception() is not None:
+            status['status'] = 'error'
+            status['error'] = str(future.exception())
+        else:
+            status['status'] = 'done'
+            status['result'] = future.result()
+        
+        return status
+    
+    def forget(self, job_id):
+        """Elimina un trabajo ya consultado"""
+        with self._lock:
+            self._jobs.pop(job_id, None)
+    
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        if self._coordinator is not None:
+            self._coordinator.shutdown(wait=False, cancel_futures=True)
+            self._coordinator = None
+
+# Instancia global de la cola de reportes
+report_jobs = ReportJobQueue(max_workers=int(os.getenv('REPORT_WORKERS', '2')), cache=report_cache)
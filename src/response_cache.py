@@ -0,0 +1,190 @@
+import os
+import math
+import re
+import time
+import threading
+from collections import Counter, OrderedDict
+from src.name_index import normalize_name, FILLER_WORDS
+
+def normalize_prompt(prompt):
+    """Normaliza una consulta: sin tildes, minúsculas, sin signos de puntuación y espacios simples"""
+    return ' '.join(re.sub(r'[^\w\s]', ' ', normalize_name(prompt)).split())
+
+def prompt_features(normalized):
+    """Trigramas de caracteres de cada palabra (toleran plurales, errores de tipeo y reordenamientos)"""
+    grams = Counter()
+    for word in normalized.split():
+        padded = f" {word} "
+        for i in range(len(padded) - 2):
+            grams[padded[i:i + 3]] += 1
+    return grams
+
+def words_compatible(words, other_words):
+    """Indica si dos consultas solo difieren en relleno o en variantes de la misma palabra.
+    
+    Cada palabra que no está en la otra consulta debe ser de relleno o tener
+    una variante con el mismo prefijo de 5 letras (plural, conjugación).
+    Las palabras cortas ("no", "sin", números) deben coincidir exactamente,
+    así "en riesgo" y "no en riesgo" nunca se consideran equivalentes.
+    """
+    for word in words ^ other_words:
+        if word in FILLER_WORDS:
+            continue
+        counterpart = other_words if word in words else words
+        if len(word) < 5 or not any(len(other) >= 5 and other[:5] == word[:5] for other in counterpart):
+            return False
+    return True
+
+class ResponseCache:
+    """Caché de respuestas del chat para preguntas repetidas.
+    
+    Dos niveles:
+    
+    1. exacto: (versión de datos, consulta normalizada, estudiantes mencionados)
+    2. similar: similitud coseno TF-IDF sobre trigramas de caracteres contra
+       las consultas guardadas con la misma versión y los mismos estudiantes
+       mencionados, para reconocer paráfrasis ("¿cuántos estudiantes están en
+       riesgo?" / "cuantos estudiantes hay en riesgo"), siempre que ambas
+       consultas solo difieran en palabras de relleno o variantes (ver
+       `words_compatible`)
+    
+    Las entradas vencen a los `ttl_seconds` y se descartan todas cuando cambia
+    la versión del dataset. `similarity_threshold=0` desactiva el segundo nivel.
+    """
+    
+    def __init__(self, ttl_seconds=600, max_entries=500, similarity_threshold=0.8):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self._entries = OrderedDict()
+        self._document_frequency = Counter()
+        self._version = None
+        self._lock = threading.Lock()
+        self.stats = {'exact_hits': 0, 'similar_hits': 0, 'misses': 0, 'expired': 0,
+                      'invalidations': 0, 'evictions': 0}
+    
+    @staticmethod
+    def make_key(prompt, data_version, entities=()):
+        return (data_version, normalize_prompt(prompt), tuple(sorted(entities)))
+    
+    def _check_version(self, data_version):
+        # Con datos nuevos ninguna respuesta guardada sigue siendo válida
+        if data_version != self._version:
+            if self._entries:
+                self.stats['invalidations'] += 1
+            self._entries.clear()
+            self._document_frequency.clear()
+            self._version = data_version
+    
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._document_frequency.subtract(entry['features'].keys())
+        self._document_frequency += Counter()
+        return entry
+    
+    def _is_expired(self, entry, now):
+        return now - entry['created_at'] > self.ttl_seconds
+    
+    def _idf(self, gram, total):
+        return math.log((total + 1) / (self._document_frequency.get(gram, 0) + 1)) + 1
+    
+    def _find_similar(self, key, features, now):
+        words = set(key[1].split())
+        total = len(self._entries)
+        query = {gram: count * self._idf(gram, total) for gram, count in features.items()}
+        query_norm = math.sqrt(sum(weight * weight for weight in query.values()))
+        if not query_norm:
+            return None, 0.0
+        
+        best_key, best_score = None, 0.0
+        for entry_key, entry in self._entries.items():
+            # Solo se comparan consultas sobre los mismos estudiantes
+            if entry_key[2] != key[2] or self._is_expired(entry, now):
+                continue
+            if not words_compatible(words, entry['words']):
+                continue
+            weights = {gram: count * self._idf(gram, total) for gram, count in entry['features'].items()}
+            norm = math.sqrt(sum(weight * weight for weight in weights.values()))
+            dot = sum(weight * weights[gram] for gram, weight in query.items() if gram in weights)
+            score = dot / (query_norm * norm) if norm else 0.0
+            if score > best_score:
+                best_key, best_score = entry_key, score
+        return best_key, best_score
+    
+    def get(self, prompt, data_version, entities=()):
+        """Devuelve la respuesta guardada para la consulta (o una equivalente) o None"""
+        key = self.make_key(prompt, data_version, entities)
+        now = time.time()
+        
+        with self._lock:
+            self._check_version(data_version)
+            
+            entry = self._entries.get(key)
+            if entry is not None and self._is_expired(entry, now):
+                self._remove(key)
+                self.stats['expired'] += 1
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.stats['exact_hits'] += 1
+                return entry['response']
+            
+            if self.similarity_threshold > 0 and self._entries:
+                similar_key, score = self._find_similar(key, prompt_features(key[1]), now)
+                if similar_key is not None and score >= self.similarity_threshold:
+                    self._entries.move_to_end(similar_key)
+                    self.stats['similar_hits'] += 1
+                    return self._entries[similar_key]['response']
+            
+            self.stats['misses'] += 1
+            return None
+    
+    def put(self, prompt, data_version, response, entities=()):
+        """Guarda la respuesta de una consulta, expulsando las menos usadas si hace falta"""
+        if not response:
+            return
+        key = self.make_key(prompt, data_version, entities)
+        
+        with self._lock:
+            self._check_version(data_version)
+            if key in self._entries:
+                self._remove(key)
+            
+            features = prompt_features(key[1])
+            self._entries[key] = {
+                'response': response,
+                'features': features,
+                'words': set(key[1].split()),
+                'created_at': time.time()
+            }
+            self._document_frequency.update(features.keys())
+            
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.stats['evictions'] += 1
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._document_frequency.clear()
+    
+    def get_stats(self):
+        """Estadísticas de uso de la caché (incluye la tasa de aciertos)"""
+        with self._lock:
+            hits = self.stats['exact_hits'] + self.stats['similar_hits']
+            lookups = hits + self.stats['misses']
+            return {
+                **self.stats,
+                'hit_rate': round(hits / lookups, 3) if lookups else 0.0,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'similarity_threshold': self.similarity_threshold
+            }
+
+# Instancia global de la caché de respuestas del chat
+response_cache = ResponseCache(
+    ttl_seconds=int(os.getenv('CHAT_CACHE_TTL', '600')),
+    max_entries=int(os.getenv('CHAT_CACHE_MAX_ENTRIES', '500')),
+    similarity_threshold=float(os.getenv('CHAT_CACHE_SIMILARITY', '0.8'))
+)
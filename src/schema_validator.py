@@ -0,0 +1,129 @@
+import numpy as np
+import pandas as pd
+
+# Esquema de un estudiante nuevo: tipo de cada campo obligatorio, rango y valores permitidos
+STUDENT_SCHEMA = {
+    'nombre': {'tipo': 'texto'},
+    'apellido': {'tipo': 'texto'},
+    'edad': {'tipo': 'entero', 'rango': (16, 50)},
+    'genero': {'tipo': 'texto', 'valores': ('M', 'F')},
+    'carrera': {'tipo': 'texto'},
+    'semestre': {'tipo': 'entero'},
+    'calificaciones_anteriores': {'tipo': 'numero', 'rango': (0, 10)},
+    'asistencia_porcentaje': {'tipo': 'entero', 'rango': (0, 100)},
+    'participacion_clase': {'tipo': 'entero'},
+    'horas_estudio_semanal': {'tipo': 'entero'},
+    'nivel_socioeconomico': {'tipo': 'texto', 'valores': ('Bajo', 'Medio', 'Alto')}
+}
+
+# Mensajes de validate_data para los códigos que ya tenían uno propio
+ERROR_MESSAGES = {
+    'tipo:edad': "Edad debe ser un número entero",
+    'rango:edad': "Edad debe estar entre 16 y 50 años",
+    'tipo:calificaciones_anteriores': "Calificaciones deben ser un número",
+    'rango:calificaciones_anteriores': "Calificaciones deben estar entre 0 y 10",
+    'tipo:asistencia_porcentaje': "Asistencia debe ser un número entero",
+    'rango:asistencia_porcentaje': "Asistencia debe estar entre 0 y 100%"
+}
+
+def per_row(values, row_codes, missing_value):
+    """Proyecta a las filas un arreglo calculado por valor distinto (código -1 = valor faltante)"""
+    return np.append(values, missing_value)[row_codes]
+
+class SchemaValidator:
+    """Validación columnar de estudiantes contra un esquema.
+    
+    Cada regla (requerido, tipo, rango o valor permitido de un campo) es un
+    bit de un código entero por fila: `validate` evalúa todas las reglas con
+    máscaras vectorizadas sobre el DataFrame completo, en una sola pasada por
+    columna, y devuelve los códigos (0 = fila válida). Los mensajes de error
+    se arman después con `error_messages`, solo para las filas que se
+    muestran.
+    """
+    
+    def __init__(self, schema):
+        self.schema = schema
+        self.rules = []
+        for field, spec in schema.items():
+            self.rules.append(f"requerido:{field}")
+            if spec['tipo'] != 'texto':
+                self.rules.append(f"tipo:{field}")
+            if 'rango' in spec:
+                self.rules.append(f"rango:{field}")
+            if 'valores' in spec:
+                self.rules.append(f"valor:{field}")
+        self.bits = {rule: np.int64(1) << position for position, rule in enumerate(self.rules)}
+    
+    def validate(self, df):
+        """Códigos de error por fila (máscara de bits de las reglas que fallan; 0 = fila válida)"""
+        codes = np.zeros(len(df), dtype=np.int64)
+        
+        for field, spec in self.schema.items():
+            if field not in df.columns:
+                codes |= self.bits[f"requerido:{field}"]
+                continue
+            
+            column = df[field]
+            if pd.api.types.is_numeric_dtype(column):
+                numbers = column.to_numpy(dtype=float, na_value=np.nan)
+                missing = np.isnan(numbers)
+                allowed = column.isin(spec['valores']).to_numpy() if 'valores' in spec else None
+            else:
+                # Textos y columnas mixtas: cada verificación se hace una vez por valor distinto
+                row_codes, uniques = pd.factorize(column)
+                uniques = np.asarray(uniques, dtype=object)
+                blank = np.array([isinstance(value, str) and not value.strip() for value in uniques], dtype=bool)
+                missing = per_row(blank, row_codes, True)
+                numbers = per_row(pd.to_numeric(uniques, errors='coerce').astype(float), row_codes, np.nan) \
+                    if spec['tipo'] != 'texto' else None
+                allowed = per_row(np.isin(uniques, spec['valores']), row_codes, False) if 'valores' in spec else None
+            
+            codes[missing] |= self.bits[f"requerido:{field}"]
+            present = ~missing
+            
+            if spec['tipo'] != 'texto':
+                invalid = present & np.isnan(numbers)
+                if spec['tipo'] == 'entero':
+                    invalid |= present & (np.mod(numbers, 1) != 0) & ~np.isnan(numbers)
+                codes[invalid] |= self.bits[f"tipo:{field}"]
+                
+                if 'rango' in spec:
+                    low, high = spec['rango']
+                    with np.errstate(invalid='ignore'):
+                        out_of_range = present & ~invalid & ((numbers < low) | (numbers > high))
+                    codes[out_of_range] |= self.bits[f"rango:{field}"]
+            
+            if allowed is not None:
+                codes[present & ~allowed] |= self.bits[f"valor:{field}"]
+        
+        return pd.Series(codes, index=df.index)
+    
+    def error_codes(self, code):
+        """Reglas que fallan en una fila, p. ej. ['requerido:nombre', 'rango:edad']"""
+        return [rule for rule in self.rules if code & self.bits[rule]]
+    
+    def error_messages(self, code):
+        """Mensajes de error de una fila a partir de su código"""
+        messages = []
+        for rule in self.error_codes(code):
+            kind, field = rule.split(':', 1)
+            if rule in ERROR_MESSAGES:
+                messages.append(ERROR_MESSAGES[rule])
+            elif kind == 'requerido':
+                messages.append(f"Campo requerido faltante: {field}")
+            elif kind == 'tipo':
+                tipo = 'un número entero' if self.schema[field]['tipo'] == 'entero' else 'un número'
+                messages.append(f"{field} debe ser {tipo}")
+            elif kind == 'rango':
+                low, high = self.schema[field]['rango']
+                messages.append(f"{field} debe estar entre {low} y {high}")
+            else:
+                messages.append(f"{field} debe ser uno de: {', '.join(self.schema[field]['valores'])}")
+        return messages
+    
+    def validate_record(self, record):
+        """Mensajes de error de un solo estudiante (diccionario)"""
+        return self.error_messages(int(self.validate(pd.DataFrame([record])).iloc[0]))
+
+# Instancia global del validador de estudiantes
+schema_validator = SchemaValidator(STUDENT_SCHEMA)